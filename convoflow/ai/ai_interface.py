@@ -1,33 +1,241 @@
+import threading
+import torch
 from transformers import pipeline
 import logging
 
+from convoflow import tracing
+from convoflow.ai.lexical import LexicalMatcher
+from convoflow.ai.route_cache import RouteCache
+
 logger = logging.getLogger(__name__)
 
+
+class ZeroShotBackend:
+    """Cross-encoder NLI model run through the zero-shot-classification pipeline."""
+
+    default_model = "facebook/bart-large-mnli"
+    hypothesis_template = "This example is {}."  # Same template the pipeline uses
+
+    def __init__(self, model_name=None):
+        self.model_name = model_name or self.default_model
+        self.classifier = pipeline("zero-shot-classification", model=self.model_name)
+        self._entailment_id = find_entailment_id(self.classifier.model.config)
+
+    def classify(self, user_input, candidate_labels):
+        """Returns (labels, scores) sorted by descending score."""
+        results = self.classifier(user_input, candidate_labels, hypothesis_template=self.hypothesis_template)
+        if not results:
+            return [], []
+        return results['labels'], results['scores']
+
+    @torch.no_grad()
+    def classify_batch(self, requests):
+        """
+        Scores every (input, label) pair of several requests in one forward pass.
+        Per request, entailment logits are softmaxed across its labels, matching the pipeline.
+
+        Args:
+            requests (list[tuple[str, list[str]]]): (user_input, candidate_labels) pairs.
+        Returns:
+            list of (labels, scores) tuples, sorted by descending score, one per request.
+        """
+        premises, hypotheses, spans = build_nli_pairs(requests, self.hypothesis_template)
+        model = self.classifier.model
+        inputs = self.classifier.tokenizer(
+            premises, hypotheses, padding=True, truncation="only_first", return_tensors="pt"
+        ).to(model.device)
+        logits = model(**inputs).logits
+        return rank_by_entailment(requests, spans, logits[:, self._entailment_id])
+
+
+def find_entailment_id(config):
+    return next((idx for label, idx in config.label2id.items() if label.lower().startswith("entail")), -1)
+
+
+def build_nli_pairs(requests, hypothesis_template):
+    """Flattens (user_input, candidate_labels) requests into premise/hypothesis pairs plus per-request spans."""
+    premises, hypotheses, spans = [], [], []
+    for user_input, candidate_labels in requests:
+        start = len(premises)
+        for label in candidate_labels:
+            premises.append(user_input)
+            hypotheses.append(hypothesis_template.format(label))
+        spans.append((start, len(premises)))
+    return premises, hypotheses, spans
+
+
+def rank_by_entailment(requests, spans, entail_logits):
+    """Softmaxes entailment logits within each request's span and ranks its labels."""
+    outputs = []
+    for (start, end), (_, candidate_labels) in zip(spans, requests):
+        scores = entail_logits[start:end].softmax(dim=-1)
+        order = torch.argsort(scores, descending=True).tolist()
+        outputs.append(([candidate_labels[i] for i in order], [scores[i].item() for i in order]))
+    return outputs
+
+
+def _create_backend(backend, model_name):
+    if not isinstance(backend, str):
+        return backend  # Already-constructed backend instance
+    if backend == "zero-shot":
+        return ZeroShotBackend(model_name)
+    if backend == "embedding":
+        from convoflow.ai.embedding_backend import EmbeddingBackend
+        return EmbeddingBackend(model_name)
+    if backend == "torch-int8":
+        from convoflow.ai.quantized_backend import TorchInt8Backend
+        return TorchInt8Backend(model_name)
+    if backend == "onnx-int8":
+        from convoflow.ai.quantized_backend import OnnxInt8Backend
+        return OnnxInt8Backend(model_name)
+    raise ValueError(
+        f"Unknown router backend '{backend}'. Expected 'zero-shot', 'embedding', 'torch-int8' or 'onnx-int8'."
+    )
+
+
+def _backend_id(backend):
+    """Identifies the routing model, e.g. 'ZeroShotBackend:facebook/bart-large-mnli', for the route cache."""
+    model_name = getattr(backend, "model_name", None)
+    name = type(backend).__name__
+    return f"{name}:{model_name}" if model_name else name
+
+
 class AIRouter:
-    def __init__(self, model_name="facebook/bart-large-mnli"):
-        self.classifier = pipeline("zero-shot-classification", model=model_name)
+    def __init__(self, model_name=None, backend="zero-shot", cache_size=1024, cache_ttl=None, cache_path=None,
+                 lexical_threshold=1.0):
+        """
+        Args:
+            model_name (str): Model for the backend. Defaults to the backend's own default.
+            backend (str | object): 'zero-shot' (BART NLI), 'embedding' (sentence embeddings),
+                                    'torch-int8' / 'onnx-int8' (dynamically quantized BART NLI for CPU),
+                                    or any object exposing classify(user_input, candidate_labels).
+            cache_size (int): Max routing decisions kept in the LRU cache. 0 disables caching.
+            cache_ttl (float): Seconds a cached decision stays valid. None never expires.
+            cache_path (str): Optional JSON file the cache is loaded from and saved to at exit.
+            lexical_threshold (float): Minimum keyword-match score for the lexical fast path to
+                                       answer without the model. The default, 1.0, needs every
+                                       content word of the label. None disables the fast path.
+        """
+        self.backend = _create_backend(backend, model_name)
+        self.cache = RouteCache(cache_size, cache_ttl, cache_path, model=_backend_id(self.backend)) if cache_size else None
+        self.lexical = LexicalMatcher(threshold=lexical_threshold) if lexical_threshold is not None else None
 
-    def choose_route(self, user_input, candidate_labels: list[str]):
-        """Classifies user input against candidate labels."""
+        self.turns = 0           # Routing decisions between two or more candidates
+        self.fast_path_hits = 0  # ...of which the lexical tier answered
+        self._stats_lock = threading.Lock()
+
+    @property
+    def fast_path_ratio(self):
+        return self.fast_path_hits / self.turns if self.turns else 0.0
+
+    def stats(self):
+        stats = {"turns": self.turns, "fast_path_hits": self.fast_path_hits, "fast_path_ratio": self.fast_path_ratio}
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def warm(self, graph_store):
+        """Precomputes per-label state (e.g. embeddings) for every transition keyword in the graph."""
+        precompute = getattr(self.backend, "precompute_graph", None)
+        if precompute is not None:
+            precompute(graph_store)
+
+    def _route_without_model(self, user_input, candidate_labels):
+        """
+        Resolves a request from trivial cases or the cache.
+        Returns (resolved, label, cache_key); the model is only needed when resolved is False.
+        """
         if not candidate_labels:
             logger.warning(f"Choose route called with no candidate labels for input: '{user_input}'")
-            return None
+            return True, None, None
 
         if len(candidate_labels) == 1:
-            return candidate_labels[0]
+            return True, candidate_labels[0], None
+
+        fast_label = None
+        if self.lexical is not None:
+            fast_label, score = self.lexical.match(user_input, candidate_labels)
+        with self._stats_lock:
+            self.turns += 1
+            self.fast_path_hits += fast_label is not None
+        if fast_label is not None:
+            logger.info(f"Best: '{fast_label}' (lexical match {score:.2f})")
+            return True, fast_label, None
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = RouteCache.make_key(user_input, candidate_labels)
+            cached_label = self.cache.get(cache_key)
+            if cached_label is not None:
+                logger.info(f"Best: '{cached_label}' (cached)")
+                return True, cached_label, cache_key
 
-        # Run zero-shot classification
-        results = self.classifier(user_input, candidate_labels)
+        return False, None, cache_key
+
+    def try_fast_route(self, user_input, candidate_labels, threshold=1.0, margin=0.5):
+        """
+        Returns a label only when the lexical tier matches it outright, else None. Used to
+        stop listening early on a partial ASR hypothesis, so the defaults are stricter than
+        routing's: every content word of the label, and no other label close behind. Even a
+        lone candidate must match. Cheap enough to call on every partial; does not count as a turn.
+        """
+        if self.lexical is None or not candidate_labels:
+            return None
+        return self.lexical.match(user_input, candidate_labels, threshold=threshold, margin=margin)[0]
 
-        if not results or not results['labels']:
+    @tracing.traced("route")
+    def choose_route(self, user_input, candidate_labels: list[str]):
+        """Classifies user input against candidate labels."""
+        resolved, label, cache_key = self._route_without_model(user_input, candidate_labels)
+        if resolved:
+            return label
+
+        labels, scores = self.backend.classify(user_input, candidate_labels)
+        return self._finish_route(user_input, candidate_labels, labels, scores, cache_key)
+
+    @tracing.traced("route.batch")
+    def choose_routes(self, requests):
+        """
+        Routes several (user_input, candidate_labels) requests, sending every request the
+        cache can't answer to the backend as a single batch.
+        """
+        results = [None] * len(requests)
+        pending = []  # (index, cache_key)
+        for i, (user_input, candidate_labels) in enumerate(requests):
+            resolved, label, cache_key = self._route_without_model(user_input, candidate_labels)
+            if resolved:
+                results[i] = label
+            else:
+                pending.append((i, cache_key))
+
+        if not pending:
+            return results
+
+        batch = [requests[i] for i, _ in pending]
+        classify_batch = getattr(self.backend, "classify_batch", None)
+        if classify_batch is not None:
+            outputs = classify_batch(batch)
+        else:
+            outputs = [self.backend.classify(user_input, labels) for user_input, labels in batch]
+
+        for (i, cache_key), (labels, scores) in zip(pending, outputs):
+            user_input, candidate_labels = requests[i]
+            results[i] = self._finish_route(user_input, candidate_labels, labels, scores, cache_key)
+        return results
+
+    def _finish_route(self, user_input, candidate_labels, labels, scores, cache_key):
+        if not labels:
             logger.warning(f"Classifier returned no results for input '{user_input}' with candidates: {candidate_labels}")
             return None
             
-        best_label = results['labels'][0]
-        best_score = results['scores'][0]
+        best_label = labels[0]
+        best_score = scores[0]
 
         # Log all scores for debugging
-        all_scores_str = ", ".join([f"'{l}': {s:.4f}" for l, s in zip(results['labels'], results['scores'])])
+        all_scores_str = ", ".join([f"'{l}': {s:.4f}" for l, s in zip(labels, scores)])
         logger.info(f"Best: '{best_label}' ({best_score:.4f}) | All scores: {{{all_scores_str}}}")
 
-        return best_label
\ No newline at end of file
+        if cache_key is not None:
+            self.cache.put(cache_key, best_label)
+
+        return best_label
@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from convoflow import tracing
+
+logger = logging.getLogger(__name__)
+
+_SHUTDOWN = object()
+
+
+class BatchingRouter:
+    """
+    Micro-batching front end for AIRouter.
+
+    Routing requests from concurrent sessions are queued and collected for up to
+    `max_wait_ms` (or until `max_batch_size` are waiting), then run through
+    AIRouter.choose_routes as one batched forward pass. Each caller gets its
+    result through a Future, so it can be used as a drop-in router:
+
+        router = BatchingRouter(AIRouter(), max_batch_size=32, max_wait_ms=5)
+        keyword = router.choose_route(user_input, labels)  # blocks on its future
+    """
+
+    def __init__(self, router, max_batch_size=16, max_wait_ms=5.0):
+        self.router = router
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.batches = 0
+        self.items = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()  # Orders submit() against close()'s shutdown sentinel
+        self._worker = threading.Thread(target=self._run, name="convoflow-route-batcher", daemon=True)
+        self._worker.start()
+
+    def __getattr__(self, name):
+        # Expose the wrapped router's API (warm, cache, ...) unchanged
+        if name == "router":
+            raise AttributeError(name)
+        return getattr(self.router, name)
+
+    def submit(self, user_input, candidate_labels):
+        """Queues a routing request and returns a Future resolving to the chosen label."""
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("BatchingRouter is closed.")
+            self._queue.put((user_input, list(candidate_labels), future))
+        return future
+
+    def choose_route(self, user_input, candidate_labels: list[str]):
+        """Same contract as AIRouter.choose_route; blocks until the batch containing this request runs."""
+        # Trivial requests never need the model, so don't make them wait for a batch
+        if len(candidate_labels) <= 1:
+            return self.router.choose_route(user_input, candidate_labels)
+        with tracing.span("route"):
+            return self.submit(user_input, candidate_labels).result()
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.mean_batch_size,
+            "queue_depth": self._queue.qsize(),
+        }
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _SHUTDOWN:
+                self._queue.put(_SHUTDOWN)  # Let the outer loop see it after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _SHUTDOWN:
+                return
+            batch = self._collect(first)
+
+            # Skip requests whose callers already gave up
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self.router.choose_routes([(user_input, labels) for user_input, labels, _ in batch])
+            except Exception as e:
+                logger.error(f"Batched routing of {len(batch)} requests failed: {e}", exc_info=True)
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            logger.debug(f"Routed batch of {len(batch)} requests")
+            for (_, _, future), label in zip(batch, results):
+                future.set_result(label)
+
+    def close(self):
+        """Stops the worker after the requests already queued have been routed."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_SHUTDOWN)
+        self._worker.join()
@@ -0,0 +1,88 @@
+import logging
+import threading
+
+import torch
+import torch.nn.functional as F
+from transformers import AutoModel, AutoTokenizer
+
+logger = logging.getLogger(__name__)
+
+
+def label_to_text(label):
+    """Transition keywords are snake_case identifiers; embed them as plain phrases."""
+    return label.replace("_", " ")
+
+
+class EmbeddingBackend:
+    """
+    Bi-encoder router backend. Transition keywords are embedded once and cached,
+    so each turn costs a single encoder pass over the user input plus one
+    matrix-vector product against the candidate label embeddings.
+    """
+
+    default_model = "sentence-transformers/all-MiniLM-L6-v2"
+
+    def __init__(self, model_name=None, device=None):
+        self.model_name = model_name or self.default_model
+        self.device = device or ("cuda:0" if torch.cuda.is_available() else "cpu")
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModel.from_pretrained(self.model_name).to(self.device)
+        self.model.eval()
+
+        self._label_embeddings = {}  # label -> normalized 1-D tensor
+        self._matrix_cache = {}      # tuple(labels) -> stacked (n_labels, dim) tensor
+        self._lock = threading.Lock()
+
+    @torch.no_grad()
+    def encode(self, texts):
+        """Returns L2-normalized, mean-pooled embeddings with shape (len(texts), dim)."""
+        batch = self.tokenizer(texts, padding=True, truncation=True, return_tensors="pt").to(self.device)
+        token_embeddings = self.model(**batch).last_hidden_state
+        mask = batch["attention_mask"].unsqueeze(-1).to(token_embeddings.dtype)
+        pooled = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return F.normalize(pooled, p=2, dim=1)
+
+    def precompute(self, labels):
+        """Embeds any labels not already cached, in one batch."""
+        with self._lock:
+            missing = sorted({l for l in labels if l not in self._label_embeddings})
+            if not missing:
+                return
+            embeddings = self.encode([label_to_text(l) for l in missing])
+            for label, embedding in zip(missing, embeddings):
+                self._label_embeddings[label] = embedding
+        logger.info(f"Precomputed embeddings for {len(missing)} transition keywords")
+
+    def precompute_graph(self, graph_store):
+        """Embeds every transition keyword in the graph."""
+        snapshot = graph_store.get_snapshot()
+        self.precompute({kw for transitions in snapshot.transitions.values() for kw in transitions})
+
+    def _label_matrix(self, candidate_labels):
+        key = tuple(candidate_labels)
+        matrix = self._matrix_cache.get(key)
+        if matrix is None:
+            self.precompute(candidate_labels)
+            matrix = torch.stack([self._label_embeddings[l] for l in candidate_labels])
+            self._matrix_cache[key] = matrix
+        return matrix
+
+    @staticmethod
+    def _rank(candidate_labels, matrix, query):
+        scores = matrix @ query
+        order = torch.argsort(scores, descending=True).tolist()
+        return [candidate_labels[i] for i in order], [scores[i].item() for i in order]
+
+    def classify(self, user_input, candidate_labels):
+        """Returns (labels, cosine similarities) sorted by descending similarity."""
+        matrix = self._label_matrix(candidate_labels)
+        return self._rank(candidate_labels, matrix, self.encode([user_input])[0])
+
+    def classify_batch(self, requests):
+        """Like classify() for several (user_input, candidate_labels) requests, with one encoder pass."""
+        matrices = [self._label_matrix(labels) for _, labels in requests]
+        queries = self.encode([user_input for user_input, _ in requests])
+        return [
+            self._rank(labels, matrix, query)
+            for (_, labels), matrix, query in zip(requests, matrices, queries)
+        ]
@@ -0,0 +1,73 @@
+import logging
+from difflib import SequenceMatcher
+
+from convoflow.ai.route_cache import normalize_input
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no routing signal inside a transition keyword like "inquire_about_order",
+# including generic verbs ("make_payment", "speak_to_representative") that callers use for anything
+STOPWORDS = frozenset({
+    "a", "an", "the", "to", "about", "of", "for", "my", "and", "or", "with", "on", "in",
+    "make", "want", "check", "speak", "talk", "get", "need", "like", "have", "do",
+})
+
+# Inputs like "not billing" need real understanding, so never take the fast path on them
+NEGATIONS = frozenset({"no", "not", "don't", "dont", "never", "nope", "without", "except"})
+
+
+class LexicalMatcher:
+    """
+    Cheap first routing tier: matches the normalized input against the underscore-split
+    transition keywords. A label's score is the share of its content words found in the
+    input, with prefix, plural and fuzzy matching so "bill" and "bills" still hit "billing",
+    "payments" hits "make_payment" and a misheard "biling" still counts. Only an unambiguous winner (score >= threshold, ahead
+    of the runner-up by margin) is returned. The default threshold requires every content
+    word of the label, so one shared generic word never routes on its own.
+    """
+
+    def __init__(self, threshold=1.0, margin=0.3, fuzzy_cutoff=0.8, min_prefix=4):
+        self.threshold = threshold
+        self.margin = margin
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.min_prefix = min_prefix
+
+    def _token_similarity(self, word, tokens):
+        if word in tokens:
+            return 1.0
+        # Plurals: "bills" -> "bill"
+        tokens = tokens | {token[:-1] for token in tokens if len(token) > self.min_prefix and token.endswith("s")}
+        # Stems: "bill" -> "billing". Short tokens like "can" are too ambiguous ("cancel").
+        if any(len(token) >= self.min_prefix and word.startswith(token) for token in tokens):
+            return 1.0
+        # Typos and ASR slips: "biling" -> "billing". A close enough word counts as the word,
+        # so labels needing a fuzzy hit can still reach the full-match threshold
+        best = max((SequenceMatcher(None, word, token).ratio() for token in tokens), default=0.0)
+        return 1.0 if best >= self.fuzzy_cutoff else 0.0
+
+    def score(self, tokens, label):
+        words = label.lower().split("_")
+        content = [w for w in words if w not in STOPWORDS] or words
+        phrase = " ".join(words)
+        if f" {phrase} " in f" {' '.join(tokens)} ":
+            return 1.0
+        token_set = set(tokens)
+        return sum(self._token_similarity(w, token_set) for w in content) / len(content)
+
+    def match(self, user_input, candidate_labels, threshold=None, margin=None):
+        """
+        Returns (label, score) for an unambiguous match, or (None, best_score) otherwise.
+        `threshold` and `margin` override the matcher's own for this call.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        margin = self.margin if margin is None else margin
+        tokens = normalize_input(user_input).split()
+        if not tokens or NEGATIONS.intersection(tokens):
+            return None, 0.0
+
+        scored = sorted(((self.score(tokens, label), label) for label in candidate_labels), reverse=True)
+        best_score, best_label = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if best_score >= threshold and best_score - runner_up >= margin:
+            return best_label, best_score
+        return None, best_score
@@ -0,0 +1,114 @@
+import logging
+import os
+
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+from convoflow.ai.ai_interface import (
+    ZeroShotBackend,
+    build_nli_pairs,
+    find_entailment_id,
+    rank_by_entailment,
+)
+from convoflow.paths import cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+class TorchInt8Backend(ZeroShotBackend):
+    """Zero-shot pipeline with its Linear layers dynamically quantized to int8 (CPU only)."""
+
+    def __init__(self, model_name=None):
+        super().__init__(model_name)
+        self.classifier.model = torch.quantization.quantize_dynamic(
+            self.classifier.model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8
+        )
+        self.classifier.device = torch.device("cpu")
+        logger.info(f"Dynamically quantized {self.model_name} to int8")
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Export wrapper: seq2seq classifiers return a ModelOutput, ONNX wants plain tensors."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+class OnnxInt8Backend:
+    """
+    NLI zero-shot classifier exported to ONNX, dynamically quantized to int8 and run with
+    ONNX Runtime on CPU. The quantized model is cached under the ConvoFlow cache directory,
+    so only the first start pays for the export.
+    """
+
+    default_model = ZeroShotBackend.default_model
+    hypothesis_template = ZeroShotBackend.hypothesis_template
+    opset_version = 17
+
+    def __init__(self, model_name=None, model_dir=None, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            logger.error("onnxruntime is required for the 'onnx-int8' backend: pip install 'convoflow[onnx]'")
+            raise
+
+        self.model_name = model_name or self.default_model
+        self.model_dir = model_dir or cache_dir("onnx", self.model_name.replace("/", "--"))
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self._entailment_id = find_entailment_id(AutoConfig.from_pretrained(self.model_name))
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self._ensure_exported(), options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX int8 router model from {self.model_dir}")
+
+    def _ensure_exported(self):
+        int8_path = os.path.join(self.model_dir, "model.int8.onnx")
+        if os.path.exists(int8_path):
+            return int8_path
+
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Exporting {self.model_name} to ONNX (one-time)...")
+        fp32_path = os.path.join(self.model_dir, "model.fp32.onnx")
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        model.eval()
+        dummy = self.tokenizer(["hello"], [self.hypothesis_template.format("greeting")], return_tensors="pt")
+        dynamic = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                _LogitsOnly(model),
+                (dummy["input_ids"], dummy["attention_mask"]),
+                fp32_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "logits": {0: "batch"}},
+                opset_version=self.opset_version,
+            )
+
+        # Quantize to a temp name first so an interrupted run never leaves a half-written model behind
+        tmp_path = f"{int8_path}.tmp"
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+        os.remove(fp32_path)
+        logger.info(f"Saved int8 ONNX model to {int8_path}")
+        return int8_path
+
+    def classify(self, user_input, candidate_labels):
+        """Returns (labels, scores) sorted by descending score."""
+        return self.classify_batch([(user_input, candidate_labels)])[0]
+
+    def classify_batch(self, requests):
+        """Scores all (input, label) pairs of several requests in one ONNX Runtime call."""
+        premises, hypotheses, spans = build_nli_pairs(requests, self.hypothesis_template)
+        encoded = self.tokenizer(premises, hypotheses, padding=True, truncation="only_first", return_tensors="np")
+        feeds = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names}
+        logits = self.session.run(["logits"], feeds)[0]
+        return rank_by_entailment(requests, spans, torch.from_numpy(logits[:, self._entailment_id]))
@@ -0,0 +1,138 @@
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_input(text):
+    """Lowercases, drops punctuation and collapses whitespace so trivial variants share a cache entry."""
+    text = _NON_WORD.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class RouteCache:
+    """
+    Bounded LRU cache of routing decisions keyed on (normalized input, candidate labels).
+    Entries optionally expire after `ttl` seconds and can be persisted to a JSON file
+    so a warm cache survives restarts. The file records `model`, the router that made the
+    decisions, and is discarded on load if it was written for a different one.
+    """
+
+    def __init__(self, max_size=1024, ttl=None, path=None, model=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (label, stored_at)
+        self._lock = threading.Lock()
+
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def make_key(user_input, candidate_labels):
+        return normalize_input(user_input), tuple(candidate_labels)
+
+    def _expired(self, stored_at, now):
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def get(self, key):
+        """Returns the cached label, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[1], time.time()):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, label):
+        with self._lock:
+            self._entries[key] = (label, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"size": len(self), "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+    def save(self):
+        """Writes live entries to `path` (atomically, via a temp file)."""
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            rows = [
+                [text, list(labels), label, stored_at]
+                for (text, labels), (label, stored_at) in self._entries.items()
+                if not self._expired(stored_at, now)
+            ]
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"model": self.model, "entries": rows}, f)
+            os.replace(tmp_path, self.path)
+            logger.info(f"Saved {len(rows)} routing decisions to {self.path}")
+        except OSError as e:
+            logger.error(f"Failed to save route cache to {self.path}: {e}")
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable route cache at {self.path}: {e}")
+            return
+        model = data.get("model") if isinstance(data, dict) else None
+        if model != self.model:
+            logger.warning(f"Discarding route cache at {self.path}: written for router '{model}', not '{self.model}'")
+            return
+        rows = data.get("entries")
+        if not isinstance(rows, list):
+            logger.warning(f"Ignoring route cache at {self.path}: no entries list")
+            return
+
+        now = time.time()
+        try:
+            # Rows are saved oldest-first, so replaying them keeps the LRU order
+            entries = OrderedDict(
+                ((text, tuple(labels)), (label, float(stored_at)))
+                for text, labels, label, stored_at in rows[-self.max_size:]
+                if not self._expired(float(stored_at), now)
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Ignoring route cache at {self.path}: malformed entry: {e}")
+            return
+        with self._lock:
+            self._entries.update(entries)
+        logger.info(f"Loaded {len(self._entries)} routing decisions from {self.path}")
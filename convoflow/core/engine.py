@@ -0,0 +1,232 @@
+# convoflow/core/engine.py
+
+import os
+import uuid
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from convoflow import tracing
+from convoflow.core import prompts
+
+logger = logging.getLogger(__name__)
+
+# Store each turn's per-stage timings (ms) with its routes row
+PERSIST_TIMINGS = os.getenv("CONVOFLOW_TRACE_PERSIST", "0") == "1"
+
+
+class Transport:
+    """
+    Moves prompts to, and utterances from, one caller. Subclasses adapt a concrete
+    channel (terminal, local microphone/speaker, network stream) to the engine.
+    """
+
+    # Log turns the router couldn't match as 'N/A' routes rows
+    log_unrouted = True
+
+    def command(self, user_input):
+        """
+        Returns 'back' or 'exit' if the (stripped, lowercased) utterance is a navigation
+        command, else None. Spoken input goes back on "go back" anywhere in the utterance.
+        """
+        return "back" if "go back" in user_input else None
+
+    async def say(self, text, kind="prompt", node_id=None):
+        """
+        Delivers a prompt. `kind` is one of: 'welcome', 'node', 'already_at_beginning',
+        'not_understood', 'goodbye', 'error', so transports can render each their own way.
+        """
+        raise NotImplementedError
+
+    async def listen(self, options):
+        """Returns the caller's next utterance, or None if the caller hung up."""
+        raise NotImplementedError
+
+    async def close(self, reason="completed"):
+        """Ends the call. `reason` is 'completed', or 'error' when the session failed."""
+        pass
+
+
+class ConversationEngine:
+    """
+    Transport-agnostic node-stack state machine for IVR sessions.
+
+    One engine (and one event loop) can drive many concurrent sessions. Blocking work
+    (graph reads, routing, metrics writes) runs on a thread pool so a slow model or
+    database call never stalls the other sessions.
+    """
+
+    def __init__(self, graph_store, ai_router, start_node="start", logger_factory=None,
+                 executor=None, max_workers=32, offload_graph_reads=True, persist_timings=None,
+                 profile=None, prefetcher=None):
+        """
+        Args:
+            logger_factory (callable): Returns a per-session metrics logger
+                                       (default: convoflow.db.metrics.SessionLogger).
+            executor (Executor): Pool for blocking calls. Defaults to a private
+                                 ThreadPoolExecutor with `max_workers` threads.
+            offload_graph_reads (bool): Run graph reads on the executor. Disable for stores
+                                        that never block (in-memory or memory-mapped graphs).
+            persist_timings (bool): Pass each turn's stage timings to the session logger's
+                                    log_step. Defaults to $CONVOFLOW_TRACE_PERSIST.
+            profile (str): Profile every session's blocking calls: "cprofile" or "torch"
+                           (see tracing.ProfileCapture). Defaults to $CONVOFLOW_PROFILE_SESSIONS.
+            prefetcher (Prefetcher): Loads likely next nodes (and pre-renders their prompts)
+                                     while the caller speaks (see convoflow.core.prefetch).
+        """
+        if logger_factory is None:
+            from convoflow.db.metrics import SessionLogger
+            logger_factory = SessionLogger
+        self.graph_store = graph_store
+        self.ai_router = ai_router
+        self.start_node = start_node
+        self.logger_factory = logger_factory
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="convoflow-engine")
+        self.offload_graph_reads = offload_graph_reads
+        self.persist_timings = PERSIST_TIMINGS if persist_timings is None else persist_timings
+        self.profile = tracing.PROFILE_SESSIONS if profile is None else profile
+        self.prefetcher = prefetcher
+        self.active_sessions = 0
+
+    async def offload(self, fn, *args):
+        """Runs a blocking call on the engine's executor, inside the caller's turn and profile."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, tracing.in_context(fn, *args))
+
+    async def get_node(self, node_id, prefetch=None):
+        if prefetch is not None:
+            future = prefetch.take(node_id)
+            if future is not None:
+                try:
+                    node = await asyncio.wrap_future(future)
+                except Exception as e:
+                    logger.warning(f"Prefetch of node '{node_id}' failed: {e}")
+                    node = None
+                if node is not None:
+                    return node
+        if self.offload_graph_reads:
+            return await self.offload(self.graph_store.get_node, node_id)
+        return self.graph_store.get_node(node_id)
+
+    async def route(self, user_input, options):
+        # A batching router hands back a future, so waiting on it doesn't tie up a worker thread
+        submit = getattr(self.ai_router, "submit", None)
+        if submit is not None and len(options) > 1:
+            with tracing.span("route"):
+                return await asyncio.wrap_future(submit(user_input, options))
+        return await self.offload(self.ai_router.choose_route, user_input, options)
+
+    async def run_session(self, transport, start_node=None, profile=None):
+        """
+        Drives one caller through the graph until the flow ends or the caller leaves.
+        `profile` overrides the engine's profile mode for this session ("" disables it).
+        """
+        profile = self.profile if profile is None else profile
+        capture = None
+        if profile:
+            capture = tracing.ProfileCapture(uuid.uuid4().hex, mode=profile)
+        try:
+            with tracing.profiling(capture):
+                await self._run_session(transport, start_node, capture)
+        finally:
+            if capture is not None:
+                await self.offload(capture.dump)
+
+    async def _run_session(self, transport, start_node, capture):
+        node_stack = [start_node or self.start_node]
+        session_logger = await self.offload(self.logger_factory)
+        prefetch = self.prefetcher.session() if self.prefetcher is not None else None
+        if capture is not None:
+            # Name the profile after the metrics session so the two can be matched up
+            capture.session_id = getattr(session_logger, "session_id", capture.session_id)
+        self.active_sessions += 1
+        outcome = None
+        try:
+            await transport.say(prompts.WELCOME, kind="welcome")
+
+            while outcome is None:
+                with tracing.turn() as timings, tracing.span("turn"):
+                    outcome = await self._turn(transport, session_logger, node_stack, timings, prefetch)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self.active_sessions -= 1
+            if prefetch is not None:
+                prefetch.cancel()
+            await transport.close(reason="error" if outcome == "error" else "completed")
+            # The node the caller was on when the session ended; drop-off analytics count it
+            # unless the flow finished there
+            await self.offload(session_logger.end_session, node_stack[-1], outcome == "completed")
+            await self.offload(session_logger.close)
+
+    async def _turn(self, transport, session_logger, node_stack, timings, prefetch):
+        """
+        Handles one prompt/answer exchange. Returns None while the session goes on, else how
+        it ended: 'completed' (reached a terminal node), 'hangup', 'exit' or 'error'.
+        """
+        current_node_id = node_stack[-1]
+        current_node = await self.get_node(current_node_id, prefetch)
+
+        # A node without text (e.g. a MERGE-created transition target) counts as missing, as it always has
+        if current_node is None or current_node.message is None:
+            await transport.say(f"Error: Node '{current_node_id}' not found in the database.", kind="error")
+            return "error"
+
+        await transport.say(current_node.message, kind="node", node_id=current_node_id)
+
+        if not current_node.transitions:
+            await transport.say(prompts.GOODBYE, kind="goodbye")
+            return "completed"
+
+        options = list(current_node.transitions.keys())
+        if prefetch is not None:
+            # Speculate on the next node while the caller speaks
+            prefetch.start(current_node)
+        user_input = await transport.listen(options)
+        if user_input is None:
+            return "hangup"
+        user_input = user_input.strip().lower()
+
+        command = transport.command(user_input)
+        if command == "exit":
+            return "exit"
+
+        if command == "back":
+            if len(node_stack) > 1:
+                node_stack.pop()
+            else:
+                await transport.say(prompts.ALREADY_AT_BEGINNING, kind="already_at_beginning")
+            return None
+
+        if not user_input:
+            await transport.say(prompts.NOT_UNDERSTOOD, kind="not_understood")
+            return None
+
+        next_keyword = await self.route(user_input, options)
+        next_node_id = current_node.transitions.get(next_keyword)
+
+        # Metrics
+        if next_keyword or transport.log_unrouted:
+            if self.persist_timings:
+                # Stages so far this turn; the row may be written later by a background writer, so copy
+                await self.offload(session_logger.log_step, current_node_id, user_input,
+                                   next_keyword if next_keyword else "N/A", dict(timings))
+            else:
+                await self.offload(session_logger.log_step, current_node_id, user_input,
+                                   next_keyword if next_keyword else "N/A")
+
+        if next_node_id:
+            node_stack.append(next_node_id)
+        else:
+            await transport.say(prompts.NOT_UNDERSTOOD, kind="not_understood")
+        return None
+
+    def run(self, transport, start_node=None):
+        """Blocking helper: runs a single session on a fresh event loop."""
+        asyncio.run(self.run_session(transport, start_node))
+
+    def shutdown(self):
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+        self.executor.shutdown(wait=True)
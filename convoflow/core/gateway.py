@@ -0,0 +1,301 @@
+# convoflow/core/gateway.py
+
+import os
+import uuid
+import asyncio
+import logging
+
+from convoflow import tracing
+from convoflow.core.engine import Transport
+from convoflow.io.streaming_asr import AudioRingBuffer, UtteranceDetector
+from convoflow.io.telephony import (
+    ENCODINGS, MODEL_SAMPLE_RATE, PHONE_SAMPLE_RATE, CallAudioDecoder, CallAudioEncoder,
+)
+from convoflow.serving.protocol import read_frame, remove_stale_socket, write_frame
+
+logger = logging.getLogger(__name__)
+
+# "host:port" for TCP, anything else is a Unix socket path
+DEFAULT_ADDRESS = os.getenv("CONVOFLOW_GATEWAY_ADDRESS", "127.0.0.1:7010")
+# Calls served at once; further calls are refused with a 'busy' hangup
+MAX_CALLS = int(os.getenv("CONVOFLOW_GATEWAY_MAX_CALLS", "200"))
+
+# Call protocol: the model server's frames (convoflow.serving.protocol), one connection per call.
+#   PBX -> gateway:  start {call_id, encoding: mulaw|pcm16, sample_rate: 8000|16000}
+#                    audio + encoded samples (any packet size, sent as they are captured)
+#                    hangup
+#   gateway -> PBX:  started {call_id, sample_rate}
+#                    prompt {kind, node_id, text}, audio + encoded samples..., prompt_end {duration_s}
+#                    listening, transcript {text}
+#                    hangup {reason}
+
+
+def parse_address(address):
+    """Returns ("tcp", (host, port)) for "host:port", else ("unix", path)."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return "tcp", (host or "0.0.0.0", int(port))
+    return "unix", address
+
+
+async def open_connection(address):
+    """(reader, writer) connected to a gateway at `address` (see parse_address)."""
+    kind, target = parse_address(address)
+    if kind == "tcp":
+        return await asyncio.open_connection(*target)
+    return await asyncio.open_unix_connection(target)
+
+
+class CallTransport(Transport):
+    """
+    One network call. A reader task decodes the caller's packets as they arrive,
+    upsampling narrowband audio to the ASR rate, into a per-call ring buffer, and segments
+    utterances with a VAD; listen() transcribes each utterance as a view into the ring on
+    the engine's executor. say() synthesizes prompts sentence by sentence and streams them
+    back in the caller's encoding, so the first sentence plays while the rest render.
+    """
+
+    def __init__(self, engine, reader, writer, call_id, encoding="mulaw", sample_rate=PHONE_SAMPLE_RATE,
+                 asr=None, synthesize=None, frame_ms=30, end_silence_ms=700, pre_roll_ms=300,
+                 max_utterance_s=10.0, no_speech_timeout_s=8.0, buffer_s=30.0):
+        """
+        Args:
+            asr: Object with transcribe(float32 audio at 16 kHz) -> str, e.g. an ASRBackend.
+                 Defaults to the process-wide backend (convoflow.io.voice_input).
+            synthesize (callable): text -> float32 waveform at 16 kHz. Defaults to
+                                   convoflow.io.voice_output.synthesize (cached).
+            no_speech_timeout_s (float): Seconds of silence, after the prompt has finished
+                                         playing, before listen() gives up with "".
+        """
+        self.engine = engine
+        self.reader = reader
+        self.writer = writer
+        self.call_id = call_id
+        self.decoder = CallAudioDecoder(encoding, sample_rate)
+        self.encoder = CallAudioEncoder(encoding, sample_rate)
+        self.asr = asr
+        self.synthesize = synthesize
+        rate = MODEL_SAMPLE_RATE
+        self.no_speech_timeout = int(rate * no_speech_timeout_s)
+        self.detector = UtteranceDetector(
+            int(rate * frame_ms / 1000), int(rate * end_silence_ms / 1000), int(rate * pre_roll_ms / 1000),
+            int(rate * max_utterance_s), self.no_speech_timeout,
+        )
+        max_view = self.detector.max_span
+        self.ring = AudioRingBuffer(max(int(rate * buffer_s), 2 * max_view), max_view=max_view)
+
+        self.hung_up = False
+        self.packets = 0
+        self._utterance = None   # Future[(start, end) | None] while listening
+        self._playout_end = 0.0  # Loop time the caller finishes hearing what was sent so far
+        self._reader_task = None
+
+    def start(self):
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                frame = await read_frame(self.reader)
+                if frame is None:
+                    break
+                header, payload = frame
+                kind = header.get("type")
+                if kind == "audio":
+                    self._on_audio(payload)
+                elif kind == "hangup":
+                    break
+                else:
+                    logger.debug(f"Call {self.call_id}: ignoring '{kind}' message")
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Call {self.call_id}: stream error, treating as hangup: {e}")
+        finally:
+            self.hung_up = True
+            if self._utterance is not None and not self._utterance.done():
+                self._utterance.set_result(None)
+
+    def _on_audio(self, payload):
+        self.ring.write(self.decoder.decode(payload))
+        self.packets += 1
+        if self._utterance is not None and not self._utterance.done():
+            span = self.detector.scan(self.ring)
+            if span is not None:
+                self._utterance.set_result(span)
+
+    async def _send(self, header, payload=b""):
+        if self.hung_up:
+            return False
+        try:
+            write_frame(self.writer, header, payload)
+            await self.writer.drain()
+            return True
+        except (ConnectionError, OSError) as e:
+            logger.info(f"Call {self.call_id}: send failed, treating as hangup: {e}")
+            self.hung_up = True
+            return False
+
+    def _synthesize_chunk(self, text):
+        with tracing.span("tts"):
+            if self.synthesize is not None:
+                return self.synthesize(text)
+            from convoflow.io.voice_output import synthesize
+            return synthesize(text)
+
+    def _transcribe(self, audio):
+        if self.asr is None:
+            from convoflow.io.voice_input import transcribe_array
+            return transcribe_array(audio)
+        with tracing.span("asr"):
+            return self.asr.transcribe(audio)
+
+    async def say(self, text, kind="prompt", node_id=None):
+        if not await self._send({"type": "prompt", "kind": kind, "node_id": node_id, "text": text}):
+            return
+        from convoflow.io.voice_output import split_sentences
+
+        loop = asyncio.get_running_loop()
+        duration = 0.0
+        for chunk in split_sentences(text or ""):
+            waveform = await self.engine.offload(self._synthesize_chunk, chunk)
+            seconds = len(waveform.reshape(-1)) / MODEL_SAMPLE_RATE
+            if not await self._send({"type": "audio"}, self.encoder.encode(waveform)):
+                return
+            self._playout_end = max(self._playout_end, loop.time()) + seconds
+            duration += seconds
+        await self._send({"type": "prompt_end", "duration_s": round(duration, 3)})
+
+    async def listen(self, options):
+        """
+        Returns the transcript of the caller's next utterance, "" if they stayed silent,
+        or None if they hung up. Audio heard while the prompt was still playing counts.
+        """
+        if self.hung_up or not await self._send({"type": "listening"}):
+            return None
+        loop = asyncio.get_running_loop()
+        remaining = max(0.0, self._playout_end - loop.time())
+        self.detector.no_speech_timeout = self.no_speech_timeout + int(remaining * MODEL_SAMPLE_RATE)
+        self.detector.reset(self.ring.total_written)
+        self._utterance = loop.create_future()
+        try:
+            span = await self._utterance
+        finally:
+            self._utterance = None
+        if span is None:
+            return None
+        start, end = span
+        if end <= start:
+            return ""
+        # The view stays valid for buffer_s - max_utterance_s of further audio, far longer than a decode
+        text = await self.engine.offload(self._transcribe, self.ring.read(start, end))
+        await self._send({"type": "transcript", "text": text})
+        return text
+
+    async def close(self, reason="completed", linger_s=2.0):
+        if await self._send({"type": "hangup", "reason": reason}) and self._reader_task is not None:
+            # Keep reading until the caller hangs up too: closing with their audio still
+            # unread resets the connection, and the hangup message could be lost with it
+            await asyncio.wait([self._reader_task], timeout=linger_s)
+        self.hung_up = True
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        self.writer.close()
+
+
+class AudioGateway:
+    """
+    Network front end for phone calls: accepts many concurrent call streams over TCP or a
+    Unix socket (e.g. from a SIP/PBX media bridge), and runs each as a ConversationEngine
+    session through a CallTransport. Every call shares the engine, its executor and the
+    models, on one event loop.
+    """
+
+    def __init__(self, engine, asr=None, synthesize=None, max_calls=MAX_CALLS, **transport_options):
+        """
+        Args:
+            asr, synthesize: Passed to each CallTransport (default: the process-wide models).
+            max_calls (int): Calls served at once; more are refused with a 'busy' hangup.
+            transport_options: Further CallTransport settings (VAD timing, buffer sizes).
+        """
+        self.engine = engine
+        self.asr = asr
+        self.synthesize = synthesize
+        self.max_calls = max_calls
+        self.transport_options = transport_options
+        self.active_calls = 0
+        self.peak_calls = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.failed = 0
+        self._server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            frame = await asyncio.wait_for(read_frame(reader), timeout=10.0)
+        except (asyncio.TimeoutError, ConnectionError, ValueError) as e:
+            logger.warning(f"Dropping connection without a valid start message: {e}")
+            writer.close()
+            return
+        if frame is None or frame[0].get("type") != "start":
+            writer.close()
+            return
+        header = frame[0]
+        call_id = str(header.get("call_id") or uuid.uuid4().hex)
+        encoding = header.get("encoding", "mulaw")
+        sample_rate = int(header.get("sample_rate", PHONE_SAMPLE_RATE))
+
+        reason = None
+        if encoding not in ENCODINGS or sample_rate not in (PHONE_SAMPLE_RATE, MODEL_SAMPLE_RATE):
+            reason = "unsupported_format"
+        elif self.active_calls >= self.max_calls:
+            reason = "busy"
+            self.rejected += 1
+        if reason is not None:
+            write_frame(writer, {"type": "hangup", "reason": reason})
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+            return
+
+        self.accepted += 1
+        self.active_calls += 1
+        self.peak_calls = max(self.peak_calls, self.active_calls)
+        transport = CallTransport(self.engine, reader, writer, call_id, encoding, sample_rate,
+                                  asr=self.asr, synthesize=self.synthesize, **self.transport_options)
+        try:
+            write_frame(writer, {"type": "started", "call_id": call_id, "sample_rate": sample_rate})
+            transport.start()
+            await self.engine.run_session(transport)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Call {call_id} failed: {e}", exc_info=True)
+            # The engine has usually closed the call with reason 'error' already, and then this
+            # sends nothing; it covers failures before the session got going
+            await transport.close(reason="error")
+        finally:
+            self.active_calls -= 1
+
+    async def start(self, address=DEFAULT_ADDRESS):
+        kind, target = parse_address(address)
+        if kind == "tcp":
+            self._server = await asyncio.start_server(self._handle, *target)
+        else:
+            remove_stale_socket(target)
+            self._server = await asyncio.start_unix_server(self._handle, target)
+        logger.info(f"Audio gateway listening on {address} (up to {self.max_calls} calls)")
+        return self._server
+
+    async def serve_forever(self, address=DEFAULT_ADDRESS):
+        server = await self.start(address)
+        async with server:
+            await server.serve_forever()
+
+    def stats(self):
+        return {
+            "active_calls": self.active_calls,
+            "peak_calls": self.peak_calls,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "failed": self.failed,
+        }
@@ -0,0 +1,225 @@
+# convoflow/core/prefetch.py
+
+import time
+import logging
+import threading
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class TransitionWeights:
+    """
+    How often each (node, keyword) edge was taken, from the routes history via the
+    node_transition_daily aggregate (see convoflow.db.analytics). Loaded, and reloaded once
+    older than `max_age_s`, on a background thread so callers never wait on the database;
+    until the first load finishes, or without a metrics database, every edge weighs the same.
+    The aggregate is only read: keeping it current is scripts/refresh_analytics.py's job,
+    and a warning is logged when it lags the routes table by more than `max_age_s`.
+    """
+
+    def __init__(self, days=30, max_age_s=3600.0, counts=None, refresh=False, settle_s=300):
+        """
+        Args:
+            days (int): History window, in days up to today.
+            counts (dict): Fixed {node_id: {keyword: count}} instead of querying the database.
+            refresh (bool): Refresh a stale aggregate before loading (see analytics.refresh),
+                            for setups with no scheduled refresh. Leave off in serving processes.
+            settle_s (int): Routes newer than this aren't in the aggregate yet.
+        """
+        self.days = days
+        self.max_age_s = max_age_s
+        self.refresh = refresh
+        self.settle_s = settle_s
+        self._counts = counts or {}
+        self._fixed = counts is not None
+        self._loaded_at = None
+        self._loading = False
+        self._lock = threading.Lock()
+
+    def _check_freshness(self, analytics):
+        try:
+            age = analytics.watermark_age("routes")
+            if age is not None and age <= self.settle_s + self.max_age_s:
+                return
+            if self.refresh:
+                analytics.refresh(settle_s=self.settle_s)
+            else:
+                logger.warning("Transition history is stale or was never aggregated; "
+                               "schedule scripts/refresh_analytics.py to keep it current")
+        except Exception as e:
+            logger.warning(f"Could not check transition history freshness, using it as it is: {e}")
+
+    def _load(self):
+        try:
+            from convoflow.db import analytics
+            self._check_freshness(analytics)
+            rows = analytics.transition_counts(start=date.today() - timedelta(days=self.days))
+        except Exception as e:
+            logger.warning(f"Could not load transition history, weighting edges equally: {e}")
+            return {}
+        counts = {}
+        for row in rows:
+            counts.setdefault(row["node_id"], {})[row["predicted_keyword"]] = row["transitions"]
+        if counts:
+            logger.info(f"Loaded transition history for {len(counts)} nodes")
+        else:
+            logger.warning(f"No transition history in the last {self.days} days; weighting edges equally")
+        return counts
+
+    def _reload(self):
+        counts = self._load()
+        with self._lock:
+            self._counts = counts
+            self._loaded_at = time.monotonic()
+            self._loading = False
+
+    def counts(self):
+        """{node_id: {keyword: count}} as last loaded; starts a reload if it is stale."""
+        if self._fixed:
+            return self._counts
+        with self._lock:
+            stale = self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age_s
+            if stale and not self._loading:
+                self._loading = True
+                threading.Thread(target=self._reload, name="convoflow-prefetch-weights", daemon=True).start()
+            return self._counts
+
+    def probabilities(self, node_id, keywords):
+        """{keyword: probability} over `keywords`, add-one smoothed so unseen edges keep some weight."""
+        history = self.counts().get(node_id, {})
+        weights = {keyword: history.get(keyword, 0) + 1 for keyword in keywords}
+        total = sum(weights.values())
+        return {keyword: weight / total for keyword, weight in weights.items()}
+
+
+class Prefetcher:
+    """
+    Speculatively loads the likely next nodes while the caller is still speaking.
+
+    When a session starts listening at a node, the node's most probable children (by
+    TransitionWeights) are fetched from the graph store and their prompts are synthesized
+    into the TTS cache on a small background pool. If routing then lands on one of them,
+    the engine takes the prefetched node, and its prompt plays straight from the cache.
+    Shared by all of an engine's sessions; each session tracks its own predictions.
+    """
+
+    def __init__(self, graph_store, prerender=None, weights=None, top_k=2, min_probability=0.15, workers=1):
+        """
+        Args:
+            prerender (callable): Called with [prompt text] to synthesize it into the TTS
+                                  cache, e.g. convoflow.io.voice_output.prerender. None
+                                  prefetches node data only.
+            top_k (int): Most children prefetched per turn.
+            min_probability (float): Children less likely than this are not prefetched. Only
+                                     applies to nodes with history: uniform weights say nothing
+                                     about which children are unlikely.
+            workers (int): Background threads. Synthesis is CPU/GPU heavy, so keep it small.
+        """
+        self.graph_store = graph_store
+        self.prerender = prerender
+        self.weights = weights or TransitionWeights()
+        self.top_k = top_k
+        self.min_probability = min_probability
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="convoflow-prefetch")
+
+        self.predictions = 0  # Turns with a prefetch issued
+        self.scheduled = 0    # Children prefetched (or queued)
+        self.outcomes = 0     # Turns that moved on to one of the node's children
+        self.hits = 0         # ...and that child had been prefetched
+        self.ready = 0        # ...and was fully prefetched before it was needed
+        self._lock = threading.Lock()
+
+    def session(self):
+        return PrefetchSession(self)
+
+    def _fetch(self, node_id):
+        node = self.graph_store.get_node(node_id)
+        if node is not None and node.message and self.prerender is not None:
+            self.prerender([node.message])
+        return node
+
+    def _rank(self, node):
+        has_history = bool(self.weights.counts().get(node.id))
+        probabilities = self.weights.probabilities(node.id, list(node.transitions))
+        ranked = sorted(probabilities.items(), key=lambda item: item[1], reverse=True)
+        children = []
+        for keyword, probability in ranked:
+            target = node.transitions[keyword]
+            if len(children) >= self.top_k or (has_history and probability < self.min_probability):
+                break
+            if target not in children:
+                children.append(target)
+        return children
+
+    def _record(self, hit, ready):
+        with self._lock:
+            self.outcomes += 1
+            self.hits += hit
+            self.ready += ready
+
+    def stats(self):
+        with self._lock:
+            return {
+                "predictions": self.predictions,
+                "scheduled": self.scheduled,
+                "outcomes": self.outcomes,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.outcomes if self.outcomes else 0.0,
+                "ready_rate": self.ready / self.outcomes if self.outcomes else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PrefetchSession:
+    """One session's outstanding predictions (see Prefetcher)."""
+
+    def __init__(self, prefetcher):
+        self.prefetcher = prefetcher
+        self._source = None
+        self._futures = {}  # child node_id -> Future[Node]
+
+    def start(self, node):
+        """Prefetches `node`'s likely children. Call when the session starts listening at `node`."""
+        self.cancel()
+        if not node.transitions:
+            return
+        prefetcher = self.prefetcher
+        self._source = node
+        try:
+            children = prefetcher._rank(node)
+        except Exception as e:
+            logger.warning(f"Prefetch ranking failed for node '{node.id}': {e}")
+            return
+        for child in children:
+            self._futures[child] = prefetcher._executor.submit(prefetcher._fetch, child)
+        with prefetcher._lock:
+            prefetcher.predictions += 1
+            prefetcher.scheduled += len(children)
+
+    def take(self, node_id):
+        """
+        Returns the Future prefetching `node_id` (done, or still running and worth waiting
+        for), or None if it wasn't prefetched. Settles the outstanding prediction either way.
+        """
+        source, futures = self._source, self._futures
+        future = futures.pop(node_id, None)
+        self.cancel()
+        if source is not None and node_id in source.transitions.values():
+            self.prefetcher._record(hit=future is not None, ready=future is not None and future.done())
+        if future is None or future.cancelled():
+            return None
+        if not future.running() and not future.done():
+            future.cancel()  # Still queued: fetching it directly is quicker
+            return None
+        return future
+
+    def cancel(self):
+        """Drops the predictions that haven't started yet."""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
+        self._source = None
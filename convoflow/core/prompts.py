@@ -0,0 +1,10 @@
+# convoflow/core/prompts.py
+# Fixed phrases spoken by the voice runner. Kept in one place so they can be
+# pre-rendered into the TTS cache (see scripts/prerender_prompts.py).
+
+WELCOME = "Welcome to ConvoFlow. You can say 'go back' anytime."
+ALREADY_AT_BEGINNING = "You're already at the beginning."
+NOT_UNDERSTOOD = "Sorry, I didn't understand. Let's try again."
+GOODBYE = "This is the end of the call. Goodbye!"
+
+FIXED_PROMPTS = [WELCOME, ALREADY_AT_BEGINNING, NOT_UNDERSTOOD, GOODBYE]
@@ -1,61 +1,76 @@
 # convoflow/core/runner.py
 
-from convoflow.db.metrics import SessionLogger
-from convoflow.io.voice_input import transcribe_from_mic
-from convoflow.io.voice_output import speak_text
+import os
+import asyncio
 
+from convoflow import tracing
+from convoflow.core.engine import ConversationEngine, Transport
+from convoflow.core.prefetch import Prefetcher
+from convoflow.io.voice_input import transcribe_from_mic, transcribe_streaming
+from convoflow.io.voice_output import prerender, speak_text
 
-class Runner:
-    """
-    Voice-powered IVR runner.
-    Captures microphone input, uses Speack-to-Text, Zero-Shot Classification, and speaks responses aloud.
-    """
+# Fetch and pre-synthesize the likely next nodes while the caller speaks
+PREFETCH = os.getenv("CONVOFLOW_PREFETCH", "1") == "1"
 
-    def __init__(self, graph, ai_router, start_node="start"):
-        self.graph = graph
-        self.ai_router = ai_router
-        self.node_stack = [start_node]
-        self.logger = SessionLogger()
-
-    def run(self):
-        print("\n\n\n[INTRO]")
-        speak_text("Welcome to ConvoFlow. You can say 'go back' anytime.")
 
-        while self.node_stack:
-            current_node_id = self.node_stack[-1]
-            current_node = self.graph.get_node(current_node_id)
+class VoiceTransport(Transport):
+    """Local microphone/speaker transport. Blocking audio calls run off the event loop."""
 
-            # Speak node's message
-            speak_text(current_node.message)
+    def __init__(self, ai_router=None, streaming_asr=False):
+        self.ai_router = ai_router
+        self.streaming_asr = streaming_asr
 
-            if not current_node.transitions:
-                speak_text("This is the end of the call. Goodbye!")
-                break
+    async def _run_blocking(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, tracing.in_context(fn, *args, **kwargs))
 
-            user_input = transcribe_from_mic()
-            print(f"You said: {user_input}")
+    async def say(self, text, kind="prompt", node_id=None):
+        if kind == "welcome":
+            print("\n\n\n[INTRO]")
+        elif kind == "node":
+            print(f"[{node_id.upper()}]")
+        await self._run_blocking(speak_text, text)
 
-            if "go back" in user_input.lower():
-                if len(self.node_stack) > 1:
-                    self.node_stack.pop()
-                    continue
-                else:
-                    speak_text("You're already at the beginning.")
-                    continue
+    def _stable_enough(self, options):
+        # Accept a transcript at a pause once it is a command or matches one option outright
+        def check(text):
+            if "go back" in text:
+                return True
+            return self.ai_router is not None and self.ai_router.try_fast_route(text, options) is not None
+        return check
 
-            # Use AI Zero-Shot Classification
-            options = list(current_node.transitions.keys())
-            next_keyword = self.ai_router.choose_route(user_input, options)
-            next_node_id = current_node.transitions.get(next_keyword)
+    async def listen(self, options):
+        if self.streaming_asr:
+            user_input = await self._run_blocking(transcribe_streaming, on_stable=self._stable_enough(options))
+        else:
+            user_input = await self._run_blocking(transcribe_from_mic)
+        print(f"You said: {user_input}")
+        return user_input
 
-            # Metrics
-            self.logger.log_step(current_node_id, user_input, next_keyword if next_keyword else "N/A")
 
-            if next_node_id:
-                self.node_stack.append(next_node_id)
-            else:
-                speak_text("Sorry, I didn't understand. Let's try again.")
+class Runner:
+    """
+    Voice-powered IVR runner.
+    Captures microphone input, uses Speack-to-Text, Zero-Shot Classification, and speaks responses aloud.
+    """
 
-            print("\n")
+    def __init__(self, graph, ai_router, start_node="start", streaming_asr=False, prefetch=None):
+        """
+        Args:
+            streaming_asr (bool): Transcribe while the caller speaks, and stop listening as soon
+                                  as a stable partial transcript can already be routed.
+            prefetch (bool): Fetch the most likely next nodes and synthesize their prompts while
+                             the caller speaks (see convoflow.core.prefetch). Defaults to $CONVOFLOW_PREFETCH.
+        """
+        self.graph = graph
+        self.ai_router = ai_router
+        self.streaming_asr = streaming_asr
+        self.prefetcher = Prefetcher(graph, prerender=prerender) if (PREFETCH if prefetch is None else prefetch) else None
+        self.engine = ConversationEngine(graph, ai_router, start_node=start_node, max_workers=4,
+                                         prefetcher=self.prefetcher)
 
-        self.logger.end_session()
\ No newline at end of file
+    def run(self):
+        try:
+            self.engine.run(VoiceTransport(self.ai_router, streaming_asr=self.streaming_asr))
+        finally:
+            self.engine.shutdown()
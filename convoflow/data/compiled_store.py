@@ -0,0 +1,359 @@
+import os
+import sys
+import mmap
+import struct
+import logging
+import threading
+
+import numpy as np
+
+from convoflow import tracing
+from convoflow.data.nodes import GraphSnapshot, Node
+
+logger = logging.getLogger(__name__)
+
+# File layout (little-endian), every section 8-byte aligned:
+#   header      magic, format version, node/edge/string counts, section offsets
+#   str_offsets u32[S + 1]  byte offsets of each interned UTF-8 string in str_data
+#   str_data    bytes
+#   node_ids    u32[N]      string index of each node id; nodes are sorted by id bytes
+#   node_texts  u32[N]      string index of each node's text, NO_STRING if it has none
+#   row_ptr     u32[N + 1]  node i's edges are edges[row_ptr[i]:row_ptr[i + 1]] (CSR)
+#   edge_kw     u32[E]      string index of each edge keyword, sorted within a node
+#   edge_target u32[E]      node index of each edge target
+MAGIC = b"CFGRAPH\0"
+FORMAT_VERSION = 1
+NO_STRING = 0xFFFFFFFF
+_HEADER = struct.Struct("<8sIIII7Q")
+_SECTIONS = ("str_offsets", "str_data", "node_ids", "node_texts", "row_ptr", "edge_kw", "edge_target")
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def compile_graph(texts, transitions, path):
+    """
+    Writes a compiled graph file.
+
+    Args:
+        texts (dict): node_id -> text (None for nodes without text).
+        transitions (dict): node_id -> {keyword: target_id}. Targets missing from `texts`
+                            become text-less nodes, as with Neo4j MERGE.
+        path (str): Output file. Written to a temporary file and renamed into place, so
+                    processes that have the old file mapped keep a consistent view.
+    Returns:
+        (node_count, edge_count)
+    """
+    texts = dict(texts)
+    for source, options in transitions.items():
+        texts.setdefault(source, None)
+        for target in options.values():
+            texts.setdefault(target, None)
+
+    node_ids = sorted(texts, key=lambda node_id: node_id.encode("utf-8"))
+    index_of = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    strings, string_index = [], {}
+
+    def intern(value):
+        if value is None:
+            return NO_STRING
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value.encode("utf-8"))
+        return string_index[value]
+
+    id_refs = [intern(node_id) for node_id in node_ids]
+    text_refs = [intern(texts[node_id]) for node_id in node_ids]
+    row_ptr, edge_kw, edge_target = [0], [], []
+    for node_id in node_ids:
+        options = transitions.get(node_id, {})
+        for keyword in sorted(options, key=lambda k: k.encode("utf-8")):
+            edge_kw.append(intern(keyword))
+            edge_target.append(index_of[options[keyword]])
+        row_ptr.append(len(edge_kw))
+
+    str_offsets = np.zeros(len(strings) + 1, dtype="<u4")
+    str_offsets[1:] = np.cumsum([len(s) for s in strings], dtype=np.int64)
+    sections = {
+        "str_offsets": str_offsets.tobytes(),
+        "str_data": b"".join(strings),
+        "node_ids": np.asarray(id_refs, dtype="<u4").tobytes(),
+        "node_texts": np.asarray(text_refs, dtype="<u4").tobytes(),
+        "row_ptr": np.asarray(row_ptr, dtype="<u4").tobytes(),
+        "edge_kw": np.asarray(edge_kw, dtype="<u4").tobytes(),
+        "edge_target": np.asarray(edge_target, dtype="<u4").tobytes(),
+    }
+
+    offsets, position = [], _align(_HEADER.size)
+    for name in _SECTIONS:
+        offsets.append(position)
+        position = _align(position + len(sections[name]))
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(node_ids), len(edge_kw), len(strings), *offsets)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for name, offset in zip(_SECTIONS, offsets):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(sections[name])
+        f.write(b"\0" * (position - f.tell()))  # Trailing empty sections must still lie within the file
+    os.replace(tmp_path, path)
+    logger.info(f"Compiled graph with {len(node_ids)} nodes and {len(edge_kw)} edges to {path}")
+    return len(node_ids), len(edge_kw)
+
+
+def compile_store(store, path):
+    """Compiles any store exposing get_snapshot() (GraphStore, InMemoryGraphStore, ...) to `path`."""
+    snapshot = store.get_snapshot()
+    return compile_graph(snapshot.texts, snapshot.transitions, path)
+
+
+def compile_flow(flow_path, path):
+    """Compiles a JSON/YAML flow file (see convoflow.data.flow_loader) to `path`."""
+    from convoflow.data.memory_store import InMemoryGraphStore
+    return compile_store(InMemoryGraphStore.from_flow(flow_path), path)
+
+
+class _MappedGraph:
+    """Read-only view of one compiled file. Arrays are zero-copy views into the shared mapping."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.node_count, self.edge_count, string_count, *offsets = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled ConvoFlow graph.")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}; expected {FORMAT_VERSION}. Recompile it.")
+
+        counts = dict(str_offsets=string_count + 1, node_ids=self.node_count, node_texts=self.node_count,
+                      row_ptr=self.node_count + 1, edge_kw=self.edge_count, edge_target=self.edge_count)
+        sections = dict(zip(_SECTIONS, offsets))
+        for name, count in counts.items():
+            offset = sections[name]
+            if sys.byteorder == "little":
+                # memoryview indexing returns plain ints, several times faster than numpy scalars
+                array = memoryview(self._mmap)[offset:offset + 4 * count].cast("I")
+            else:
+                array = np.frombuffer(self._mmap, dtype="<u4", count=count, offset=offset)
+            setattr(self, name, array)
+        self._str_data = sections["str_data"]
+
+    def string_bytes(self, index):
+        start = self._str_data + int(self.str_offsets[index])
+        return self._mmap[start:self._str_data + int(self.str_offsets[index + 1])]
+
+    def string(self, index):
+        return None if index == NO_STRING else self.string_bytes(index).decode("utf-8")
+
+    def find(self, node_id):
+        """Binary search over the sorted node ids; returns the node index or -1."""
+        key = node_id.encode("utf-8")
+        lo, hi = 0, self.node_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.string_bytes(int(self.node_ids[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.node_count and self.string_bytes(int(self.node_ids[lo])) == key:
+            return lo
+        return -1
+
+    def text(self, index):
+        return self.string(int(self.node_texts[index]))
+
+    def transitions(self, index):
+        start, end = int(self.row_ptr[index]), int(self.row_ptr[index + 1])
+        return {
+            self.string(int(kw)): self.string(int(self.node_ids[target]))
+            for kw, target in zip(self.edge_kw[start:end], self.edge_target[start:end])
+        }
+
+    def close(self):
+        # Release the array views first; an mmap with exported buffers can't be closed
+        for name in _SECTIONS:
+            array = self.__dict__.pop(name, None)
+            if isinstance(array, memoryview):
+                array.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # Still referenced by a caller's array; freed with it
+
+
+class CompiledGraphStore:
+    """
+    Graph store backed by a compiled, memory-mapped graph file (see compile_graph and
+    scripts/compile_graph.py). No database is needed, and every process that opens the
+    same file shares one copy of it through the page cache.
+
+    Reads never wait on I/O, so ConversationEngine can use it with offload_graph_reads=False.
+    Writes (add_node, add_relationship, bulk_load, clear_graph) go to an in-memory overlay
+    on top of the file; save() compiles base + overlay back to disk. Reads hold the lock
+    only for the lookup itself, so a mapping can be swapped out and closed under it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._graph = _MappedGraph(path)
+        self._overlay_texts = {}
+        self._overlay_transitions = {}
+        self._base_cleared = False
+        self._clears = 0  # clear_graph() calls, so save() can tell one happened while it compiled
+        self._snapshot = None
+        self._version = 0
+        self._lock = threading.Lock()
+        logger.info(f"Mapped compiled graph {path} ({self._graph.node_count} nodes, {self._graph.edge_count} edges)")
+
+    def close(self):
+        with self._lock:
+            self._graph.close()
+
+    def _swap_graph(self, graph):
+        # Caller holds the lock, so no read is using the old mapping
+        old, self._graph = self._graph, graph
+        old.close()
+
+    def reload(self):
+        """Maps the file again if it was replaced since it was opened. Returns True if it was."""
+        stat = os.stat(self.path)
+        old = self._graph.stat
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == (old.st_ino, old.st_mtime_ns, old.st_size):
+            return False
+        graph = _MappedGraph(self.path)
+        with self._lock:
+            self._swap_graph(graph)
+            self._snapshot = None
+        logger.info(f"Reloaded compiled graph {self.path}")
+        return True
+
+    def _base_index(self, node_id):
+        return -1 if self._base_cleared else self._graph.find(node_id)
+
+    @tracing.traced("graph")
+    def get_node_text(self, node_id):
+        with self._lock:
+            if node_id in self._overlay_texts:
+                return self._overlay_texts[node_id]
+            index = self._base_index(node_id)
+            if index >= 0:
+                return self._graph.text(index)
+        logger.warning(f"Node with id '{node_id}' not found.")
+        return None
+
+    def _transitions(self, node_id, index):
+        transitions = self._graph.transitions(index) if index >= 0 else {}
+        overlay = self._overlay_transitions.get(node_id)
+        if overlay:
+            transitions.update(overlay)
+        return transitions
+
+    @tracing.traced("graph")
+    def get_transitions(self, node_id):
+        with self._lock:
+            return self._transitions(node_id, self._base_index(node_id))
+
+    @tracing.traced("graph")
+    def get_node(self, node_id):
+        with self._lock:
+            index = self._base_index(node_id)
+            if index >= 0 or node_id in self._overlay_texts:
+                text = self._overlay_texts[node_id] if node_id in self._overlay_texts else self._graph.text(index)
+                return Node(node_id, text, self._transitions(node_id, index))
+        logger.warning(f"Node with id '{node_id}' not found.")
+        return None
+
+    def get_nodes(self, node_ids):
+        """Retrieves several nodes at once. Missing nodes map to None."""
+        return {node_id: self.get_node(node_id) for node_id in node_ids}
+
+    def _build_snapshot(self):
+        # Caller holds the lock
+        if self._snapshot is None:
+            texts, transitions = {}, {}
+            if not self._base_cleared:
+                for i in range(self._graph.node_count):
+                    node_id = self._graph.string(int(self._graph.node_ids[i]))
+                    texts[node_id] = self._graph.text(i)
+                    transitions[node_id] = self._graph.transitions(i)
+            texts.update(self._overlay_texts)
+            for node_id, options in self._overlay_transitions.items():
+                transitions.setdefault(node_id, {}).update(options)
+            self._version += 1
+            self._snapshot = GraphSnapshot(self._version, texts, transitions)
+        return self._snapshot
+
+    def get_snapshot(self):
+        with self._lock:
+            return self._build_snapshot()
+
+    def add_node(self, node_id, text, options=None):
+        with self._lock:
+            self._overlay_texts[node_id] = text
+            self._overlay_transitions.setdefault(node_id, {})
+            self._snapshot = None
+        for keyword, target_node_id in (options or {}).items():
+            self.add_relationship(node_id, target_node_id, keyword)
+
+    def add_relationship(self, source_node_id, target_node_id, keyword):
+        with self._lock:
+            # Mirror Neo4j MERGE semantics: endpoints are created if missing
+            for node_id in (source_node_id, target_node_id):
+                if node_id not in self._overlay_texts and self._base_index(node_id) < 0:
+                    self._overlay_texts[node_id] = None
+            self._overlay_transitions.setdefault(source_node_id, {})[keyword] = target_node_id
+            self._snapshot = None
+
+    def bulk_load(self, nodes, edges, batch_size=None):
+        for node in nodes:
+            self.add_node(node['id'], node['text'])
+        for edge in edges:
+            self.add_relationship(edge['source'], edge['target'], edge['keyword'])
+
+    def clear_graph(self):
+        with self._lock:
+            self._base_cleared = True
+            self._clears += 1
+            self._overlay_texts.clear()
+            self._overlay_transitions.clear()
+            self._snapshot = None
+
+    def save(self, path=None):
+        """
+        Compiles the current graph (file + overlay) to `path` (default: the mapped file) and
+        maps it. Writes made while it compiles stay in the overlay, on top of the new file.
+        """
+        with self._lock:
+            snapshot = self._build_snapshot()
+            texts = dict(self._overlay_texts)
+            transitions = {node_id: dict(options) for node_id, options in self._overlay_transitions.items()}
+            clears = self._clears
+        counts = compile_graph(snapshot.texts, snapshot.transitions, path or self.path)
+        if path is not None and os.path.abspath(path) != os.path.abspath(self.path):
+            return counts
+
+        graph = _MappedGraph(self.path)
+        with self._lock:
+            self._swap_graph(graph)
+            self._snapshot = None
+            if self._clears != clears:
+                return counts  # Cleared meanwhile: the new file stays hidden, like the old one
+            self._base_cleared = False
+            # Drop the overlay entries the file now holds; anything written since stays
+            for node_id, text in texts.items():
+                if node_id in self._overlay_texts and self._overlay_texts[node_id] == text:
+                    del self._overlay_texts[node_id]
+            for node_id, options in transitions.items():
+                overlay = self._overlay_transitions.get(node_id)
+                if overlay is None:
+                    continue
+                for keyword, target in options.items():
+                    if overlay.get(keyword) == target:
+                        del overlay[keyword]
+                if not overlay:
+                    del self._overlay_transitions[node_id]
+        return counts
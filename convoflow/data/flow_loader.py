@@ -0,0 +1,65 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def load_flow(path):
+    """
+    Reads a declarative flow definition from a JSON or YAML file.
+
+    Expected layout:
+        nodes:
+          - id: start
+            text: "What can I help you with today?"
+            options:
+              billing: billing
+
+    Returns:
+        (nodes, edges): node rows ({'id', 'text'}) and edge rows
+                        ({'source', 'target', 'keyword'}) ready for GraphStore.bulk_load.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8') as f:
+        if ext in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                logger.error("PyYAML is required to read YAML flow files: pip install pyyaml")
+                raise
+            flow = yaml.safe_load(f)
+        else:
+            flow = json.load(f)
+
+    if not isinstance(flow, dict) or not isinstance(flow.get("nodes"), list):
+        raise ValueError(f"Flow file {path} must contain a top-level 'nodes' list.")
+
+    nodes = []
+    edges = []
+    seen = set()
+    for entry in flow["nodes"]:
+        node_id = entry.get("id")
+        if not node_id:
+            raise ValueError(f"Flow file {path} has a node without an 'id': {entry}")
+        if node_id in seen:
+            raise ValueError(f"Flow file {path} defines node '{node_id}' more than once.")
+        seen.add(node_id)
+
+        nodes.append({'id': node_id, 'text': entry.get("text", "")})
+        for keyword, target_id in (entry.get("options") or {}).items():
+            edges.append({'source': node_id, 'target': target_id, 'keyword': keyword})
+
+    missing = {e['target'] for e in edges} - seen
+    if missing:
+        logger.warning(f"Flow file {path} has transitions to undefined nodes: {sorted(missing)}")
+
+    logger.info(f"Loaded flow {path}: {len(nodes)} nodes, {len(edges)} transitions")
+    return nodes, edges
+
+
+def import_flow(store, path, batch_size=5000):
+    """Loads a flow file into a GraphStore using batched writes."""
+    nodes, edges = load_flow(path)
+    store.bulk_load(nodes, edges, batch_size=batch_size)
+    return len(nodes), len(edges)
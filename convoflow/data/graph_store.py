@@ -1,55 +1,200 @@
-import os
-from neo4j import GraphDatabase
+import threading
 import logging
-from dotenv import load_dotenv
 
-load_dotenv()
+from convoflow import tracing
+from convoflow.data.neo4j_driver import get_driver
+from convoflow.data.nodes import GraphSnapshot, Node
 
 logger = logging.getLogger(__name__)
 
+
+def _collect_transitions(pairs):
+    # OPTIONAL MATCH yields a single null pair for nodes without edges
+    return {t['keyword']: t['target_id'] for t in pairs if t['keyword'] is not None}
+
+
+_NODE_QUERY = (
+    "MATCH (n:Node {id: $node_id}) "
+    "OPTIONAL MATCH (n)-[r:TRANSITION]->(target:Node) "
+    "RETURN n.text AS text, collect({keyword: r.keyword, target_id: target.id}) AS transitions"
+)
+
+
 class GraphStore:
-    def __init__(self, uri=None, user=None, password=None):
-        # Use environment variables or defaults
-        uri = uri or os.getenv("NEO4J_URI", "bolt://localhost:7687")
-        user = user or os.getenv("NEO4J_USERNAME", "neo4j")
-        _password_to_use = password or os.getenv("NEO4J_PASSWORD", "password")
+    def __init__(self, uri=None, user=None, password=None, use_snapshot=True, snapshot_max_age=None):
+        """
+        Args:
+            use_snapshot (bool): Serve reads from an in-process snapshot of the graph
+                                 instead of querying Neo4j on every call.
+            snapshot_max_age (float): Seconds after which the snapshot is reloaded on the
+                                      next read. None keeps it until refreshed/invalidated.
 
-        if not uri or not user or not _password_to_use:
-            raise ValueError("Neo4j connection details...")
+        Connection details default to the NEO4J_* environment variables. Every GraphStore
+        in a process shares one driver and connection pool per server (see
+        convoflow.data.neo4j_driver), sized by $CONVOFLOW_NEO4J_POOL_SIZE.
+        """
+        self._driver = get_driver(uri, user, password)
 
-        try:
-            self._driver = GraphDatabase.driver(uri, auth=(user, _password_to_use))
-            self._driver.verify_connectivity()
-            logger.info(f"Successfully connected to Neo4j at {uri}")
-        except Exception as e:
-            logger.error(f"Failed to connect to Neo4j: {e}")
-            raise
+        self.use_snapshot = use_snapshot
+        self.snapshot_max_age = snapshot_max_age
+        self._snapshot = None
+        self._snapshot_version = 0
+        self._snapshot_lock = threading.Lock()
+        # Bumped by every write; a snapshot loaded across a bump may predate the write
+        self._generation = 0
+        self._generation_lock = threading.Lock()
 
     def close(self):
-        if self._driver:
-            self._driver.close()
-            logger.info("Neo4j connection closed.")
+        # The driver is shared with the process's other stores; it is closed at exit (neo4j_driver.close_drivers)
+        pass
 
     def _execute_write_query(self, query, parameters=None):
         try:
-            with self._driver.session() as session:
-                result = session.execute_write(lambda tx: tx.run(query, parameters).data())
-                return result
+            return self._driver.write(query, parameters)
         except Exception as e:
             logger.error(f"Error executing write query: {query} | Params: {parameters} | Error: {e}")
             raise
 
     def _execute_read_query(self, query, parameters=None):
         try:
-            with self._driver.session() as session:
-                result = session.execute_read(lambda tx: tx.run(query, parameters).data())
-                return result
+            return self._driver.read(query, parameters)
         except Exception as e:
             logger.error(f"Error executing read query: {query} | Params: {parameters} | Error: {e}")
             raise
 
+    def read_many(self, queries):
+        """
+        Runs several (query, parameters) reads in one session and transaction, instead of
+        one session per read. Returns one list of record dicts per query.
+        """
+        try:
+            return self._driver.read_many(queries)
+        except Exception as e:
+            logger.error(f"Error executing {len(queries)} batched read queries | Error: {e}")
+            raise
+
+    def pool_stats(self):
+        """Usage of the shared Neo4j connection pool (sessions in use, peak utilization, ...)."""
+        return self._driver.stats()
+
+    # --- Snapshot ---
+
+    def _load_snapshot(self):
+        query = (
+            "MATCH (n:Node) "
+            "OPTIONAL MATCH (n)-[r:TRANSITION]->(target:Node) "
+            "RETURN n.id AS id, n.text AS text, "
+            "collect({keyword: r.keyword, target_id: target.id}) AS transitions"
+        )
+        results = self._execute_read_query(query)
+        texts = {}
+        transitions = {}
+        for res in results:
+            node_id = res['id']
+            texts[node_id] = res.get('text')
+            transitions[node_id] = _collect_transitions(res['transitions'])
+        self._snapshot_version += 1
+        return GraphSnapshot(self._snapshot_version, texts, transitions)
+
+    def _reload_snapshot(self):
+        """Loads a snapshot (caller holds _snapshot_lock) and keeps it unless a write raced the load."""
+        generation = self._generation
+        snapshot = self._load_snapshot()
+        with self._generation_lock:
+            if self._generation == generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def _is_fresh(self, snapshot):
+        if snapshot is None:
+            return False
+        return self.snapshot_max_age is None or snapshot.age() < self.snapshot_max_age
+
+    def get_snapshot(self):
+        """Returns the current graph snapshot, loading it from Neo4j if needed."""
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+        with self._snapshot_lock:
+            # Another thread may have loaded it while we waited
+            snapshot = self._snapshot
+            if not self._is_fresh(snapshot):
+                snapshot = self._reload_snapshot()
+                logger.info(f"Loaded graph snapshot v{snapshot.version} ({len(snapshot)} nodes)")
+        return snapshot
+
+    def refresh_snapshot(self):
+        """Reloads the snapshot from Neo4j immediately and returns it."""
+        with self._snapshot_lock:
+            snapshot = self._reload_snapshot()
+            logger.info(f"Refreshed graph snapshot to v{snapshot.version} ({len(snapshot)} nodes)")
+            return snapshot
+
+    def invalidate_snapshot(self):
+        """
+        Drops the snapshot; the next read reloads it. A load already in flight is not
+        cached, since it may have read the graph before the write that invalidated it.
+        """
+        with self._generation_lock:
+            self._generation += 1
+            self._snapshot = None
+
+    @property
+    def snapshot_version(self):
+        """Version stamp of the loaded snapshot, or None if none is loaded."""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+    # --- Reads ---
+
+    @tracing.traced("graph")
+    def get_node(self, node_id):
+        """Retrieves a node's text and outgoing transitions in a single lookup."""
+        if self.use_snapshot:
+            snapshot = self.get_snapshot()
+            if node_id not in snapshot.texts:
+                logger.warning(f"Node with id '{node_id}' not found.")
+                return None
+            return Node(node_id, snapshot.texts[node_id], dict(snapshot.transitions.get(node_id, {})))
+
+        result = self._execute_read_query(_NODE_QUERY, {'node_id': node_id})
+        if not result:
+            logger.warning(f"Node with id '{node_id}' not found.")
+            return None
+        return Node(node_id, result[0].get('text'), _collect_transitions(result[0]['transitions']))
+
+    @tracing.traced("graph")
+    def get_nodes(self, node_ids):
+        """Retrieves several nodes at once (one transaction when not using the snapshot). Missing nodes map to None."""
+        if self.use_snapshot:
+            snapshot = self.get_snapshot()
+            return {
+                node_id: Node(node_id, snapshot.texts[node_id], dict(snapshot.transitions.get(node_id, {})))
+                if node_id in snapshot.texts else None
+                for node_id in node_ids
+            }
+
+        node_ids = list(node_ids)
+        results = self.read_many([(_NODE_QUERY, {'node_id': node_id}) for node_id in node_ids])
+        nodes = {}
+        for node_id, result in zip(node_ids, results):
+            if result:
+                nodes[node_id] = Node(node_id, result[0].get('text'), _collect_transitions(result[0]['transitions']))
+            else:
+                logger.warning(f"Node with id '{node_id}' not found.")
+                nodes[node_id] = None
+        return nodes
+
+    @tracing.traced("graph")
     def get_node_text(self, node_id):
         """Retrieves the text property of a specific node."""
+        if self.use_snapshot:
+            snapshot = self.get_snapshot()
+            if node_id in snapshot.texts:
+                return snapshot.texts[node_id]
+            logger.warning(f"Node with id '{node_id}' not found.")
+            return None
+
         query = "MATCH (n:Node {id: $node_id}) RETURN n.text AS text"
         result = self._execute_read_query(query, {'node_id': node_id})
         if result:
@@ -57,8 +202,14 @@ class GraphStore:
         logger.warning(f"Node with id '{node_id}' not found.")
         return None
 
+    @tracing.traced("graph")
     def get_transitions(self, node_id):
         """Retrieves the outgoing transitions for a specific node."""
+        if self.use_snapshot:
+            transitions = dict(self.get_snapshot().transitions.get(node_id, {}))
+            logger.debug(f"Transitions for node '{node_id}': {transitions}")
+            return transitions
+
         query = (
             "MATCH (source:Node {id: $node_id})-[r:TRANSITION]->(target:Node) "
             "RETURN r.keyword AS keyword, target.id AS target_id"
@@ -68,6 +219,8 @@ class GraphStore:
         logger.debug(f"Transitions for node '{node_id}': {transitions}")
         return transitions
 
+    # --- Writes ---
+
     def add_node(self, node_id, text, options=None):
         # Create or update the node with its properties
         query = (
@@ -77,6 +230,7 @@ class GraphStore:
         )
         try:
             self._execute_write_query(query, {'node_id': node_id, 'text': text})
+            self.invalidate_snapshot()
             logger.debug(f"Added/updated node: {node_id}")
         except Exception as e:
             raise
@@ -99,12 +253,51 @@ class GraphStore:
             'target_id': target_node_id,
             'keyword': keyword
         })
+        self.invalidate_snapshot()
         logger.debug(f"Added relationship: ({source_node_id}) -[{keyword}]-> ({target_node_id})")
 
+    def ensure_schema(self):
+        """Creates the uniqueness constraint (and backing index) on Node.id."""
+        query = "CREATE CONSTRAINT node_id_unique IF NOT EXISTS FOR (n:Node) REQUIRE n.id IS UNIQUE"
+        self._execute_write_query(query)
+        logger.info("Ensured uniqueness constraint on Node.id")
+
+    def bulk_load(self, nodes, edges, batch_size=5000):
+        """
+        Writes nodes and transitions in batched UNWIND transactions.
+
+        Args:
+            nodes (list[dict]): Rows with 'id' and 'text'.
+            edges (list[dict]): Rows with 'source', 'target' and 'keyword'.
+            batch_size (int): Rows per write transaction.
+        """
+        self.ensure_schema()
+
+        node_query = (
+            "UNWIND $rows AS row "
+            "MERGE (n:Node {id: row.id}) "
+            "SET n.text = row.text"
+        )
+        edge_query = (
+            "UNWIND $rows AS row "
+            "MERGE (source:Node {id: row.source}) "
+            "MERGE (target:Node {id: row.target}) "
+            "MERGE (source)-[r:TRANSITION {keyword: row.keyword}]->(target)"
+        )
+        for query, rows, kind in ((node_query, nodes, "nodes"), (edge_query, edges, "relationships")):
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                self._execute_write_query(query, {'rows': batch})
+                logger.debug(f"Wrote {kind} {start}-{start + len(batch)} of {len(rows)}")
+
+        self.invalidate_snapshot()
+        logger.info(f"Bulk loaded {len(nodes)} nodes and {len(edges)} relationships.")
+
     def clear_graph(self):
         query = "MATCH (n) DETACH DELETE n"
         try:
             self._execute_write_query(query)
+            self.invalidate_snapshot()
             logger.info("Cleared all nodes and relationships from the graph.")
         except Exception as e:
             raise
\ No newline at end of file
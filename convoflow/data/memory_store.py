@@ -0,0 +1,88 @@
+import logging
+
+from convoflow import tracing
+from convoflow.data.nodes import GraphSnapshot, Node
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryGraphStore:
+    """
+    Dict-backed graph store with the GraphStore read/write interface.
+    Meant for development, tests and load tests that shouldn't need Neo4j.
+    """
+
+    def __init__(self):
+        self._texts = {}
+        self._transitions = {}
+        self._version = 0
+        self._snapshot = None
+
+    @classmethod
+    def from_flow(cls, path):
+        """Builds a store from a JSON/YAML flow file (see convoflow.data.flow_loader)."""
+        from convoflow.data.flow_loader import load_flow
+        store = cls()
+        nodes, edges = load_flow(path)
+        store.bulk_load(nodes, edges)
+        return store
+
+    def close(self):
+        pass
+
+    def get_snapshot(self):
+        if self._snapshot is None:
+            self._version += 1
+            self._snapshot = GraphSnapshot(
+                self._version, dict(self._texts), {k: dict(v) for k, v in self._transitions.items()}
+            )
+        return self._snapshot
+
+    @tracing.traced("graph")
+    def get_node(self, node_id):
+        if node_id not in self._texts:
+            logger.warning(f"Node with id '{node_id}' not found.")
+            return None
+        return Node(node_id, self._texts[node_id], dict(self._transitions.get(node_id, {})))
+
+    def get_nodes(self, node_ids):
+        """Retrieves several nodes at once. Missing nodes map to None."""
+        return {node_id: self.get_node(node_id) for node_id in node_ids}
+
+    @tracing.traced("graph")
+    def get_node_text(self, node_id):
+        if node_id not in self._texts:
+            logger.warning(f"Node with id '{node_id}' not found.")
+            return None
+        return self._texts[node_id]
+
+    @tracing.traced("graph")
+    def get_transitions(self, node_id):
+        return dict(self._transitions.get(node_id, {}))
+
+    def add_node(self, node_id, text, options=None):
+        self._texts[node_id] = text
+        self._transitions.setdefault(node_id, {})
+        self._snapshot = None
+        for keyword, target_node_id in (options or {}).items():
+            self.add_relationship(node_id, target_node_id, keyword)
+
+    def add_relationship(self, source_node_id, target_node_id, keyword):
+        # Mirror Neo4j MERGE semantics: endpoints are created if missing
+        for node_id in (source_node_id, target_node_id):
+            if node_id not in self._texts:
+                self._texts[node_id] = None
+                self._transitions[node_id] = {}
+        self._transitions[source_node_id][keyword] = target_node_id
+        self._snapshot = None
+
+    def bulk_load(self, nodes, edges, batch_size=None):
+        for node in nodes:
+            self.add_node(node['id'], node['text'])
+        for edge in edges:
+            self.add_relationship(edge['source'], edge['target'], edge['keyword'])
+
+    def clear_graph(self):
+        self._texts.clear()
+        self._transitions.clear()
+        self._snapshot = None
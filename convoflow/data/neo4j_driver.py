@@ -0,0 +1,177 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Bolt connections kept per process; every GraphStore and script in it shares them
+POOL_SIZE = int(os.getenv("CONVOFLOW_NEO4J_POOL_SIZE", "50"))
+# Seconds a session waits for a free connection before failing
+ACQUISITION_TIMEOUT = float(os.getenv("CONVOFLOW_NEO4J_ACQUISITION_TIMEOUT", "10"))
+# Records pulled per round trip; -1 pulls each result in one go
+FETCH_SIZE = int(os.getenv("CONVOFLOW_NEO4J_FETCH_SIZE", "1000"))
+# Database to query; None uses the server's default database
+DATABASE = os.getenv("NEO4J_DATABASE") or None
+
+def connection_settings(uri=None, user=None, password=None):
+    """(uri, user, password), falling back to the NEO4J_* environment variables."""
+    return (
+        uri or os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+        user or os.getenv("NEO4J_USERNAME", "neo4j"),
+        password or os.getenv("NEO4J_PASSWORD", "password"),
+    )
+
+class SharedDriver:
+    """
+    One Neo4j driver (and connection pool) per process and server, with managed read and
+    write helpers and usage counters. Sessions are cheap wrappers over pooled connections,
+    but each still costs a pool acquisition and a BEGIN/COMMIT round trip, so read_many()
+    runs a group of reads in one session and one transaction.
+    """
+
+    def __init__(self, uri, user, password, pool_size=POOL_SIZE, acquisition_timeout=ACQUISITION_TIMEOUT,
+                 fetch_size=FETCH_SIZE, database=DATABASE):
+        self.uri = uri
+        self.pool_size = pool_size
+        self.fetch_size = fetch_size
+        self.database = database
+        self.pid = os.getpid()
+        try:
+            self._driver = GraphDatabase.driver(
+                uri, auth=(user, password),
+                max_connection_pool_size=pool_size,
+                connection_acquisition_timeout=acquisition_timeout,
+            )
+            self._driver.verify_connectivity()
+            logger.info(f"Successfully connected to Neo4j at {uri} (pool of {pool_size})")
+        except Exception as e:
+            logger.error(f"Failed to connect to Neo4j: {e}")
+            raise
+
+        self.sessions = 0
+        self.reads = 0
+        self.read_batches = 0
+        self.writes = 0
+        self.failures = 0
+        self.peak_in_use = 0
+        self._in_use = 0
+        self._session_ms = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self, **config):
+        """Opens a session on the shared pool, counting it towards the usage stats."""
+        with self._lock:
+            self.sessions += 1
+            self._in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self._in_use)
+        start = time.perf_counter()
+        try:
+            config.setdefault("database", self.database)
+            config.setdefault("fetch_size", self.fetch_size)
+            with self._driver.session(**config) as session:
+                yield session
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._session_ms += (time.perf_counter() - start) * 1000
+
+    def read(self, query, parameters=None):
+        """Runs one query in a managed read transaction; returns its records as dicts."""
+        with self.session() as session:
+            result = session.execute_read(lambda tx: tx.run(query, parameters).data())
+        with self._lock:
+            self.reads += 1
+        return result
+
+    def read_many(self, queries):
+        """
+        Runs several (query, parameters) reads in one session and one read transaction, so
+        they share a single connection acquisition and a consistent view of the graph.
+        Returns one list of record dicts per query, in order.
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+
+        def work(tx):
+            return [tx.run(query, parameters).data() for query, parameters in queries]
+
+        with self.session() as session:
+            results = session.execute_read(work)
+        with self._lock:
+            self.reads += len(queries)
+            self.read_batches += 1
+        return results
+
+    def write(self, query, parameters=None):
+        """Runs one query in a managed write transaction; returns its records as dicts."""
+        with self.session() as session:
+            result = session.execute_write(lambda tx: tx.run(query, parameters).data())
+        with self._lock:
+            self.writes += 1
+        return result
+
+    def verify(self):
+        self._driver.verify_connectivity()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "in_use": self._in_use,
+                "peak_in_use": self.peak_in_use,
+                "utilization": self._in_use / self.pool_size,
+                "peak_utilization": self.peak_in_use / self.pool_size,
+                "sessions": self.sessions,
+                "reads": self.reads,
+                "read_batches": self.read_batches,
+                "writes": self.writes,
+                "failures": self.failures,
+                "mean_session_ms": self._session_ms / self.sessions if self.sessions else 0.0,
+            }
+
+    def close(self):
+        self._driver.close()
+        logger.info("Neo4j connection closed.")
+
+_drivers = {}
+_drivers_lock = threading.Lock()
+
+def get_driver(uri=None, user=None, password=None):
+    """
+    Returns the process-wide driver for this server and user, connecting on first use (and
+    again in a forked child). It stays open until close_drivers(), which runs at exit.
+    """
+    uri, user, password = connection_settings(uri, user, password)
+    key = (uri, user)
+    driver = _drivers.get(key)
+    if driver is None or driver.pid != os.getpid():
+        with _drivers_lock:
+            driver = _drivers.get(key)
+            if driver is None or driver.pid != os.getpid():
+                # A driver inherited across fork shares sockets with the parent: abandon it, don't close it
+                driver = SharedDriver(uri, user, password)
+                _drivers[key] = driver
+    return driver
+
+def close_drivers():
+    with _drivers_lock:
+        for driver in _drivers.values():
+            if driver.pid == os.getpid():
+                driver.close()
+        _drivers.clear()
+
+atexit.register(close_drivers)
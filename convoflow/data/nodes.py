@@ -0,0 +1,37 @@
+import time
+
+
+class GraphSnapshot:
+    """
+    In-memory copy of the whole (:Node)-[:TRANSITION]->(:Node) graph.
+    Treated as immutable once built; a refresh swaps in a new snapshot.
+    """
+
+    __slots__ = ("version", "loaded_at", "texts", "transitions")
+
+    def __init__(self, version, texts, transitions):
+        self.version = version
+        self.loaded_at = time.time()
+        self.texts = texts              # node_id -> text
+        self.transitions = transitions  # node_id -> {keyword: target_id}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def age(self):
+        return time.time() - self.loaded_at
+
+
+class Node:
+    """A node's message and its outgoing transitions, fetched together."""
+
+    __slots__ = ("id", "message", "transitions")
+
+    def __init__(self, node_id, message, transitions):
+        self.id = node_id
+        self.message = message
+        self.transitions = transitions  # {keyword: target_id}
+
+    def __repr__(self):
+        return f"Node(id={self.id!r}, transitions={list(self.transitions)})"
+
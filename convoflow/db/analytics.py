@@ -0,0 +1,147 @@
+# Funnel and drop-off analytics over the pre-aggregated metrics tables (see
+# migrations/0003_analytics_aggregates.sql). Nothing here reads raw `routes` rows.
+# Date ranges are UTC days, `start` inclusive and `end` exclusive; None leaves a side open.
+# Call refresh() periodically (scripts/refresh_analytics.py, e.g. from cron) to fold new traffic into the aggregates.
+import logging
+
+from convoflow.db.pool import connection
+
+logger = logging.getLogger(__name__)
+
+def _day_filter(start, end, column="day", bound="%s"):
+    clauses, params = [], []
+    if start is not None:
+        clauses.append(f"{column} >= {bound}")
+        params.append(start)
+    if end is not None:
+        clauses.append(f"{column} < {bound}")
+        params.append(end)
+    return clauses, params
+
+def _where(clauses):
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+def _fetch(query, params):
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(query, params)
+        columns = [c.name for c in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+def refresh(settle_s=300):
+    """
+    Folds routes and sessions older than `settle_s` seconds into the aggregates. Each row is
+    counted once, so `settle_s` must exceed how late rows can be written (write-behind delay).
+    Returns {"routes_processed": n, "sessions_processed": n}.
+    """
+    rows = _fetch("SELECT * FROM refresh_analytics(make_interval(secs => %s))", (settle_s,))
+    logger.info(f"Analytics refreshed: {rows[0]}")
+    return rows[0]
+
+def watermark_age(name="routes"):
+    """Seconds since the aggregates last covered `name` rows, or None if refresh() never ran."""
+    rows = _fetch(
+        """
+        SELECT CASE WHEN processed_until = '-infinity' THEN NULL
+                    ELSE extract(epoch FROM now() - processed_until)::double precision END AS age_s
+        FROM analytics_watermarks WHERE name = %s
+        """,
+        (name,),
+    )
+    return rows[0]["age_s"] if rows else None
+
+def transition_counts(start=None, end=None, node_id=None):
+    """Turns per (node_id, predicted_keyword), most frequent first. 'N/A' means nothing matched."""
+    clauses, params = _day_filter(start, end)
+    if node_id is not None:
+        clauses.append("node_id = %s")
+        params.append(node_id)
+    return _fetch(
+        f"""
+        SELECT node_id, predicted_keyword, sum(transitions)::bigint AS transitions
+        FROM node_transition_daily {_where(clauses)}
+        GROUP BY node_id, predicted_keyword
+        ORDER BY transitions DESC, node_id, predicted_keyword
+        """,
+        params,
+    )
+
+def edge_conversion(start=None, end=None, node_id=None):
+    """
+    Per edge (node_id -> predicted_keyword): how many of the node's routed turns took it.
+    `rate` is transitions / node_turns; the 'N/A' edge is the node's not-understood rate.
+    """
+    clauses, params = _day_filter(start, end)
+    if node_id is not None:
+        clauses.append("node_id = %s")
+        params.append(node_id)
+    return _fetch(
+        f"""
+        SELECT node_id, predicted_keyword, transitions, node_turns,
+               transitions::double precision / NULLIF(node_turns, 0) AS rate
+        FROM (
+            SELECT node_id, predicted_keyword, sum(transitions)::bigint AS transitions,
+                   (sum(sum(transitions)) OVER (PARTITION BY node_id))::bigint AS node_turns
+            FROM node_transition_daily {_where(clauses)}
+            GROUP BY node_id, predicted_keyword
+        ) edges
+        ORDER BY node_id, rate DESC
+        """,
+        params,
+    )
+
+def drop_off(start=None, end=None):
+    """
+    Sessions that ended before reaching a terminal node, per node they ended on, with each
+    node's share of those sessions.
+    """
+    clauses, params = _day_filter(start, end)
+    return _fetch(
+        f"""
+        SELECT node_id, sessions,
+               sessions::double precision / NULLIF(sum(sessions) OVER (), 0) AS share
+        FROM (
+            SELECT node_id, sum(sessions)::bigint AS sessions
+            FROM drop_off_daily {_where(clauses)}
+            GROUP BY node_id
+        ) nodes
+        ORDER BY sessions DESC, node_id
+        """,
+        params,
+    )
+
+def daily_sessions(start=None, end=None):
+    """Per-day session count, mean/max duration (seconds) and mean turns."""
+    clauses, params = _day_filter(start, end)
+    return _fetch(
+        f"""
+        SELECT day, sessions,
+               total_duration_s / NULLIF(sessions, 0) AS mean_duration_s,
+               max_duration_s,
+               total_turns::double precision / NULLIF(sessions, 0) AS mean_turns
+        FROM session_daily {_where(clauses)}
+        ORDER BY day
+        """,
+        params,
+    )
+
+def session_durations(start=None, end=None, percentiles=(0.5, 0.9, 0.99)):
+    """
+    Session duration distribution from the per-session summaries: count, mean and the
+    requested percentiles (as "p50", "p90", ...), in seconds.
+    """
+    # Compare end_time itself against UTC midnights so the end_time index applies
+    clauses, params = _day_filter(start, end, column="end_time", bound="(%s::date::timestamp AT TIME ZONE 'UTC')")
+    fractions = list(percentiles)
+    rows = _fetch(
+        f"""
+        SELECT count(*) AS sessions, avg(duration_s) AS mean_duration_s,
+               percentile_cont(%s::double precision[]) WITHIN GROUP (ORDER BY duration_s) AS percentiles
+        FROM session_summary {_where(clauses)}
+        """,
+        [fractions] + params,
+    )
+    result = rows[0]
+    values = result.pop("percentiles") or [None] * len(fractions)
+    for fraction, value in zip(fractions, values):
+        result[f"p{fraction * 100:g}"] = value
+    return result
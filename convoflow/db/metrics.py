@@ -1,98 +1,133 @@
-import psycopg2
 import uuid
 import os
+import atexit
+import threading
 from datetime import datetime, timezone
 import logging
 from dotenv import load_dotenv
+from psycopg2.extras import Json
+
+from convoflow import tracing
+from convoflow.db.migrate import migrate
+from convoflow.db.pool import connect, connection
+from convoflow.db.write_behind import RouteWriter
 
 # Load .env file at the start of the module
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class SessionLogger:
-    SCHEMA_PATH = "convoflow/db/schema.sql"
+# Buffer routes rows and write them in batches from a background thread (see RouteWriter)
+BUFFERED = os.getenv("CONVOFLOW_METRICS_BUFFERED", "0") == "1"
+# What log_step does when the buffer is full: drop_oldest, drop_newest or block
+OVERFLOW = os.getenv("CONVOFLOW_METRICS_OVERFLOW", "drop_oldest")
 
-    def __init__(self):
-        # Read connection details from environment variables
-        db_name = os.getenv("POSTGRES_DB", "convoflow_metrics")
-        user = os.getenv("POSTGRES_USER", "user")
-        password = os.getenv("POSTGRES_PASSWORD", "sqlpassword")
-        host = os.getenv("POSTGRES_HOST", "localhost")
-        port = os.getenv("POSTGRES_PORT", "5432")
+# Create or upgrade the metrics schema on first use in each process. Set to 0 when the
+# deployment runs `scripts/initialize_db.py --metrics-schema` instead.
+BOOTSTRAP_SCHEMA = os.getenv("CONVOFLOW_METRICS_BOOTSTRAP", "1") == "1"
 
-        conn_string = f"dbname='{db_name}' user='{user}' password='{password}' host='{host}' port='{port}'"
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def ensure_schema(force=False):
+    """
+    Applies pending migrations (convoflow/db/migrations) and makes sure upcoming routes
+    partitions exist. Runs at most once per process unless forced.
+    """
+    global _schema_ready
+    if _schema_ready and not force:
+        return
+    with _schema_lock:
+        if _schema_ready and not force:
+            return
         try:
-            self.conn = psycopg2.connect(conn_string)
-            self.conn.autocommit = True
-            logger.info(f"Successfully connected to PostgreSQL database '{db_name}' at {host}:{port}")
-        except psycopg2.OperationalError as e:
-            logger.error(f"Failed to connect to PostgreSQL: {e}")
+            migrate()
+            with connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT ensure_routes_partitions()")
+        except Exception as e:
+            logger.error(f"Failed to initialize/upgrade the metrics schema: {e}")
             raise
+        _schema_ready = True
+
+_route_writer = None
+_route_writer_lock = threading.Lock()
+
+def get_route_writer():
+    """Returns the process-wide RouteWriter, starting it on first call. It is flushed at exit."""
+    global _route_writer
+    if _route_writer is None:
+        with _route_writer_lock:
+            if _route_writer is None:
+                _route_writer = RouteWriter(connect, overflow=OVERFLOW)
+                atexit.register(_route_writer.close)
+    return _route_writer
+
+class SessionLogger:
+    """
+    Records one call session and its routing steps. Queries borrow a connection from the
+    process-wide pool (convoflow.db.pool), so creating a logger per call is cheap.
+    """
+
+    def __init__(self, buffered=None, flush_timeout=5.0):
+        """
+        Args:
+            buffered (bool): Queue log_step rows for the shared background writer instead of
+                             inserting them on the caller's thread. Defaults to $CONVOFLOW_METRICS_BUFFERED.
+            flush_timeout (float): Seconds end_session waits for this session's buffered rows.
+        """
+        self.writer = get_route_writer() if (BUFFERED if buffered is None else buffered) else None
+        self.flush_timeout = flush_timeout
 
         self.session_id = str(uuid.uuid4())
-        self._init_schema()
+        if BOOTSTRAP_SCHEMA:
+            ensure_schema()
         self._start_session()
 
     def _execute_query(self, query, params=None):
         """Helper method to execute a query with error handling."""
         try:
-            with self.conn.cursor() as cur:
+            with connection() as conn, conn.cursor() as cur:
                 cur.execute(query, params)
-                # Fetch results for SELECT, though not strictly needed for INSERT/UPDATE here
-                # return cur.fetchall() if cur.description else None
         except Exception as e:
             logger.error(f"Error executing query: {query} | Params: {params} | Error: {e}")
             raise
 
-    def _init_schema(self):
-        try:
-            with open(self.SCHEMA_PATH, 'r') as f:
-                schema_sql = f.read()
-            # Note: psycopg2 cursor.execute() can generally only handle one statement at a time.
-            # If schema.sql contains multiple statements, they need to be split or executed differently.
-            # Assuming schema.sql contains compatible, single statements for simplicity.
-            with self.conn.cursor() as cur:
-                cur.execute("SELECT to_regclass('public.sessions');")
-                sessions_exists = cur.fetchone()[0]
-                cur.execute("SELECT to_regclass('public.routes');")
-                routes_exists = cur.fetchone()[0]
-
-                if not sessions_exists or not routes_exists:
-                    logger.info(f"Schema tables not found, attempting to initialize from {self.SCHEMA_PATH}...")
-                    cur.execute(schema_sql)
-                    logger.info(f"Schema initialized or verified from {self.SCHEMA_PATH}")
-                else:
-                    logger.info("Schema tables already exist.")
-
-        except FileNotFoundError:
-            logger.error(f"Schema file not found at {self.SCHEMA_PATH}. Ensure the path is correct relative to the execution context.")
-            raise
-        except Exception as e:
-            logger.error(f"Failed to initialize/verify schema from {self.SCHEMA_PATH}: {e}")
-            raise
-
     def _start_session(self):
         query = "INSERT INTO sessions (session_id, start_time) VALUES (%s, %s)"
         params = (self.session_id, datetime.now(timezone.utc))
         self._execute_query(query, params)
         logger.info(f"Started session: {self.session_id}")
 
-    def log_step(self, node_id, user_input, predicted_keyword):
+    @tracing.traced("metrics")
+    def log_step(self, node_id, user_input, predicted_keyword, timings=None):
+        """
+        Records one routed turn. `timings` ({stage: ms}, see convoflow.tracing.turn) is
+        stored in the row's timings column.
+        """
+        params = (self.session_id, node_id, user_input, predicted_keyword, datetime.now(timezone.utc),
+                  Json(timings) if timings is not None else None)
+        if self.writer is not None:
+            self.writer.submit(params)
+            return
         query = (
-            "INSERT INTO routes (session_id, node_id, user_input, predicted_keyword, timestamp) "
-            "VALUES (%s, %s, %s, %s, %s)"
+            "INSERT INTO routes (session_id, node_id, user_input, predicted_keyword, timestamp, timings) "
+            "VALUES (%s, %s, %s, %s, %s, %s)"
         )
-        params = (self.session_id, node_id, user_input, predicted_keyword, datetime.now(timezone.utc))
         self._execute_query(query, params)
 
-    def end_session(self):
-        query = "UPDATE sessions SET end_time = %s WHERE session_id = %s"
-        params = (datetime.now(timezone.utc), self.session_id)
+    def end_session(self, end_node_id=None, completed=False):
+        """
+        Marks the session ended. `end_node_id` is the node the caller was on, and `completed`
+        whether it was a terminal node; sessions that end elsewhere count as drop-offs.
+        """
+        if self.writer is not None and not self.writer.flush(timeout=self.flush_timeout):
+            logger.warning(f"Route rows for session {self.session_id} not flushed within {self.flush_timeout}s")
+        query = "UPDATE sessions SET end_time = %s, end_node_id = %s, completed = %s WHERE session_id = %s"
+        params = (datetime.now(timezone.utc), end_node_id, completed, self.session_id)
         self._execute_query(query, params)
         logger.info(f"Ended session: {self.session_id}")
 
     def close(self):
-        if self.conn:
-            self.conn.close()
-            logger.info("PostgreSQL connection closed.")
\ No newline at end of file
+        # The connection pool and writer are shared with other sessions; just make sure this session's rows are out
+        if self.writer is not None:
+            self.writer.flush(timeout=self.flush_timeout)
\ No newline at end of file
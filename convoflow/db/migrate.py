@@ -0,0 +1,53 @@
+import os
+import re
+import logging
+
+from convoflow.db.pool import connection
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema changes shipped with the package: NNNN_description.sql, applied in order
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+# Serializes migrations across processes and hosts sharing the database
+_LOCK_KEY = "convoflow.migrate"
+
+def available_migrations():
+    """Returns [(version, name, path)] for every migration file, in version order."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+def migrate():
+    """
+    Applies every migration not yet recorded in schema_migrations, all in one transaction.
+    Safe to call from many processes at once: they queue on an advisory lock and later
+    callers find nothing left to do. Returns the versions applied.
+    """
+    applied = []
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_LOCK_KEY,))
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        )
+        cur.execute("SELECT version FROM schema_migrations")
+        done = {row[0] for row in cur.fetchall()}
+
+        for version, name, path in available_migrations():
+            if version in done:
+                continue
+            logger.info(f"Applying metrics migration {version:04d}_{name}...")
+            with open(path, 'r') as f:
+                cur.execute(f.read())
+            cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            applied.append(version)
+
+    if applied:
+        logger.info(f"Applied metrics migrations {applied}")
+    else:
+        logger.info("Metrics schema is up to date.")
+    return applied
@@ -1,4 +1,4 @@
--- Schema for PostgreSQL
+-- Initial metrics schema: sessions and their routing steps
 
 CREATE TABLE IF NOT EXISTS sessions (
     session_id UUID PRIMARY KEY,
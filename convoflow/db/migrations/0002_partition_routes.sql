@@ -0,0 +1,58 @@
+-- Range-partition routes by month and index it for per-session and per-node queries.
+-- Existing rows are copied into the new table inside this migration's transaction.
+
+-- Creates monthly partitions routes_YYYY_MM from `from_month` through `months_ahead` months
+-- past the current one. Call periodically (refresh_analytics() does) so inserts never fall
+-- through to routes_default.
+CREATE OR REPLACE FUNCTION ensure_routes_partitions(months_ahead INTEGER DEFAULT 2, from_month DATE DEFAULT now()::date)
+RETURNS void AS $$
+DECLARE
+    month DATE := date_trunc('month', from_month)::date;
+    last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+BEGIN
+    WHILE month <= last_month LOOP
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF routes FOR VALUES FROM (%L) TO (%L)',
+                'routes_' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date
+            );
+        EXCEPTION WHEN check_violation THEN
+            -- routes_default already holds rows for this month; leave them there
+            RAISE WARNING 'Cannot create partition for %: rows for it are in routes_default', month;
+        END;
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE routes RENAME TO routes_unpartitioned;
+ALTER INDEX routes_pkey RENAME TO routes_unpartitioned_pkey;
+-- Keep the id sequence (and its position) when the old table is dropped
+ALTER SEQUENCE routes_id_seq OWNED BY NONE;
+
+CREATE TABLE routes (
+    id BIGINT NOT NULL DEFAULT nextval('routes_id_seq'),
+    session_id UUID REFERENCES sessions(session_id),
+    node_id TEXT,
+    user_input TEXT,
+    predicted_keyword TEXT,
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, timestamp)  -- Must include the partition key
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE routes_default PARTITION OF routes DEFAULT;
+
+SELECT ensure_routes_partitions(2, (SELECT COALESCE(min(timestamp), now())::date FROM routes_unpartitioned));
+
+INSERT INTO routes (id, session_id, node_id, user_input, predicted_keyword, timestamp)
+SELECT id, session_id, node_id, user_input, predicted_keyword, COALESCE(timestamp, to_timestamp(0))
+FROM routes_unpartitioned;
+
+DROP TABLE routes_unpartitioned;
+ALTER SEQUENCE routes_id_seq OWNED BY routes.id;
+
+-- Created on the parent, so every partition (present and future) gets them
+CREATE INDEX IF NOT EXISTS routes_session_id_idx ON routes (session_id);
+CREATE INDEX IF NOT EXISTS routes_node_id_timestamp_idx ON routes (node_id, timestamp);
+
+CREATE INDEX IF NOT EXISTS sessions_end_time_idx ON sessions (end_time);
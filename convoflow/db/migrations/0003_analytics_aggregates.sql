@@ -0,0 +1,115 @@
+-- Pre-aggregated analytics tables, maintained incrementally by refresh_analytics().
+-- convoflow.db.analytics reads only these, never raw routes rows. Days are UTC.
+
+-- Where each session ended, written by SessionLogger.end_session: the node the caller was
+-- on, and whether that was a terminal node (the flow finished rather than the caller leaving)
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS end_node_id TEXT;
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS completed BOOLEAN NOT NULL DEFAULT false;
+
+-- Routed turns per node and chosen keyword ('N/A' when nothing matched)
+CREATE TABLE IF NOT EXISTS node_transition_daily (
+    day DATE NOT NULL,
+    node_id TEXT NOT NULL,
+    predicted_keyword TEXT NOT NULL,
+    transitions BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, node_id, predicted_keyword)
+);
+
+-- One row per ended session
+CREATE TABLE IF NOT EXISTS session_summary (
+    session_id UUID PRIMARY KEY,
+    start_time TIMESTAMPTZ,
+    end_time TIMESTAMPTZ NOT NULL,
+    duration_s DOUBLE PRECISION,
+    turns INTEGER NOT NULL,
+    end_node_id TEXT,  -- Node the session ended on
+    completed BOOLEAN NOT NULL DEFAULT false
+);
+CREATE INDEX IF NOT EXISTS session_summary_end_time_idx ON session_summary (end_time);
+
+CREATE TABLE IF NOT EXISTS session_daily (
+    day DATE PRIMARY KEY,
+    sessions BIGINT NOT NULL DEFAULT 0,
+    total_duration_s DOUBLE PRECISION NOT NULL DEFAULT 0,
+    max_duration_s DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_turns BIGINT NOT NULL DEFAULT 0
+);
+
+-- Sessions that ended before reaching a terminal node, per node they ended on
+CREATE TABLE IF NOT EXISTS drop_off_daily (
+    day DATE NOT NULL,
+    node_id TEXT NOT NULL,
+    sessions BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, node_id)
+);
+
+-- Everything before processed_until has been folded into the aggregates
+CREATE TABLE IF NOT EXISTS analytics_watermarks (
+    name TEXT PRIMARY KEY,
+    processed_until TIMESTAMPTZ NOT NULL
+);
+INSERT INTO analytics_watermarks (name, processed_until)
+VALUES ('routes', '-infinity'), ('sessions', '-infinity')
+ON CONFLICT (name) DO NOTHING;
+
+-- Folds routes and ended sessions older than now() - settle into the aggregates. Rows are
+-- only counted once; `settle` must exceed how late rows can arrive (e.g. write-behind delay).
+CREATE OR REPLACE FUNCTION refresh_analytics(settle INTERVAL DEFAULT interval '5 minutes')
+RETURNS TABLE (routes_processed BIGINT, sessions_processed BIGINT) AS $$
+DECLARE
+    cutoff TIMESTAMPTZ := now() - settle;
+    routes_from TIMESTAMPTZ;
+    sessions_from TIMESTAMPTZ;
+BEGIN
+    -- One refresher at a time; a concurrent caller waits, then finds little left to do
+    PERFORM pg_advisory_xact_lock(hashtext('convoflow.refresh_analytics'));
+    PERFORM ensure_routes_partitions();
+
+    SELECT processed_until INTO routes_from FROM analytics_watermarks WHERE name = 'routes';
+    SELECT processed_until INTO sessions_from FROM analytics_watermarks WHERE name = 'sessions';
+
+    WITH new_routes AS (
+        SELECT (r.timestamp AT TIME ZONE 'UTC')::date AS day,
+               COALESCE(r.node_id, '') AS node_id,
+               COALESCE(r.predicted_keyword, 'N/A') AS predicted_keyword
+        FROM routes r
+        WHERE r.timestamp >= routes_from AND r.timestamp < cutoff
+    ), upserted AS (
+        INSERT INTO node_transition_daily AS t (day, node_id, predicted_keyword, transitions)
+        SELECT day, node_id, predicted_keyword, count(*) FROM new_routes GROUP BY 1, 2, 3
+        ON CONFLICT (day, node_id, predicted_keyword)
+        DO UPDATE SET transitions = t.transitions + EXCLUDED.transitions
+    )
+    SELECT count(*) INTO routes_processed FROM new_routes;
+
+    WITH summarized AS (
+        INSERT INTO session_summary (session_id, start_time, end_time, duration_s, turns, end_node_id, completed)
+        SELECT s.session_id, s.start_time, s.end_time,
+               EXTRACT(EPOCH FROM (s.end_time - s.start_time)),
+               (SELECT count(*) FROM routes r
+                WHERE r.session_id = s.session_id AND r.timestamp BETWEEN s.start_time AND s.end_time),
+               s.end_node_id, s.completed
+        FROM sessions s
+        WHERE s.end_time >= sessions_from AND s.end_time < cutoff
+        ON CONFLICT (session_id) DO NOTHING
+        RETURNING (end_time AT TIME ZONE 'UTC')::date AS day, duration_s, turns, end_node_id, completed
+    ), daily AS (
+        INSERT INTO session_daily AS d (day, sessions, total_duration_s, max_duration_s, total_turns)
+        SELECT day, count(*), COALESCE(sum(duration_s), 0), COALESCE(max(duration_s), 0), sum(turns)
+        FROM summarized GROUP BY day
+        ON CONFLICT (day) DO UPDATE SET
+            sessions = d.sessions + EXCLUDED.sessions,
+            total_duration_s = d.total_duration_s + EXCLUDED.total_duration_s,
+            max_duration_s = GREATEST(d.max_duration_s, EXCLUDED.max_duration_s),
+            total_turns = d.total_turns + EXCLUDED.total_turns
+    ), drop_off AS (
+        INSERT INTO drop_off_daily AS o (day, node_id, sessions)
+        SELECT day, COALESCE(end_node_id, ''), count(*) FROM summarized WHERE NOT completed GROUP BY 1, 2
+        ON CONFLICT (day, node_id) DO UPDATE SET sessions = o.sessions + EXCLUDED.sessions
+    )
+    SELECT count(*) INTO sessions_processed FROM summarized;
+
+    UPDATE analytics_watermarks SET processed_until = cutoff WHERE name IN ('routes', 'sessions');
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
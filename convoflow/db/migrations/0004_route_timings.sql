@@ -0,0 +1,3 @@
+-- Per-turn stage latencies in milliseconds, e.g. {"asr": 812.4, "route": 41.0, "graph": 0.2, "tts": 230.9}.
+-- Written only when the engine persists timings (CONVOFLOW_TRACE_PERSIST=1); NULL otherwise.
+ALTER TABLE routes ADD COLUMN IF NOT EXISTS timings JSONB;
@@ -0,0 +1,134 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Connections kept open per process; sessions borrow one per query, not per call
+POOL_MIN = int(os.getenv("CONVOFLOW_PG_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("CONVOFLOW_PG_POOL_MAX", "10"))
+# Seconds a borrower waits for a free connection before giving up
+POOL_TIMEOUT = float(os.getenv("CONVOFLOW_PG_POOL_TIMEOUT", "5"))
+
+def dsn():
+    """Connection string from the POSTGRES_* environment variables."""
+    # Read connection details from environment variables
+    db_name = os.getenv("POSTGRES_DB", "convoflow_metrics")
+    user = os.getenv("POSTGRES_USER", "user")
+    password = os.getenv("POSTGRES_PASSWORD", "sqlpassword")
+    host = os.getenv("POSTGRES_HOST", "localhost")
+    port = os.getenv("POSTGRES_PORT", "5432")
+    return f"dbname='{db_name}' user='{user}' password='{password}' host='{host}' port='{port}'"
+
+def connect():
+    """Opens a dedicated (unpooled) autocommit connection, e.g. for a long-lived background writer."""
+    try:
+        conn = psycopg2.connect(dsn())
+        conn.autocommit = True
+        return conn
+    except psycopg2.OperationalError as e:
+        logger.error(f"Failed to connect to PostgreSQL: {e}")
+        raise
+
+class ConnectionPool:
+    """
+    ThreadedConnectionPool that makes borrowers wait (up to `timeout`) for a free
+    connection instead of failing immediately, and counts how often they had to.
+    """
+
+    def __init__(self, minconn=POOL_MIN, maxconn=POOL_MAX, timeout=POOL_TIMEOUT):
+        try:
+            self._pool = ThreadedConnectionPool(minconn, maxconn, dsn())
+        except psycopg2.OperationalError as e:
+            logger.error(f"Failed to connect to PostgreSQL: {e}")
+            raise
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.pid = os.getpid()
+
+        self.borrows = 0
+        self.waits = 0  # Borrows that found every connection in use
+        self.max_wait_ms = 0.0
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._in_use = 0
+        self._lock = threading.Lock()
+        logger.info(f"PostgreSQL connection pool ready ({minconn}-{maxconn} connections)")
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for one unit of work. Commits on success, rolls back on error;
+        connections that broke while borrowed are discarded rather than returned.
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.waits += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                raise PoolError(f"No PostgreSQL connection free within {self.timeout}s ({self.maxconn} in use).")
+        waited_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.borrows += 1
+            self._in_use += 1
+            self.max_wait_ms = max(self.max_wait_ms, waited_ms)
+
+        conn = None
+        try:
+            conn = self._pool.getconn()
+            yield conn
+            conn.commit()
+        except Exception:
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                self._pool.putconn(conn, close=bool(conn.closed))
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_connections": self.maxconn,
+                "in_use": self._in_use,
+                "borrows": self.borrows,
+                "waits": self.waits,
+                "max_wait_ms": self.max_wait_ms,
+            }
+
+    def close(self):
+        self._pool.closeall()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Returns the process-wide pool, creating it on first use (and again in a forked child)."""
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                # A pool inherited across fork shares sockets with the parent: abandon it, don't close it
+                _pool = ConnectionPool()
+    return _pool
+
+def connection():
+    """Borrows a connection from the process-wide pool: `with connection() as conn: ...`"""
+    return get_pool().connection()
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
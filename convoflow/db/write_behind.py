@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class RouteWriter:
+    """
+    Write-behind buffer for `routes` rows, shared by every SessionLogger in the process.
+
+    log_step() only appends to a bounded in-memory buffer; a background thread writes
+    batches with execute_values once `batch_size` rows are pending or the oldest pending
+    row is `flush_interval_s` old, so a slow database never adds latency to a turn.
+
+    Args:
+        connect (callable): Returns a new psycopg2 connection (used for all writes).
+        max_pending (int): Rows buffered before the overflow policy applies.
+        batch_size (int): Rows per INSERT.
+        flush_interval_s (float): Longest a row waits before being written.
+        overflow (str): When the buffer is full: 'drop_oldest' evicts the oldest pending row,
+                        'drop_newest' discards the new row, 'block' makes the caller wait up to
+                        `block_timeout_s` for space and then discards the new row.
+    """
+
+    INSERT = "INSERT INTO routes (session_id, node_id, user_input, predicted_keyword, timestamp, timings) VALUES %s"
+
+    def __init__(self, connect, max_pending=10000, batch_size=500, flush_interval_s=0.5, overflow="drop_oldest",
+                 block_timeout_s=1.0):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {list(OVERFLOW_POLICIES)}, got '{overflow}'")
+        self.connect = connect
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_s
+        self.overflow = overflow
+        self.block_timeout = block_timeout_s
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0  # Discarded by the overflow policy
+        self.failed = 0   # Lost to write errors
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._flush_total = 0.0
+
+        # Each row carries a sequence number so flush() can wait for everything submitted before it
+        self._pending = deque()  # (seq, enqueued_at, row)
+        self._next_seq = 0
+        self._done_seq = 0  # Every row with seq < _done_seq has been written, dropped or failed...
+        self._in_flight = False  # ...except possibly a batch the worker is writing right now
+        self._in_flight_rows = 0
+        self._blocked = 0  # Submitters waiting for space under the 'block' policy
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._conn = None
+
+        self._worker = threading.Thread(target=self._run, name="convoflow-route-writer", daemon=True)
+        self._worker.start()
+
+    def submit(self, row):
+        """Buffers one routes row. Returns False if the overflow policy discarded it."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("RouteWriter is closed.")
+            # Counted before the overflow decision: submitted == written + failed + dropped + pending
+            self.submitted += 1
+            if len(self._pending) >= self.max_pending:
+                if self.overflow == "block":
+                    self._blocked += 1
+                    try:
+                        self._cond.wait_for(lambda: len(self._pending) < self.max_pending, timeout=self.block_timeout)
+                    finally:
+                        self._blocked -= 1
+                if len(self._pending) >= self.max_pending:
+                    if self.overflow != "drop_oldest":
+                        self.dropped += 1
+                        return False
+                    seq, _, _ = self._pending.popleft()
+                    self._done_seq = seq + 1
+                    self.dropped += 1
+
+            self._pending.append((self._next_seq, time.monotonic(), row))
+            self._next_seq += 1
+            # Wake the worker to start the flush timer, or to write a full batch
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    def flush(self, timeout=None):
+        """Waits until every row submitted so far is written (or lost). Returns False on timeout."""
+        with self._cond:
+            target = self._next_seq
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._done_seq >= target and not self._in_flight, timeout=timeout)
+
+    def _ready(self):
+        if self._flush_requested or self._closed or len(self._pending) >= self.batch_size:
+            return True
+        return bool(self._pending) and time.monotonic() - self._pending[0][1] >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ready():
+                    timeout = None
+                    if self._pending:
+                        timeout = max(0.0, self._pending[0][1] + self.flush_interval - time.monotonic())
+                    self._cond.wait(timeout)
+                if not self._pending:
+                    self._flush_requested = False
+                    if self._closed:
+                        return
+                    continue
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not self._pending:
+                    self._flush_requested = False
+                self._in_flight = True
+                self._in_flight_rows = len(batch)
+                # Room was freed for blocked submitters
+                self._cond.notify_all()
+
+            elapsed_ms = self._write([row for _, _, row in batch])
+            with self._cond:
+                if elapsed_ms is None:
+                    self.failed += len(batch)
+                else:
+                    self.written += len(batch)
+                    self.batches += 1
+                    self.last_flush_ms = elapsed_ms
+                    self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                    self._flush_total += elapsed_ms
+                self._done_seq = max(self._done_seq, batch[-1][0] + 1)
+                self._in_flight = False
+                self._in_flight_rows = 0
+                self._cond.notify_all()
+
+    def _write(self, rows):
+        """Inserts one batch. Returns the time it took in ms, or None if it failed."""
+        start = time.perf_counter()
+        try:
+            if self._conn is None or self._conn.closed:
+                self._conn = self.connect()
+            with self._conn.cursor() as cur:
+                execute_values(cur, self.INSERT, rows, page_size=self.batch_size)
+            if not self._conn.autocommit:
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} route rows: {e}")
+            if self._conn is not None and not self._conn.closed:
+                try:
+                    self._conn.rollback()
+                except Exception:
+                    self._conn.close()
+            return None
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.debug(f"Wrote {len(rows)} route rows in {elapsed_ms:.1f} ms")
+        return elapsed_ms
+
+    def stats(self):
+        with self._cond:
+            return {
+                # Buffered, being written, or waiting for space
+                "pending": len(self._pending) + self._in_flight_rows + self._blocked,
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_flush_ms": self.last_flush_ms,
+                "mean_flush_ms": self._flush_total / self.batches if self.batches else 0.0,
+                "max_flush_ms": self.max_flush_ms,
+            }
+
+    def close(self, timeout=None):
+        """Writes everything still buffered, then stops the worker and closes its connection."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+        if self._conn is not None and not self._conn.closed:
+            self._conn.close()
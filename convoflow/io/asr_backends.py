@@ -0,0 +1,147 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ASRBackend:
+    """Interface for speech-to-text backends used by convoflow.io.voice_input."""
+
+    name = "base"
+
+    def load(self):
+        """Loads model weights. Called once, before the first transcribe()."""
+
+    def transcribe(self, audio_np):
+        """Transcribes a mono float32 array at 16 kHz. Returns lowercased text ('' on error)."""
+        raise NotImplementedError
+
+
+class WhisperBackend(ASRBackend):
+    """
+    Whisper-family checkpoint through the transformers ASR pipeline.
+
+    Args:
+        model_id (str): Hugging Face checkpoint, e.g. "openai/whisper-base".
+        language (str): Decoding language, or None for English-only (".en") checkpoints,
+                        which reject a language argument.
+        quantize (bool): Dynamically quantize Linear layers to int8 (CPU only).
+    """
+
+    def __init__(self, model_id="openai/whisper-large-v3", language="english", quantize=False, name=None):
+        self.model_id = model_id
+        self.language = language
+        self.quantize = quantize
+        self.name = name or model_id
+        self.pipe = None
+
+    def load(self):
+        import torch
+        from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
+
+        use_cuda = torch.cuda.is_available() and not self.quantize
+        device = "cuda:0" if use_cuda else "cpu"
+        torch_dtype = torch.float16 if use_cuda else torch.float32
+        print(f"Using device: {device} with dtype: {torch_dtype}")
+
+        print(f"Loading processor for {self.model_id}...")
+        try:
+            processor = AutoProcessor.from_pretrained(self.model_id)
+            print("Processor loaded.")
+        except Exception as e:
+            print(f"FATAL: Failed to load processor: {e}")
+            raise
+
+        print(f"Loading model {self.model_id}...")
+        try:
+            model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                self.model_id,
+                torch_dtype=torch_dtype,
+                low_cpu_mem_usage=True,
+                use_safetensors=True
+            )
+            if self.quantize:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                print("Model dynamically quantized to int8.")
+            model.to(device)
+            print("Model loaded and moved to device.")
+        except Exception as e:
+            print(f"FATAL: Failed to load model: {e}")
+            print("Ensure sufficient RAM/VRAM and correct torch installation.")
+            raise
+
+        print("Creating ASR pipeline...")
+        try:
+            self.pipe = pipeline(
+                "automatic-speech-recognition",
+                model=model,
+                tokenizer=processor.tokenizer,
+                feature_extractor=processor.feature_extractor,
+                torch_dtype=torch_dtype,
+                device=device,
+                chunk_length_s=30
+            )
+            print("ASR pipeline created successfully.")
+        except Exception as e:
+            print(f"FATAL: Failed to create pipeline: {e}")
+            raise
+
+    def transcribe(self, audio_np):
+        if audio_np.size == 0:
+            return ""
+        generate_kwargs = {"forced_decoder_ids": None}
+        if self.language:
+            generate_kwargs["language"] = self.language
+        try:
+            result = self.pipe(audio_np, generate_kwargs=generate_kwargs)
+            return result["text"].strip().lower()
+        except Exception as e:
+            print(f"Error during Whisper processing: {e}")
+            return ""
+
+
+# IVR answers are short, constrained phrases: the small checkpoints are usually enough
+PRESETS = {
+    "large-v3": dict(model_id="openai/whisper-large-v3"),
+    "distil-large-v3": dict(model_id="distil-whisper/distil-large-v3"),
+    "distil-small.en": dict(model_id="distil-whisper/distil-small.en", language=None),
+    "small": dict(model_id="openai/whisper-small"),
+    "small.en": dict(model_id="openai/whisper-small.en", language=None),
+    "base": dict(model_id="openai/whisper-base"),
+    "base.en": dict(model_id="openai/whisper-base.en", language=None),
+    "small-int8": dict(model_id="openai/whisper-small", quantize=True),
+    "base.en-int8": dict(model_id="openai/whisper-base.en", language=None, quantize=True),
+    "distil-small.en-int8": dict(model_id="distil-whisper/distil-small.en", language=None, quantize=True),
+}
+
+
+def create_backend(spec):
+    """
+    Builds an (unloaded) ASR backend from a preset name (see PRESETS), a Hugging Face
+    Whisper checkpoint id, or returns `spec` unchanged if it already is a backend.
+    """
+    if isinstance(spec, ASRBackend):
+        return spec
+    if spec in PRESETS:
+        return WhisperBackend(name=spec, **PRESETS[spec])
+    if "/" in spec:
+        return WhisperBackend(model_id=spec, language=None if spec.endswith(".en") else "english")
+    raise ValueError(f"Unknown ASR backend '{spec}'. Use one of {sorted(PRESETS)} or a Whisper model id.")
+
+
+class LazyBackend:
+    """Holds one backend and loads it on first use (thread-safe)."""
+
+    def __init__(self, spec):
+        self.backend = create_backend(spec)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.backend.load()
+                    self._loaded = True
+                    logger.info(f"ASR backend '{self.backend.name}' ready")
+        return self.backend
@@ -0,0 +1,389 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import sounddevice as sd
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRingBuffer:
+    """
+    Preallocated float32 ring buffer addressed by absolute sample position.
+    A single writer (the audio callback) appends; readers get [start, end) as long as it
+    is still within the last `capacity` samples.
+
+    With `max_view`, the first `max_view` samples of the ring are mirrored past its end, so
+    any span up to that long is one contiguous slice and read() never has to copy it.
+    """
+
+    def __init__(self, capacity, max_view=0):
+        if max_view > capacity:
+            raise ValueError("max_view cannot exceed capacity")
+        self.capacity = capacity
+        self.max_view = max_view
+        self._buffer = np.zeros(capacity + max_view, dtype=np.float32)
+        self.total_written = 0
+
+    def _put(self, index, samples, scale):
+        end = index + len(samples)
+        if scale is None:
+            self._buffer[index:end] = samples
+        else:
+            # Convert and scale straight into the ring, without a temporary array
+            np.multiply(samples, scale, out=self._buffer[index:end])
+        if index < self.max_view:
+            mirror_end = min(end, self.max_view)
+            self._buffer[self.capacity + index:self.capacity + mirror_end] = self._buffer[index:mirror_end]
+
+    def write(self, samples, scale=None):
+        """Appends samples, multiplied by `scale` if given (e.g. 1 / 32768 for int16 input)."""
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            self.total_written += n - self.capacity
+            n = self.capacity
+        index = self.total_written % self.capacity
+        first = min(n, self.capacity - index)
+        self._put(index, samples[:first], scale)
+        if n > first:
+            self._put(0, samples[first:], scale)
+        self.total_written += n
+
+    def read(self, start, end):
+        """
+        Returns samples [start, end): a view when contiguous in the ring (always, for spans
+        up to `max_view`), otherwise a joined copy. Views are overwritten once the writer
+        has moved on by another `capacity - (end - start)` samples.
+        """
+        if end - start > self.capacity or start < self.total_written - self.capacity:
+            raise ValueError(f"Samples {start}-{end} are no longer in the ring buffer.")
+        i = start % self.capacity
+        if i + (end - start) <= self.capacity + self.max_view:
+            return self._buffer[i:i + (end - start)]
+        return np.concatenate((self._buffer[i:self.capacity], self._buffer[:end % self.capacity]))
+
+
+class EnergyVAD:
+    """
+    Frame-level voice activity detector: a frame is speech when its RMS energy is
+    well above an adaptive noise floor (tracked on non-speech frames).
+    """
+
+    def __init__(self, ratio=3.0, min_rms=0.005, adapt=0.05):
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.adapt = adapt
+        self.noise_floor = min_rms
+
+    def is_speech(self, frame):
+        # dot() avoids allocating a squared copy of every frame
+        rms = float(np.sqrt(np.dot(frame, frame) / len(frame))) if len(frame) else 0.0
+        speech = rms > max(self.min_rms, self.noise_floor * self.ratio)
+        if not speech:
+            self.noise_floor += self.adapt * (rms - self.noise_floor)
+        return speech
+
+
+class UtteranceDetector:
+    """
+    Finds one utterance in a growing AudioRingBuffer: reset() at the position listening
+    starts, then scan() whenever samples arrive. An utterance starts at the first voiced
+    frame (minus `pre_roll`) and ends after `end_silence` unvoiced samples or at
+    `max_utterance`. Positions are absolute sample counts, as in the ring.
+    """
+
+    def __init__(self, frame_len, end_silence, pre_roll, max_utterance, no_speech_timeout, vad=None):
+        self.frame_len = frame_len
+        self.end_silence = end_silence
+        self.pre_roll = pre_roll
+        self.max_utterance = max_utterance
+        self.no_speech_timeout = no_speech_timeout
+        self.vad = vad or EnergyVAD()
+        self.reset(0)
+
+    @property
+    def max_span(self):
+        """Longest span scan() returns."""
+        return self.max_utterance + self.pre_roll
+
+    def reset(self, position):
+        self.listen_start = self.read_pos = position
+        self.speech_start = self.last_voice = None
+
+    def skip_to(self, position):
+        """Jumps ahead (e.g. after falling behind the writer), keeping any utterance within bounds."""
+        self.read_pos = position
+        if self.speech_start is not None:
+            self.speech_start = max(self.speech_start, position - self.max_utterance)
+
+    def scan(self, ring):
+        """
+        Classifies every complete frame written since the last scan. Returns None while
+        undecided, the utterance's (start, end) once it is over, or an empty span
+        (start == end) if no speech began within `no_speech_timeout`.
+        """
+        while ring.total_written - self.read_pos >= self.frame_len:
+            end = self.read_pos + self.frame_len
+            voiced = self.vad.is_speech(ring.read(self.read_pos, end))
+            self.read_pos = end
+
+            if self.speech_start is None:
+                if voiced:
+                    self.speech_start = max(self.listen_start, end - self.frame_len - self.pre_roll)
+                    self.last_voice = end
+                elif end - self.listen_start >= self.no_speech_timeout:
+                    return end, end
+                continue
+
+            if voiced:
+                self.last_voice = end
+            if end - self.last_voice >= self.end_silence or end - self.speech_start >= self.max_span:
+                return self.speech_start, self.last_voice
+        return None
+
+
+class MicrophoneCapture:
+    """
+    Persistent microphone input for turn-by-turn listening.
+
+    One sounddevice input stream is opened on first use and kept running, writing int16
+    frames, normalized to float32 as they are copied, into a preallocated ring buffer. Each
+    listen() segments one utterance with a VAD and returns it as a view into the ring, so
+    there is no device open/close per turn and no per-turn audio allocation: memory stays
+    flat however long the process runs. The view stays valid while the next
+    `buffer_s - max_utterance_s` seconds are captured, so decode it before then.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, end_silence_ms=800, pre_roll_ms=300,
+                 max_utterance_s=15.0, no_speech_timeout_s=10.0, buffer_s=60.0, device=None, vad=None):
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.device = device
+        self.detector = UtteranceDetector(
+            self.frame_len, int(sample_rate * end_silence_ms / 1000), int(sample_rate * pre_roll_ms / 1000),
+            int(sample_rate * max_utterance_s), int(sample_rate * no_speech_timeout_s), vad,
+        )
+        max_view = self.detector.max_span
+        self.ring = AudioRingBuffer(max(int(sample_rate * buffer_s), 2 * max_view), max_view=max_view)
+        self._data_ready = threading.Event()
+        self._stream = None
+        self._lock = threading.Lock()
+        self.overflows = 0
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            if status.input_overflow:
+                self.overflows += 1
+            logger.debug(f"Input stream status: {status}")
+        self.ring.write(indata[:, 0], scale=1.0 / 32768.0)
+        self._data_ready.set()
+
+    def open(self):
+        """Starts the input stream if it isn't running (called by listen())."""
+        with self._lock:
+            if self._stream is None:
+                start = time.perf_counter()
+                self._stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype="int16",
+                                              blocksize=self.frame_len, device=self.device, callback=self._callback)
+                self._stream.start()
+                logger.info(f"Microphone stream opened in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def close(self):
+        with self._lock:
+            if self._stream is not None:
+                try:
+                    self._stream.close()
+                finally:
+                    self._stream = None
+
+    def wait_for_audio(self, timeout=1.0):
+        """Blocks until the stream delivers more audio (or `timeout`). Raises if the stream stopped."""
+        if not self._data_ready.wait(timeout=timeout) and not self._stream.active:
+            # The device went away; reopen it on the next turn
+            self.close()
+            raise RuntimeError("Microphone input stream stopped.")
+        self._data_ready.clear()
+
+    def listen(self):
+        """
+        Blocks until the caller finishes an utterance and returns it as a float32 view into
+        the ring buffer (pre-roll included, trailing silence excluded). Returns None if no
+        speech starts within the no-speech timeout.
+        """
+        self.open()
+        ring, detector = self.ring, self.detector
+        self._data_ready.clear()
+        detector.reset(ring.total_written)
+        while True:
+            self.wait_for_audio()
+            if ring.total_written - detector.read_pos > ring.capacity - ring.max_view:
+                logger.warning("Listener fell behind the microphone; dropping audio")
+                detector.skip_to(ring.total_written - self.frame_len)
+
+            span = detector.scan(ring)
+            if span is not None:
+                start, end = span
+                return ring.read(start, end) if end > start else None
+
+
+class StreamingTranscriber:
+    """
+    Transcribes microphone audio while the caller is still speaking.
+
+    Audio comes from the persistent MicrophoneCapture stream and ring buffer (the same one
+    transcribe_from_mic uses), so no device is opened per turn, and is classified frame by
+    frame with a VAD. Short pauses cut the utterance into segments that are transcribed in the
+    background as soon as they end, and the open segment is re-decoded periodically to
+    produce partial hypotheses. When speech ends only the last segment is left to decode,
+    so the final transcript is ready shortly after `end_silence_ms` of silence.
+
+    Once a partial hypothesis has repeated across `stable_count` decodes and the caller
+    then pauses (`segment_pause_ms`), `on_stable(text)` is called with the transcript so
+    far; returning True ends listening early with that text (e.g. when the router can
+    already route it). It is never offered mid-word, only at pauses.
+    """
+
+    def __init__(self, transcribe_fn=None, sample_rate=16000, frame_ms=30, segment_pause_ms=250,
+                 end_silence_ms=500, partial_interval_ms=500, pre_roll_ms=300, max_utterance_s=15.0,
+                 no_speech_timeout_s=10.0, stable_count=2, vad=None, capture=None):
+        """
+        Args:
+            capture (MicrophoneCapture): Stream to read. Defaults to the process-wide one
+                                         (convoflow.io.voice_input.get_capture).
+        """
+        if transcribe_fn is None:
+            from convoflow.io.voice_input import transcribe_array
+            transcribe_fn = transcribe_array
+        self.transcribe_fn = transcribe_fn
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.segment_pause = int(sample_rate * segment_pause_ms / 1000)
+        self.end_silence = int(sample_rate * end_silence_ms / 1000)
+        self.partial_interval = int(sample_rate * partial_interval_ms / 1000)
+        self.pre_roll = int(sample_rate * pre_roll_ms / 1000)
+        self.max_utterance = int(sample_rate * max_utterance_s)
+        self.no_speech_timeout = int(sample_rate * no_speech_timeout_s)
+        self.stable_count = stable_count
+        self.vad = vad or EnergyVAD()
+        self.capture = capture
+
+        # One worker keeps segment decodes in order; partial decodes queue behind them
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="convoflow-asr")
+        self.last_final_latency = None  # Seconds from end of speech to final transcript
+
+    def _decode(self, ring, start, end):
+        # Copy out of the ring so the decode never races the capture callback
+        audio = np.array(ring.read(start, end), dtype=np.float32)
+        return self.transcribe_fn(audio)
+
+    def listen(self, on_partial=None, on_stable=None):
+        """Blocks until the caller finishes speaking and returns the transcript ('' if none)."""
+        capture = self.capture
+        if capture is None:
+            from convoflow.io.voice_input import get_capture
+            capture = self.capture = get_capture(self.sample_rate)
+        capture.open()
+        ring = capture.ring
+
+        speech_start = segment_start = last_voice = None
+        last_partial_at = 0
+        segments = []  # Futures of committed segment transcripts, in order
+        partial = None  # (segment_start, future)
+        last_hypothesis, stable_hits = None, 0
+        offered_at = None  # last_voice of the pause the transcript was last offered to on_stable at
+        stopped_early = None
+
+        def committed_text():
+            texts = []
+            for future in segments:
+                if not future.done():
+                    return None
+                texts.append(future.result())
+            return " ".join(t for t in texts if t)
+
+        print("(Listening... Speak clearly and pause when finished)")
+        read_pos = listen_start = ring.total_written
+        while stopped_early is None:
+            capture.wait_for_audio()
+            if ring.total_written - read_pos > ring.capacity - ring.max_view:
+                logger.warning("ASR consumer fell behind the microphone; dropping audio")
+                read_pos = ring.total_written - self.frame_len
+
+            done = False
+            while not done and ring.total_written - read_pos >= self.frame_len:
+                end = read_pos + self.frame_len
+                voiced = self.vad.is_speech(ring.read(read_pos, end))
+                read_pos = end
+
+                if speech_start is None:
+                    if voiced:
+                        speech_start = segment_start = max(listen_start, end - self.frame_len - self.pre_roll)
+                        last_voice = last_partial_at = end
+                    elif end - listen_start >= self.no_speech_timeout:
+                        print("(No speech detected within timeout)")
+                        return ""
+                    continue
+
+                if voiced:
+                    last_voice = end
+                silence = end - last_voice
+
+                if silence >= self.end_silence or end - speech_start >= self.max_utterance:
+                    done = True
+                elif silence >= self.segment_pause and last_voice > segment_start:
+                    segments.append(self._executor.submit(self._decode, ring, segment_start, last_voice))
+                    segment_start = last_voice
+                    partial = None
+                elif end - last_partial_at >= self.partial_interval and (partial is None or partial[1].done()):
+                    if last_voice > segment_start:
+                        partial = (segment_start, self._executor.submit(self._decode, ring, segment_start, last_voice))
+                    last_partial_at = end
+
+            if done:
+                break
+
+            # Report partial hypotheses once their decode finished
+            if partial is not None and partial[1].done() and partial[0] == segment_start:
+                prefix = committed_text()
+                if prefix is not None:
+                    hypothesis = f"{prefix} {partial[1].result()}".strip().lower()
+                    partial = None
+                    stable_hits = stable_hits + 1 if hypothesis == last_hypothesis else 1
+                    last_hypothesis = hypothesis
+                    if hypothesis and on_partial:
+                        on_partial(hypothesis)
+
+            # Offer a stable transcript for early acceptance only while the caller pauses
+            if (on_stable and stable_hits >= self.stable_count and speech_start is not None
+                    and read_pos - last_voice >= self.segment_pause and offered_at != last_voice):
+                committed = committed_text()
+                if committed is not None:
+                    offered_at = last_voice
+                    hypothesis = committed.strip().lower()
+                    if hypothesis and on_stable(hypothesis):
+                        stopped_early = hypothesis
+
+        if stopped_early is not None:
+            for future in segments:
+                future.cancel()
+            print("(Stable partial transcript accepted)")
+            return stopped_early
+
+        speech_ended = time.perf_counter() - (read_pos - last_voice) / self.sample_rate
+        if partial is not None:
+            partial[1].cancel()
+        if last_voice > segment_start:
+            segments.append(self._executor.submit(self._decode, ring, segment_start, last_voice))
+        texts = [future.result() for future in segments]
+        transcript = " ".join(t for t in texts if t).strip().lower()
+
+        self.last_final_latency = time.perf_counter() - speech_ended
+        logger.info(f"Final transcript ready {self.last_final_latency * 1000:.0f} ms after end of speech")
+        print("(Streaming transcription finished.)")
+        return transcript
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,141 @@
+import numpy as np
+
+# Narrowband telephony audio (G.711 / SIP trunks) and the rate the ASR models expect
+PHONE_SAMPLE_RATE = 8000
+MODEL_SAMPLE_RATE = 16000
+ENCODINGS = ("mulaw", "pcm16")
+
+
+def _mulaw_decode_table():
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+def _mulaw_encode_table():
+    # Indexed by the int16 sample's bit pattern as uint16, so encoding is one table lookup
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), 32635) + 0x84
+    exponent = np.clip(np.floor(np.log2(magnitude)).astype(np.int32) - 7, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+# G.711 μ-law code -> float32 sample in [-1, 1), and int16 bit pattern -> μ-law code
+MULAW_TO_FLOAT = (_mulaw_decode_table().astype(np.float32) / 32768.0)
+PCM16_TO_MULAW = _mulaw_encode_table()
+
+
+def decode(payload, encoding):
+    """Decodes μ-law or little-endian 16-bit PCM bytes to float32 samples."""
+    if encoding == "mulaw":
+        return MULAW_TO_FLOAT[np.frombuffer(payload, dtype=np.uint8)]
+    if encoding == "pcm16":
+        return np.frombuffer(payload, dtype="<i2").astype(np.float32) * (1.0 / 32768.0)
+    raise ValueError(f"Unknown encoding '{encoding}'. Available: {ENCODINGS}")
+
+
+def encode(samples, encoding):
+    """Encodes float32 samples in [-1, 1] as μ-law or little-endian 16-bit PCM bytes."""
+    pcm = (np.clip(samples, -1.0, 32767 / 32768) * 32768.0).astype("<i2")
+    if encoding == "mulaw":
+        return PCM16_TO_MULAW[pcm.view(np.uint16)].tobytes()
+    if encoding == "pcm16":
+        return pcm.tobytes()
+    raise ValueError(f"Unknown encoding '{encoding}'. Available: {ENCODINGS}")
+
+
+def _halfband_taps(num_taps=32):
+    # Windowed-sinc low-pass at a quarter of the high rate (the 8 kHz Nyquist frequency)
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 0.5 * np.sinc(0.5 * n) * np.blackman(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class Upsampler2x:
+    """
+    Streaming 2x upsampler (8 -> 16 kHz). Polyphase: the even and odd output samples are
+    each one short convolution of the input, so the zero-stuffed signal never exists.
+    Keeps filter history between blocks, so packets join without clicks.
+    """
+
+    def __init__(self, num_taps=32):
+        taps = _halfband_taps(num_taps) * 2.0  # Zero-stuffing halves the signal's energy
+        self._phases = (taps[0::2], taps[1::2])
+        self._history = np.zeros(len(self._phases[0]) - 1, dtype=np.float32)
+
+    def process(self, samples):
+        x = np.concatenate((self._history, samples))
+        self._history = x[len(x) - len(self._history):]
+        out = np.empty(2 * len(samples), dtype=np.float32)
+        out[0::2] = np.convolve(x, self._phases[0], mode="valid")
+        out[1::2] = np.convolve(x, self._phases[1], mode="valid")
+        return out
+
+
+class Downsampler2x:
+    """
+    Streaming 2x downsampler (16 -> 8 kHz): anti-alias low-pass, then every other sample,
+    computed as the sum of two half-length polyphase convolutions. Keeps history (and an
+    odd leftover sample) between blocks.
+    """
+
+    def __init__(self, num_taps=32):
+        taps = _halfband_taps(num_taps)
+        self._phases = (taps[0::2], taps[1::2])
+        half = len(self._phases[0])
+        self._even_history = np.zeros(half - 1, dtype=np.float32)
+        self._odd_history = np.zeros(half, dtype=np.float32)
+        self._leftover = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples):
+        x = np.concatenate((self._leftover, samples))
+        usable = len(x) & ~1
+        self._leftover = x[usable:]
+        if not usable:
+            return np.zeros(0, dtype=np.float32)
+        # y[k] = sum_j h[2j] x[2k - 2j] + sum_j h[2j + 1] x[2k - 2j - 1]
+        even = np.concatenate((self._even_history, x[0:usable:2]))
+        odd = np.concatenate((self._odd_history, x[1:usable:2]))
+        out = np.convolve(even, self._phases[0], mode="valid")
+        out += np.convolve(odd[:-1], self._phases[1], mode="valid")
+        self._even_history = even[len(even) - len(self._even_history):]
+        self._odd_history = odd[len(odd) - len(self._odd_history):]
+        return out.astype(np.float32, copy=False)
+
+
+class CallAudioDecoder:
+    """Decodes one call's inbound packets to float32 at MODEL_SAMPLE_RATE."""
+
+    def __init__(self, encoding="mulaw", sample_rate=PHONE_SAMPLE_RATE):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding '{encoding}'. Available: {ENCODINGS}")
+        if sample_rate not in (PHONE_SAMPLE_RATE, MODEL_SAMPLE_RATE):
+            raise ValueError(f"Unsupported sample rate {sample_rate}; use {PHONE_SAMPLE_RATE} or {MODEL_SAMPLE_RATE}.")
+        self.encoding = encoding
+        self._upsampler = Upsampler2x() if sample_rate == PHONE_SAMPLE_RATE else None
+
+    def decode(self, payload):
+        samples = decode(payload, self.encoding)
+        return self._upsampler.process(samples) if self._upsampler is not None else samples
+
+
+class CallAudioEncoder:
+    """Encodes MODEL_SAMPLE_RATE float32 audio (e.g. TTS output) for one call's outbound stream."""
+
+    def __init__(self, encoding="mulaw", sample_rate=PHONE_SAMPLE_RATE):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding '{encoding}'. Available: {ENCODINGS}")
+        if sample_rate not in (PHONE_SAMPLE_RATE, MODEL_SAMPLE_RATE):
+            raise ValueError(f"Unsupported sample rate {sample_rate}; use {PHONE_SAMPLE_RATE} or {MODEL_SAMPLE_RATE}.")
+        self.encoding = encoding
+        self._downsampler = Downsampler2x() if sample_rate == PHONE_SAMPLE_RATE else None
+
+    def encode(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if self._downsampler is not None:
+            samples = self._downsampler.process(samples)
+        return encode(samples, self.encoding)
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_SUFFIXES = {"float32": ".f32", "int16": ".s16"}
+
+
+class WaveformCache:
+    """
+    Content-addressed cache of synthesized waveforms.
+
+    Entries are keyed by a hash of (text, voice id, model version), held in an in-memory
+    LRU bounded by total bytes, and backed by a directory of headerless raw sample files
+    (float32, or int16 to halve disk usage). Waveforms are always returned as float32.
+    """
+
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024, disk_dtype="float32"):
+        if disk_dtype not in _SUFFIXES:
+            raise ValueError(f"disk_dtype must be one of {sorted(_SUFFIXES)}, got '{disk_dtype}'")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.disk_dtype = disk_dtype
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key -> float32 ndarray
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, voice_id, model_version):
+        return hashlib.sha256(f"{model_version}\0{voice_id}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIXES[self.disk_dtype])
+
+    def _remember(self, key, waveform):
+        # Caller holds the lock
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = waveform
+        self._bytes += waveform.nbytes
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            samples = np.fromfile(path, dtype=np.int16 if self.disk_dtype == "int16" else np.float32)
+        except OSError as e:
+            logger.warning(f"Could not read cached waveform {path}: {e}")
+            return None
+        if self.disk_dtype == "int16":
+            return samples.astype(np.float32) / 32767.0
+        return samples
+
+    def _write_disk(self, key, waveform):
+        if not self.directory:
+            return
+        if self.disk_dtype == "int16":
+            data = (np.clip(waveform, -1.0, 1.0) * 32767.0).astype(np.int16)
+        else:
+            data = waveform
+        path = self._path(key)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        try:
+            data.tofile(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cached waveform {path}: {e}")
+
+    def get(self, key):
+        """Returns the cached float32 waveform, or None on a miss."""
+        with self._lock:
+            waveform = self._entries.get(key)
+            if waveform is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return waveform
+
+        waveform = self._read_disk(key)
+        with self._lock:
+            if waveform is None:
+                self.misses += 1
+                return None
+            self._remember(key, waveform)
+            self.hits += 1
+            return waveform
+
+    def put(self, key, waveform):
+        waveform = np.ascontiguousarray(waveform, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._remember(key, waveform)
+        self._write_disk(key, waveform)
+        return waveform
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.directory) and os.path.exists(self._path(key))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -1,112 +1,119 @@
-import torch
-import speech_recognition as sr
-import numpy as np
-from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
+import os
+import threading
+import atexit
 import warnings
 
+from convoflow import tracing
+from convoflow.io.asr_backends import LazyBackend
+
 # Suppress specific Warnings
 warnings.filterwarnings("ignore", category=UserWarning, module='numba')
 warnings.filterwarnings("ignore", category=UserWarning, module='librosa')
 warnings.filterwarnings("ignore", category=FutureWarning, module='transformers.models.whisper.generation_whisper')
 warnings.filterwarnings("ignore", category=UserWarning, module="transformers")
 
-device = "cuda:0" if torch.cuda.is_available() else "cpu"
-torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
-print(f"Using device: {device} with dtype: {torch_dtype}")
-
-model_id = "openai/whisper-large-v3"
-
-processor = None
-print(f"Loading processor for {model_id}...")
-try:
-    processor = AutoProcessor.from_pretrained(model_id)
-    print("Processor loaded.")
-except Exception as e:
-    print(f"FATAL: Failed to load processor: {e}")
-    raise
-
-model = None
-print(f"Loading model {model_id}...")
-try:
-    model = AutoModelForSpeechSeq2Seq.from_pretrained(
-        model_id, 
-        torch_dtype=torch_dtype, 
-        low_cpu_mem_usage=True,
-        use_safetensors=True
-    )
-    model.to(device)
-    print("Model loaded and moved to device.")
-except Exception as e:
-    print(f"FATAL: Failed to load model: {e}")
-    print("Ensure sufficient RAM/VRAM and correct torch installation.")
-    raise
-
-pipe = None
-if model and processor:
-    print("Creating ASR pipeline...")
-    try:
-        pipe = pipeline(
-            "automatic-speech-recognition",
-            model=model,
-            tokenizer=processor.tokenizer,
-            feature_extractor=processor.feature_extractor,
-            torch_dtype=torch_dtype,
-            device=device,
-            chunk_length_s=30
-        )
-        print("ASR pipeline created successfully.")
-    except Exception as e:
-        print(f"FATAL: Failed to create pipeline: {e}")
-        raise
-else:
-    print("FATAL: Model or processor not loaded, cannot create pipeline.")
-    raise RuntimeError("Model or Processor failed to load")
+# Preset name (see convoflow.io.asr_backends.PRESETS) or a Whisper checkpoint id
+ASR_BACKEND = os.getenv("CONVOFLOW_ASR_BACKEND", "large-v3")
+
+# Loaded on first use (or by warmup()) so importing this module stays cheap
+_asr = None
+_asr_lock = threading.Lock()
+
+def configure_asr(spec):
+    """Selects the ASR backend (preset name, model id or ASRBackend instance). Loads lazily."""
+    global _asr
+    _asr = LazyBackend(spec)
+
+def get_asr_backend():
+    """Returns the configured ASR backend, loading it on first call (thread-safe)."""
+    global _asr
+    if _asr is None:
+        with _asr_lock:
+            if _asr is None:
+                _asr = LazyBackend(ASR_BACKEND)
+    return _asr.get()
 
-# Initialize speech_recognition Recognizer
-r = sr.Recognizer()
-r.pause_threshold = 0.8
-r.dynamic_energy_threshold = True
+def warmup():
+    """Loads the ASR model now instead of on the first transcription."""
+    get_asr_backend()
+
+# Persistent microphone stream shared by every turn (see MicrophoneCapture)
+_capture = None
+_capture_lock = threading.Lock()
+
+def get_capture(sample_rate=16000):
+    """Returns the process-wide MicrophoneCapture. The stream opens on first listen and closes at exit."""
+    global _capture
+    if _capture is None or _capture.sample_rate != sample_rate:
+        with _capture_lock:
+            if _capture is None or _capture.sample_rate != sample_rate:
+                from convoflow.io.streaming_asr import MicrophoneCapture
+                if _capture is not None:
+                    _capture.close()
+                else:
+                    atexit.register(lambda: _capture.close())
+                _capture = MicrophoneCapture(sample_rate=sample_rate)
+    return _capture
 
 def transcribe_from_mic(sample_rate=16000):
     """
-    Listens to the microphone until silence, then transcribes using Whisper.
-    Uses explicitly loaded model and processor via the ASR pipeline.
+    Listens to the microphone until silence, then transcribes using the configured ASR backend.
+    The utterance is handed to the backend as a view into the capture ring buffer, uncopied.
     Returns: transcribed text (str) or empty string if error/no speech.
     """
-    if pipe is None:
-        print("ERROR: ASR pipeline is not available. Cannot transcribe.")
+    try:
+        backend = get_asr_backend()
+    except Exception as e:
+        print(f"ERROR: ASR pipeline is not available. Cannot transcribe. ({e})")
+        return ""
+
+    print("(Listening... Speak clearly and pause when finished)")
+    try:
+        audio_np = get_capture(sample_rate).listen()
+    except Exception as e:
+        print(f"Error during listening: {e}")
         return ""
-        
-    with sr.Microphone(sample_rate=sample_rate) as source:
-        print("(Listening... Speak clearly and pause when finished)")
-        try:
-            audio_data = r.listen(source)
-        except sr.WaitTimeoutError:
-            print("(No speech detected within timeout)")
-            return "" 
-        except Exception as e:
-            print(f"Error during listening: {e}")
-            return "" 
-
-    raw_data = audio_data.get_raw_data()
-    audio_np = np.frombuffer(raw_data, dtype=np.int16).astype(np.float32) / 32768.0
 
+    if audio_np is None:
+        print("(No speech detected within timeout)")
+        return ""
     if audio_np.size == 0:
         print("(No audio captured)")
         return ""
 
-    # Run pipeline
+    with tracing.span("asr"):
+        transcription = backend.transcribe(audio_np)
+    print("(Whisper transcription finished.)")
+    return transcription
+
+def transcribe_array(audio_np):
+    """
+    Transcribes a mono float32 array at 16 kHz with the configured ASR backend.
+    Returns: lowercased transcription (str) or empty string on error.
+    """
+    backend = get_asr_backend()
+    with tracing.span("asr"):
+        return backend.transcribe(audio_np)
+
+_streaming = None
+
+def transcribe_streaming(on_partial=None, on_stable=None):
+    """
+    Like transcribe_from_mic, but transcribes segments while the caller is still speaking
+    (see convoflow.io.streaming_asr.StreamingTranscriber).
+
+    Args:
+        on_partial (callable): Called with each partial hypothesis.
+        on_stable (callable): Called at a pause in speech with the transcript so far, once
+                              the partial hypothesis has stopped changing; return True to
+                              accept it as the final transcript immediately.
+    """
+    global _streaming
+    if _streaming is None:
+        from convoflow.io.streaming_asr import StreamingTranscriber
+        _streaming = StreamingTranscriber()
     try:
-        result = pipe(
-            audio_np,
-            generate_kwargs={
-                "language": "english",
-                "forced_decoder_ids": None
-            }
-        )
-        transcription = result["text"]
-        print("(Whisper transcription finished.)")
-        return transcription.strip().lower()
+        return _streaming.listen(on_partial=on_partial, on_stable=on_stable)
     except Exception as e:
-        print(f"Error during Whisper processing: {e}")
-        return "" 
\ No newline at end of file
+        print(f"Error during streaming transcription: {e}")
+        return ""
@@ -1,49 +1,266 @@
-import torch
-from transformers import SpeechT5Processor, SpeechT5ForTextToSpeech, SpeechT5HifiGan
-from datasets import load_dataset
+import os
+import re
+import time
+import queue
+import threading
+import logging
+import numpy as np
 import sounddevice as sd
 
-# Load the models and processor
-print("Loading SpeechT5 TTS model...")
-processor = SpeechT5Processor.from_pretrained("microsoft/speecht5_tts")
-model = SpeechT5ForTextToSpeech.from_pretrained("microsoft/speecht5_tts")
-vocoder = SpeechT5HifiGan.from_pretrained("microsoft/speecht5_hifigan")
-print("SpeechT5 TTS model loaded.")
+from convoflow import tracing
+from convoflow.io.tts_cache import WaveformCache
+from convoflow.paths import cache_dir
 
-# Load speaker embeddings (using a default voice)
-print("Loading speaker embeddings...")
+TTS_MODEL_ID = "microsoft/speecht5_tts"
+VOCODER_MODEL_ID = "microsoft/speecht5_hifigan"
+SPEAKER_DATASET_ID = "Matthijs/cmu-arctic-xvectors"
+# Part of the waveform cache key: bump when the models or synthesis settings change
+MODEL_VERSION = f"{TTS_MODEL_ID}+{VOCODER_MODEL_ID}"
+OUTPUT_SAMPLE_RATE = 16000  # SpeechT5 HiFi-GAN vocoder output rate
+
+# Speak in sentence-sized chunks, synthesizing ahead while the previous chunk plays
+STREAMING = os.getenv("CONVOFLOW_TTS_STREAMING", "0") == "1"
+
+logger = logging.getLogger(__name__)
+
+# Default voice (index into the cmu-arctic-xvectors validation split)
 voice_id = 5400
-embeddings_dataset = load_dataset("Matthijs/cmu-arctic-xvectors", split="validation")
-speaker_embeddings = torch.tensor(embeddings_dataset[voice_id]["xvector"]).unsqueeze(0)
-print("Speaker embeddings loaded.")
 
-def speak_text(text, sample_rate=16000):
+# Models and speaker embedding are loaded on first synthesis (or by warmup()),
+# so importing this module and playing cached prompts stays cheap.
+_tts = None
+_speaker_embeddings = None
+_load_lock = threading.Lock()
+
+# Optional replacement for local synthesis, e.g. a model server client (see configure_synthesizer)
+_synthesizer = None
+
+def configure_synthesizer(synthesize_fn):
+    """
+    Synthesizes uncached text with `synthesize_fn(text) -> float32 waveform` instead of
+    loading SpeechT5 in this process. Pass None to go back to local synthesis.
+    """
+    global _synthesizer
+    _synthesizer = synthesize_fn
+
+def _get_tts():
+    """Returns (processor, model, vocoder), loading them on first call (thread-safe)."""
+    global _tts
+    if _tts is None:
+        with _load_lock:
+            if _tts is None:
+                from transformers import SpeechT5Processor, SpeechT5ForTextToSpeech, SpeechT5HifiGan
+
+                print("Loading SpeechT5 TTS model...")
+                processor = SpeechT5Processor.from_pretrained(TTS_MODEL_ID)
+                model = SpeechT5ForTextToSpeech.from_pretrained(TTS_MODEL_ID)
+                vocoder = SpeechT5HifiGan.from_pretrained(VOCODER_MODEL_ID)
+                print("SpeechT5 TTS model loaded.")
+                _tts = (processor, model, vocoder)
+    return _tts
+
+def _load_xvector():
+    # One 512-float xvector is all we need; keep it locally instead of the whole dataset
+    path = os.path.join(cache_dir("tts"), f"speaker_xvector_{voice_id}.npy")
+    if os.path.exists(path):
+        try:
+            return np.load(path)
+        except (OSError, ValueError, EOFError) as e:
+            logger.warning(f"Could not read cached speaker embedding {path}, fetching it again: {e}")
+
+    from datasets import load_dataset
+
+    print("Loading speaker embeddings...")
+    embeddings_dataset = load_dataset(SPEAKER_DATASET_ID, split="validation")
+    xvector = np.asarray(embeddings_dataset[voice_id]["xvector"], dtype=np.float32)
+    # Write to a temp file and rename it into place, so a concurrent or interrupted
+    # writer never leaves a truncated file for the next process to load
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, xvector)
+        os.replace(tmp_path, path)
+        print(f"Speaker embeddings loaded and saved to {path}.")
+    except OSError as e:
+        logger.warning(f"Could not save speaker embedding to {path}: {e}")
+    return xvector
+
+def get_speaker_embeddings():
+    """Returns the (1, 512) speaker embedding tensor for `voice_id`."""
+    global _speaker_embeddings
+    if _speaker_embeddings is None:
+        with _load_lock:
+            if _speaker_embeddings is None:
+                import torch
+                _speaker_embeddings = torch.from_numpy(_load_xvector()).unsqueeze(0)
+    return _speaker_embeddings
+
+def warmup():
+    """Loads the TTS models and speaker embedding now instead of on the first uncached prompt."""
+    if _synthesizer is not None:
+        return
+    _get_tts()
+    get_speaker_embeddings()
+
+# Synthesized prompts, in memory and on disk ($CONVOFLOW_TTS_CACHE_DIR or <cache root>/tts)
+waveform_cache = WaveformCache(directory=os.getenv("CONVOFLOW_TTS_CACHE_DIR") or cache_dir("tts"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+|\n+")
+_CLAUSE_END = re.compile(r"(?<=[,:])\s+")
+
+def split_sentences(text, max_chars=160):
+    """Splits text into sentence chunks, further splitting long sentences at clause boundaries."""
+    chunks = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            chunks.append(sentence)
+            continue
+        current = ""
+        for clause in _CLAUSE_END.split(sentence):
+            if current and len(current) + len(clause) + 1 > max_chars:
+                chunks.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}".strip()
+        if current:
+            chunks.append(current)
+    return chunks
+
+def synthesize(text, use_cache=True):
+    """Returns the float32 waveform for `text` at OUTPUT_SAMPLE_RATE, from the cache when possible."""
+    key = WaveformCache.make_key(text, voice_id, MODEL_VERSION)
+    if use_cache:
+        waveform = waveform_cache.get(key)
+        if waveform is not None:
+            return waveform
+
+    if _synthesizer is not None:
+        waveform = _synthesizer(text)
+        return waveform_cache.put(key, waveform) if use_cache else waveform
+
+    import torch
+
+    processor, model, vocoder = _get_tts()
+    inputs = processor(text=text, return_tensors="pt")
+    with torch.no_grad():
+        spectrogram = model.generate_speech(inputs["input_ids"], get_speaker_embeddings())
+        speech_waveform = vocoder(spectrogram)
+    waveform = speech_waveform.cpu().numpy()
+    return waveform_cache.put(key, waveform) if use_cache else waveform
+
+def prerender(texts):
+    """Synthesizes every text not already cached. Returns how many were newly rendered."""
+    rendered = 0
+    for text in texts:
+        if not text:
+            continue
+        # Streaming playback looks chunks up individually, so cache those too
+        for unit in ([text] + split_sentences(text) if STREAMING else [text]):
+            key = WaveformCache.make_key(unit, voice_id, MODEL_VERSION)
+            if key in waveform_cache:
+                continue
+            synthesize(unit)
+            rendered += 1
+    return rendered
+
+def _synthesize_chunks(chunks, out_queue, stop_event):
+    try:
+        for chunk in chunks:
+            if stop_event.is_set():
+                return
+            out_queue.put(synthesize(chunk))
+        out_queue.put(None)
+    except Exception as e:
+        out_queue.put(e)
+
+def speak_text_streaming(text):
+    """
+    Speaks `text` chunk by chunk: chunk N+1 is synthesized on a worker thread while
+    chunk N plays through a non-blocking output stream.
+
+    Returns:
+        float: Time-to-first-audio in seconds.
+    """
+    start = time.perf_counter()
+    chunks = split_sentences(text)
+    if not chunks:
+        return 0.0
+
+    # Bounded so the worker stays at most a couple of chunks ahead of playback
+    chunk_queue = queue.Queue(maxsize=2)
+    stop_event = threading.Event()
+    worker = threading.Thread(
+        target=_synthesize_chunks, args=(chunks, chunk_queue, stop_event), name="convoflow-tts-stream", daemon=True
+    )
+    worker.start()
+
+    time_to_first_audio = None
+    try:
+        with sd.OutputStream(samplerate=OUTPUT_SAMPLE_RATE, channels=1, dtype="float32") as stream:
+            while True:
+                waveform = chunk_queue.get()
+                if waveform is None:
+                    break
+                if isinstance(waveform, Exception):
+                    raise waveform
+                if time_to_first_audio is None:
+                    time_to_first_audio = time.perf_counter() - start
+                    logger.info(f"TTS time-to-first-audio: {time_to_first_audio * 1000:.0f} ms ({len(chunks)} chunks)")
+                # Blocks only until the samples are queued on the device, not until they finish playing
+                stream.write(waveform.reshape(-1, 1))
+    finally:
+        stop_event.set()
+        # Unblock the worker if it is waiting on a full queue
+        while worker.is_alive():
+            try:
+                chunk_queue.get_nowait()
+            except queue.Empty:
+                worker.join(timeout=0.05)
+
+    return time_to_first_audio or 0.0
+
+def speak_text(text, sample_rate=16000, stream=None):
     """Synthesizes speech from text using SpeechT5 and plays it.
 
     Args:
         text (str): The text to speak.
         sample_rate (int): The desired sample rate for the audio.
                            Note: SpeechT5 HiFi-GAN vocoder outputs at 16kHz.
+        stream (bool): Play sentence by sentence while synthesizing ahead.
+                       Defaults to $CONVOFLOW_TTS_STREAMING.
+
+    Returns:
+        float: Time-to-first-audio in seconds.
     """
     if not text:
         print("TTS: No text provided to speak.")
-        return
+        return 0.0
+
+    if stream is None:
+        stream = STREAMING
 
     try:
         print(f"TTS: {text}")
-        inputs = processor(text=text, return_tensors="pt")
-
-        with torch.no_grad():
-            spectrogram = model.generate_speech(inputs["input_ids"], speaker_embeddings)
+        if stream:
+            time_to_first_audio = speak_text_streaming(text)
+            tracing.record("tts", time_to_first_audio)
+            print("\n")
+            return time_to_first_audio
 
-            speech_waveform = vocoder(spectrogram)
+        start = time.perf_counter()
+        speech_np = synthesize(text)
+        time_to_first_audio = time.perf_counter() - start
+        logger.info(f"TTS time-to-first-audio: {time_to_first_audio * 1000:.0f} ms")
+        tracing.record("tts", time_to_first_audio)
 
         # Play the audio
-        speech_np = speech_waveform.cpu().numpy()
-        output_sample_rate = 16000 
-        sd.play(speech_np, samplerate=output_sample_rate)
+        sd.play(speech_np, samplerate=OUTPUT_SAMPLE_RATE)
         sd.wait() # Wait until playback is finished
         print("\n")
+        return time_to_first_audio
 
     except Exception as e:
         print(f"Error during TTS synthesis or playback: {e}")
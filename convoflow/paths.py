@@ -0,0 +1,12 @@
+import os
+
+
+def cache_dir(*parts):
+    """
+    Returns (and creates) a directory under the ConvoFlow cache root.
+    The root is $CONVOFLOW_CACHE_DIR, defaulting to ~/.cache/convoflow.
+    """
+    root = os.getenv("CONVOFLOW_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "convoflow")
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,178 @@
+import itertools
+import logging
+import queue
+import socket
+
+from convoflow.io.asr_backends import ASRBackend
+from convoflow.serving.protocol import (
+    ERRORS, ModelServerError, RequestTimeout, decode_audio, default_socket_path, encode_audio, recv_frame, send_frame,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ModelClient:
+    """
+    Thread-safe client for convoflow.serving.server.ModelServer.
+
+    Keeps a small pool of Unix socket connections; each call borrows one, so concurrent
+    sessions in the same process don't serialize on a single connection.
+
+    Args:
+        socket_path (str): Defaults to $CONVOFLOW_MODEL_SERVER or <cache root>/run/models.sock.
+        timeout (float): Default per-request timeout in seconds, enforced by the server.
+        max_idle (int): Idle connections kept open for reuse.
+    """
+
+    # Extra time the socket waits beyond the request timeout for the server's own timeout reply
+    grace = 1.0
+
+    def __init__(self, socket_path=None, timeout=10.0, max_idle=8):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._ids = itertools.count(1)
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise ModelServerError(f"Model server is not reachable at {self.socket_path}: {e}") from e
+        return sock
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _checkin(self, sock):
+        try:
+            self._idle.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+    def call(self, op, args=None, payload=b"", timeout=None):
+        """Sends one request and returns (result, payload). Raises ModelServerError subclasses on failure."""
+        timeout = self.timeout if timeout is None else timeout
+        header = {"id": next(self._ids), "op": op, "args": args or {}, "timeout": timeout}
+        sock = self._checkout()
+        try:
+            sock.settimeout(timeout + self.grace)
+            send_frame(sock, header, payload)
+            frame = recv_frame(sock)
+        except socket.timeout:
+            sock.close()  # A late reply would desynchronize this connection
+            raise RequestTimeout(f"No reply to '{op}' from the model server within {timeout:.1f}s.")
+        except (OSError, ValueError) as e:
+            sock.close()
+            raise ModelServerError(f"Lost connection to the model server: {e}") from e
+        if frame is None:
+            sock.close()
+            raise ModelServerError("Model server closed the connection.")
+        self._checkin(sock)
+
+        reply, reply_payload = frame
+        if not reply.get("ok"):
+            raise ERRORS.get(reply.get("error"), ModelServerError)(reply.get("message"))
+        return reply.get("result"), reply_payload
+
+    def ping(self, timeout=None):
+        """Returns the operations the server offers."""
+        return self.call("ping", timeout=timeout)[0]["operations"]
+
+    def stats(self, timeout=None):
+        """Per-operation queue depth, rejections, timeouts and latency counters."""
+        return self.call("stats", timeout=timeout)[0]
+
+    def classify_batch(self, requests, timeout=None):
+        """Same contract as a router backend's classify_batch: one (labels, scores) per request."""
+        result, _ = self.call(
+            "classify", {"requests": [[user_input, list(labels)] for user_input, labels in requests]}, timeout=timeout
+        )
+        return [(labels, scores) for labels, scores in result]
+
+    def classify(self, user_input, candidate_labels, timeout=None):
+        """Returns (labels, scores) sorted by descending score."""
+        return self.classify_batch([(user_input, candidate_labels)], timeout=timeout)[0]
+
+    def transcribe(self, audio_np, timeout=None):
+        """Transcribes a mono float32 array at 16 kHz."""
+        return self.call("transcribe", payload=encode_audio(audio_np), timeout=timeout)[0]
+
+    def synthesize(self, text, timeout=None):
+        """Returns the float32 waveform for `text` (see convoflow.io.voice_output.synthesize)."""
+        return decode_audio(self.call("synthesize", {"text": text}, timeout=timeout)[1])
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RemoteClassifier:
+    """
+    AIRouter backend that classifies on the model server. The router's lexical and cache
+    tiers still run in-process, so only model-bound turns cross the socket:
+
+        router = AIRouter(backend=RemoteClassifier(ModelClient()))
+
+    When the server is saturated or slow the request fails fast and the turn is treated
+    as not understood, instead of blocking the session.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def classify(self, user_input, candidate_labels):
+        try:
+            return self.client.classify(user_input, candidate_labels)
+        except ModelServerError as e:
+            logger.warning(f"Remote classification failed: {e}")
+            return [], []
+
+    def classify_batch(self, requests):
+        try:
+            return self.client.classify_batch(requests)
+        except ModelServerError as e:
+            logger.warning(f"Remote classification of {len(requests)} requests failed: {e}")
+            return [([], [])] * len(requests)
+
+
+class RemoteASRBackend(ASRBackend):
+    """ASR backend that transcribes on the model server (see convoflow.io.voice_input.configure_asr)."""
+
+    name = "remote"
+
+    def __init__(self, client):
+        self.client = client
+
+    def load(self):
+        if "transcribe" not in self.client.ping():
+            raise ModelServerError(f"Model server at {self.client.socket_path} does not serve 'transcribe'.")
+
+    def transcribe(self, audio_np):
+        if audio_np.size == 0:
+            return ""
+        try:
+            return self.client.transcribe(audio_np)
+        except ModelServerError as e:
+            print(f"Error during remote transcription: {e}")
+            return ""
+
+
+def use_model_server(socket_path=None, timeout=10.0):
+    """
+    Points this process's ASR and TTS at the model server instead of loading local copies.
+    Returns the client, e.g. for AIRouter(backend=RemoteClassifier(client)).
+    """
+    from convoflow.io import voice_input, voice_output
+
+    client = ModelClient(socket_path, timeout=timeout)
+    voice_input.configure_asr(RemoteASRBackend(client))
+    voice_output.configure_synthesizer(client.synthesize)
+    return client
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import socket
+import struct
+
+import numpy as np
+
+from convoflow.paths import cache_dir
+
+# Every message is one frame: header length and payload length (network byte order),
+# a UTF-8 JSON header, then raw payload bytes (little-endian float32 audio, or empty).
+_FRAME = struct.Struct("!II")
+MAX_HEADER_BYTES = 1 << 20
+MAX_PAYLOAD_BYTES = 64 << 20
+
+
+class ModelServerError(RuntimeError):
+    """A model server request failed."""
+
+
+class ServerBusy(ModelServerError):
+    """The server's queue for the requested operation is full; retry later or degrade."""
+
+
+class RequestTimeout(ModelServerError, TimeoutError):
+    """The request did not finish within its timeout."""
+
+
+# Error codes carried in replies, mapped back to exceptions by the client
+ERRORS = {"busy": ServerBusy, "timeout": RequestTimeout, "error": ModelServerError}
+
+
+def default_socket_path():
+    """$CONVOFLOW_MODEL_SERVER, defaulting to models.sock under the cache root."""
+    return os.getenv("CONVOFLOW_MODEL_SERVER") or os.path.join(cache_dir("run"), "models.sock")
+
+
+def remove_stale_socket(path):
+    """
+    Unlinks a Unix socket left behind by a server that is gone, so a new one can bind it.
+    Raises RuntimeError if a server still accepts connections on `path`.
+    """
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)  # Nobody listening: stale
+        return
+    except FileNotFoundError:
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A server is already running on {path}.")
+
+
+def encode_audio(samples):
+    return np.ascontiguousarray(samples, dtype="<f4").reshape(-1).tobytes()
+
+
+def decode_audio(payload):
+    return np.frombuffer(payload, dtype="<f4").astype(np.float32)
+
+
+def _recv_exact(sock, n, eof_ok=False):
+    buffer = bytearray(n)
+    view = memoryview(buffer)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            if received == 0 and eof_ok:
+                return None
+            raise ConnectionError("Connection closed mid-frame.")
+        received += count
+    return bytes(buffer)
+
+
+def send_frame(sock, header, payload=b""):
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(header_bytes), len(payload)) + header_bytes + payload)
+
+
+def recv_frame(sock):
+    """Returns (header, payload), or None if the peer closed the connection between frames."""
+    prefix = _recv_exact(sock, _FRAME.size, eof_ok=True)
+    if prefix is None:
+        return None
+    header_len, payload_len = _FRAME.unpack(prefix)
+    if header_len > MAX_HEADER_BYTES or payload_len > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"Frame too large ({header_len} header / {payload_len} payload bytes).")
+    header = json.loads(_recv_exact(sock, header_len))
+    payload = _recv_exact(sock, payload_len)
+    return header, payload
+
+
+# asyncio stream versions of the above, for servers that multiplex many connections on one loop
+
+def write_frame(writer, header, payload=b""):
+    """Queues one frame on an asyncio StreamWriter; await writer.drain() to apply backpressure."""
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    writer.write(_FRAME.pack(len(header_bytes), len(payload)) + header_bytes + payload)
+
+
+async def read_frame(reader):
+    """Returns (header, payload) from an asyncio StreamReader, or None at a clean end of stream."""
+    try:
+        prefix = await reader.readexactly(_FRAME.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ConnectionError("Connection closed mid-frame.") from e
+    header_len, payload_len = _FRAME.unpack(prefix)
+    if header_len > MAX_HEADER_BYTES or payload_len > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"Frame too large ({header_len} header / {payload_len} payload bytes).")
+    try:
+        header = json.loads(await reader.readexactly(header_len))
+        payload = await reader.readexactly(payload_len)
+    except asyncio.IncompleteReadError as e:
+        raise ConnectionError("Connection closed mid-frame.") from e
+    return header, payload
@@ -0,0 +1,349 @@
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from convoflow.serving.protocol import (
+    RequestTimeout, ServerBusy, decode_audio, default_socket_path, encode_audio,
+    recv_frame, remove_stale_socket, send_frame,
+)
+
+logger = logging.getLogger(__name__)
+
+_SHUTDOWN = object()
+OPERATIONS = ("classify", "transcribe", "synthesize")
+
+
+class _Job:
+    __slots__ = ("args", "payload", "deadline", "enqueued_at", "future")
+
+    def __init__(self, args, payload, timeout):
+        self.args = args
+        self.payload = payload
+        self.enqueued_at = time.monotonic()
+        self.deadline = self.enqueued_at + timeout
+        self.future = Future()
+
+
+class OperationQueue:
+    """
+    Bounded request queue and worker threads for one model operation.
+
+    `handler(jobs)` receives up to `max_batch_size` queued jobs and returns one
+    (result, payload) per job. A full queue rejects new requests immediately (ServerBusy)
+    instead of letting latency grow without bound, and jobs whose deadline passed while
+    they waited are dropped without running the model.
+    """
+
+    def __init__(self, name, handler, max_queue=64, workers=1, max_batch_size=1):
+        self.name = name
+        self.handler = handler
+        self.max_queue = max_queue
+        self.max_batch_size = max_batch_size
+
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0  # Queue full
+        self.timed_out = 0  # Deadline passed while waiting or running; the caller got a timeout
+        self.expired = 0    # ...of which were still queued, so the model never ran them
+        self.failed = 0
+        self.batches = 0
+        self.max_depth = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        self._lock = threading.Lock()
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._workers = [
+            threading.Thread(target=self._run, name=f"convoflow-serve-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, args, payload, timeout):
+        """Queues a request; the returned job's future resolves to (result, payload). Raises ServerBusy when full."""
+        job = _Job(args, payload, timeout)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise ServerBusy(f"'{self.name}' queue is full ({self.max_queue} requests waiting).")
+        with self._lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return job
+
+    def record_timeout(self):
+        with self._lock:
+            self.timed_out += 1
+
+    def _collect(self, first):
+        batch = [first]
+        while len(batch) < self.max_batch_size:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _SHUTDOWN:
+                self._queue.put(_SHUTDOWN)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _SHUTDOWN:
+                return
+            batch = self._collect(first)
+
+            now = time.monotonic()
+            runnable = []
+            for job in batch:
+                # Cancelled means the caller already timed out
+                cancelled = not job.future.set_running_or_notify_cancel()
+                if cancelled or now > job.deadline:
+                    if not cancelled:
+                        job.future.set_exception(RequestTimeout(f"'{self.name}' request expired in the queue."))
+                    with self._lock:
+                        self.expired += 1
+                    continue
+                runnable.append(job)
+            if not runnable:
+                continue
+
+            started = time.monotonic()
+            try:
+                outputs = self.handler(runnable)
+            except Exception as e:
+                logger.error(f"'{self.name}' batch of {len(runnable)} failed: {e}", exc_info=True)
+                with self._lock:
+                    self.failed += len(runnable)
+                for job in runnable:
+                    job.future.set_exception(e)
+                continue
+
+            finished = time.monotonic()
+            with self._lock:
+                self.batches += 1
+                self.completed += len(runnable)
+                self._wait_total += sum(started - job.enqueued_at for job in runnable)
+                self._run_total += (finished - started) * len(runnable)
+            for job, output in zip(runnable, outputs):
+                job.future.set_result(output)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "capacity": self.max_queue,
+                "workers": len(self._workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "timed_out": self.timed_out,
+                "failed": self.failed,
+                "mean_batch_size": self.completed / self.batches if self.batches else 0.0,
+                "mean_queue_ms": self._wait_total / self.completed * 1000 if self.completed else 0.0,
+                "mean_run_ms": self._run_total / self.completed * 1000 if self.completed else 0.0,
+            }
+
+    def close(self):
+        """Stops the workers after the jobs already queued have run."""
+        for _ in self._workers:
+            self._queue.put(_SHUTDOWN)
+        for worker in self._workers:
+            worker.join()
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    # One thread per client connection; each connection carries one request at a time
+    def handle(self):
+        model_server = self.server.model_server
+        while True:
+            try:
+                frame = recv_frame(self.request)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Dropping model server connection: {e}")
+                return
+            if frame is None:
+                return
+            header, payload = frame
+            reply, reply_payload = model_server.handle_request(header, payload)
+            try:
+                send_frame(self.request, reply, reply_payload)
+            except OSError as e:
+                logger.warning(f"Could not reply to model server client: {e}")
+                return
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class ModelServer:
+    """
+    Loads the routing, ASR and TTS models once and serves them to many session processes
+    over a Unix socket (see convoflow.serving.client.ModelClient).
+
+    Each operation has its own bounded queue and worker threads, so a burst of
+    transcriptions can't starve routing. Routing requests are batched across clients into
+    one forward pass when the backend supports classify_batch. Model inference releases the
+    GIL, so worker threads in this one process share a single copy of each model.
+
+    Args:
+        socket_path (str): Defaults to $CONVOFLOW_MODEL_SERVER or <cache root>/run/models.sock.
+        operations (iterable): Which of 'classify', 'transcribe', 'synthesize' to serve.
+        router_backend, router_model: As for AIRouter(backend=..., model_name=...).
+        asr_backend (str): ASR preset or Whisper model id. Defaults to $CONVOFLOW_ASR_BACKEND.
+        max_queue (int): Requests allowed to wait per operation before new ones are rejected.
+        workers (dict): Worker threads per operation, e.g. {"transcribe": 2}. Default 1 each.
+        max_batch_size (int): Most routing requests combined into one forward pass.
+        default_timeout (float): Seconds a request may take when the client sets no timeout.
+    """
+
+    def __init__(self, socket_path=None, operations=OPERATIONS, router_backend="zero-shot", router_model=None,
+                 asr_backend=None, max_queue=64, workers=None, max_batch_size=16, default_timeout=10.0):
+        unknown = set(operations) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unknown operations {sorted(unknown)}. Expected a subset of {list(OPERATIONS)}.")
+        self.socket_path = socket_path or default_socket_path()
+        self.operations = tuple(operations)
+        self.router_backend = router_backend
+        self.router_model = router_model
+        self.asr_backend = asr_backend
+        self.max_queue = max_queue
+        self.workers = workers or {}
+        self.max_batch_size = max_batch_size
+        self.default_timeout = default_timeout
+
+        self.queues = {}
+        self._classifier = None
+        self._asr = None
+        self._synthesize = None
+        self._server = None
+        self.started_at = None
+
+    def load(self):
+        """Loads every served model and starts the operation queues."""
+        if "classify" in self.operations:
+            from convoflow.ai.ai_interface import AIRouter
+            # Only the backend is served; clients keep their own lexical and cache tiers
+            self._classifier = AIRouter(self.router_model, backend=self.router_backend, cache_size=0,
+                                        lexical_threshold=None).backend
+            self._add_queue("classify", self._run_classify, max_batch_size=self.max_batch_size)
+        if "transcribe" in self.operations:
+            from convoflow.io.asr_backends import LazyBackend
+            spec = self.asr_backend
+            if spec is None:
+                from convoflow.io.voice_input import ASR_BACKEND
+                spec = ASR_BACKEND
+            self._asr = LazyBackend(spec).get()
+            self._add_queue("transcribe", self._run_transcribe)
+        if "synthesize" in self.operations:
+            from convoflow.io import voice_output
+            voice_output.warmup()
+            self._synthesize = voice_output.synthesize
+            self._add_queue("synthesize", self._run_synthesize)
+
+    def _add_queue(self, name, handler, max_batch_size=1):
+        self.queues[name] = OperationQueue(
+            name, handler, max_queue=self.max_queue, workers=self.workers.get(name, 1), max_batch_size=max_batch_size
+        )
+
+    def _run_classify(self, jobs):
+        # Each job carries a list of (user_input, labels) requests; run them all as one batch
+        requests = [(user_input, labels) for job in jobs for user_input, labels in job.args["requests"]]
+        classify_batch = getattr(self._classifier, "classify_batch", None)
+        if classify_batch is not None:
+            outputs = classify_batch(requests)
+        else:
+            outputs = [self._classifier.classify(user_input, labels) for user_input, labels in requests]
+
+        results, start = [], 0
+        for job in jobs:
+            end = start + len(job.args["requests"])
+            results.append(([[list(labels), [float(s) for s in scores]] for labels, scores in outputs[start:end]], b""))
+            start = end
+        return results
+
+    def _run_transcribe(self, jobs):
+        return [(self._asr.transcribe(decode_audio(job.payload)), b"") for job in jobs]
+
+    def _run_synthesize(self, jobs):
+        return [(None, encode_audio(self._synthesize(job.args["text"]))) for job in jobs]
+
+    def handle_request(self, header, payload):
+        """Runs one decoded request; returns the (reply header, reply payload) to send back."""
+        request_id = header.get("id")
+        op = header.get("op")
+
+        if op == "ping":
+            return {"id": request_id, "ok": True, "result": {"operations": list(self.queues)}}, b""
+        if op == "stats":
+            return {"id": request_id, "ok": True, "result": self.stats()}, b""
+
+        op_queue = self.queues.get(op)
+        if op_queue is None:
+            return self._error(request_id, "error", f"Operation '{op}' is not served here."), b""
+
+        timeout = header.get("timeout") or self.default_timeout
+        try:
+            job = op_queue.submit(header.get("args") or {}, payload, timeout)
+        except ServerBusy as e:
+            return self._error(request_id, "busy", str(e)), b""
+
+        try:
+            result, reply_payload = job.future.result(timeout=max(0.0, job.deadline - time.monotonic()))
+        except RequestTimeout as e:
+            op_queue.record_timeout()
+            return self._error(request_id, "timeout", str(e)), b""
+        except FutureTimeout:
+            job.future.cancel()  # Skipped by the worker if it hasn't started yet
+            op_queue.record_timeout()
+            return self._error(request_id, "timeout", f"'{op}' did not finish within {timeout:.1f}s."), b""
+        except Exception as e:
+            return self._error(request_id, "error", f"{type(e).__name__}: {e}"), b""
+        return {"id": request_id, "ok": True, "result": result}, reply_payload
+
+    @staticmethod
+    def _error(request_id, code, message):
+        return {"id": request_id, "ok": False, "error": code, "message": message}
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "uptime_s": time.monotonic() - self.started_at if self.started_at else 0.0,
+            "queues": {name: op_queue.stats() for name, op_queue in self.queues.items()},
+        }
+
+    def serve_forever(self):
+        """Loads the models, binds the socket and serves until shutdown() is called."""
+        # Before loading, so a second server fails fast instead of taking over a live socket
+        remove_stale_socket(self.socket_path)
+        if not self.queues:
+            self.load()
+        self._server = _UnixServer(self.socket_path, _ConnectionHandler)
+        self._server.model_server = self
+        self.started_at = time.monotonic()
+        logger.info(f"Model server serving {list(self.queues)} on {self.socket_path} (pid {os.getpid()})")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        """Stops accepting requests and drains the queues. Call from a thread other than serve_forever()'s."""
+        if self._server is not None:
+            self._server.shutdown()
+        for op_queue in self.queues.values():
+            op_queue.close()
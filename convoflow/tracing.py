@@ -0,0 +1,318 @@
+import os
+import time
+import pstats
+import cProfile
+import logging
+import functools
+import threading
+import contextvars
+
+from convoflow.paths import cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to turn every span into a no-op
+ENABLED = os.getenv("CONVOFLOW_TRACING", "1") == "1"
+# Profile every session: "cprofile" or "torch" (see ProfileCapture). Empty disables it.
+PROFILE_SESSIONS = os.getenv("CONVOFLOW_PROFILE_SESSIONS", "")
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram: log-linear buckets over integer microseconds, each power
+    of two split into 2**significant_bits sub-buckets, so every recorded value is kept to
+    within ~1/2**(significant_bits - 1) relative error in fixed memory. Recording is O(1).
+    """
+
+    def __init__(self, significant_bits=7, max_value_s=3600.0):
+        self._bits = significant_bits
+        self._sub = 1 << significant_bits
+        self._max_us = int(max_value_s * 1_000_000)
+        self._counts = [0] * ((max(self._max_us.bit_length() - significant_bits, 0) + 1) * self._sub)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _index(self, value_us):
+        shift = max(value_us.bit_length() - self._bits, 0)
+        return (shift << self._bits) + (value_us >> shift)
+
+    def _value_at(self, index):
+        # Midpoint of the bucket's value range
+        shift, sub = divmod(index, self._sub)
+        return ((sub << shift) + ((1 << shift) - 1) / 2) if shift else sub
+
+    def record(self, seconds):
+        value_us = min(max(int(seconds * 1_000_000), 0), self._max_us)
+        index = self._index(value_us)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_us += value_us
+            self.max_us = max(self.max_us, value_us)
+            self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+
+    def merge(self, other):
+        with self._lock:
+            for i, n in enumerate(other._counts):
+                if n:
+                    self._counts[i] += n
+            self.count += other.count
+            self.total_us += other.total_us
+            self.max_us = max(self.max_us, other.max_us)
+            if other.min_us is not None:
+                self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+
+    def percentile(self, p):
+        """Value at percentile `p` (0-100), in milliseconds."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = max(1, -(-self.count * p // 100))  # ceil without floats
+            seen = 0
+            for index, n in enumerate(self._counts):
+                seen += n
+                if seen >= target:
+                    return min(self._value_at(index), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def snapshot(self, percentiles=(50, 90, 95, 99)):
+        """Count, mean, max and percentiles in milliseconds."""
+        result = {
+            "count": self.count,
+            "mean_ms": self.total_us / self.count / 1000.0 if self.count else 0.0,
+            "max_ms": self.max_us / 1000.0,
+        }
+        for p in percentiles:
+            result[f"p{p:g}_ms"] = self.percentile(p)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self.count = self.total_us = self.max_us = 0
+            self.min_us = None
+
+
+# Stage -> milliseconds for the turn being handled in this context (see turn())
+_current_turn = contextvars.ContextVar("convoflow_turn", default=None)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    Times named pipeline stages ('asr', 'route', 'graph', 'tts', 'metrics', ...) into one
+    histogram per stage, and adds each span to the current turn's timings if one is open.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        self.histogram(name).record(seconds)
+        timings = _current_turn.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds * 1000.0
+
+    def span(self, name):
+        """`with tracer.span('route'): ...` records the block's wall time under 'route'."""
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def traced(self, name):
+        """Decorator form of span()."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """{stage: {count, mean_ms, max_ms, p50_ms, p90_ms, p95_ms, p99_ms}}"""
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {name: histogram.snapshot() for name, histogram in sorted(histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+# Process-wide tracer used by the instrumented modules
+tracer = Tracer(enabled=ENABLED)
+span = tracer.span
+traced = tracer.traced
+record = tracer.record
+stats = tracer.stats
+
+
+class turn:
+    """
+    Collects the spans recorded in this context (and in work handed off with in_context)
+    into a {stage: ms} dict, e.g. to persist alongside the turn's routes row:
+
+        with tracing.turn() as timings:
+            ...
+        session_logger.log_step(..., timings=timings)
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_turn.set(self.timings)
+        return self.timings
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_turn.reset(self._token)
+        return False
+
+
+class ProfileCapture:
+    """
+    Profiles the blocking calls of one session. Each call handed off with in_context while
+    the capture is active (see profiling()) runs under its own profiler on whichever
+    executor thread picks it up, and the results are merged per session.
+
+    Modes:
+        cprofile: Accumulates cProfile stats; dump() writes a .prof file for pstats/snakeviz.
+        torch:    Wraps each call in torch.profiler and writes one Chrome trace per call,
+                  to see operator-level time inside the ASR, routing and TTS models.
+    """
+
+    MODES = ("cprofile", "torch")
+
+    def __init__(self, session_id, mode="cprofile", output_dir=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Available: {self.MODES}")
+        self.session_id = session_id
+        self.mode = mode
+        self.output_dir = output_dir or cache_dir("profiles")
+        self.calls = 0
+        self._stats = None
+        self._lock = threading.Lock()
+
+    def runcall(self, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call_index = self.calls
+        if self.mode == "torch":
+            return self._run_torch(call_index, fn, *args, **kwargs)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler already owns this thread (Python 3.12+ allows one at a time)
+            logger.debug(f"Profiler busy; {getattr(fn, '__name__', fn)} runs unprofiled")
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+
+    def _run_torch(self, call_index, fn, *args, **kwargs):
+        import torch
+
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        with torch.profiler.profile(activities=activities, record_shapes=True) as prof:
+            result = fn(*args, **kwargs)
+        name = getattr(fn, "__name__", "call")
+        prof.export_chrome_trace(os.path.join(self.output_dir, f"{self.session_id}-{call_index:04d}-{name}.json"))
+        return result
+
+    def dump(self):
+        """Writes the session's cProfile stats; returns the file path (None if nothing was captured)."""
+        if self.mode == "torch":
+            logger.info(f"Wrote {self.calls} torch traces for session {self.session_id} to {self.output_dir}")
+            return self.output_dir if self.calls else None
+        with self._lock:
+            if self._stats is None:
+                return None
+            path = os.path.join(self.output_dir, f"{self.session_id}.prof")
+            self._stats.dump_stats(path)
+        logger.info(f"Wrote profile for session {self.session_id} to {path}")
+        return path
+
+
+_current_profile = contextvars.ContextVar("convoflow_profile", default=None)
+
+
+class profiling:
+    """Activates a ProfileCapture for the calls made from this context (None: no-op)."""
+
+    def __init__(self, capture):
+        self.capture = capture
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_profile.set(self.capture)
+        return self.capture
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_profile.reset(self._token)
+        return False
+
+
+def in_context(fn, *args, **kwargs):
+    """
+    Binds a call to a copy of the current context, so spans it records on an executor
+    thread still count towards the caller's turn, and it is profiled if the caller's
+    session is:
+
+        await loop.run_in_executor(executor, in_context(fn, arg))
+    """
+    capture = _current_profile.get()
+    if capture is not None:
+        fn, args = capture.runcall, (fn,) + args
+    return functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -13,17 +13,35 @@ log_format = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
 logging.basicConfig(level=logging.INFO, format=log_format)
 # logger = logging.getLogger(__name__) # Optional: Get logger for this script if needed
 
+from convoflow import tracing
 from convoflow.core.cli_runner import CLIRunner
 from convoflow.ai.ai_interface import AIRouter
 from convoflow.data.graph_store import GraphStore
+from convoflow.data.compiled_store import CompiledGraphStore
 
 if __name__ == "__main__":
     try:
-        graph_store = GraphStore()
+        if os.getenv("CONVOFLOW_GRAPH_FILE"):
+            # Memory-mapped compiled graph (scripts/compile_graph.py); no Neo4j needed
+            graph_store = CompiledGraphStore(os.getenv("CONVOFLOW_GRAPH_FILE"))
+        else:
+            graph_store = GraphStore()
 
-        router = AIRouter()
+        backend = os.getenv("CONVOFLOW_ROUTER_BACKEND", "zero-shot")
+        if os.getenv("CONVOFLOW_MODEL_SERVER"):
+            # Classify on the shared model server (scripts/model_server.py) instead of loading BART here
+            from convoflow.serving.client import ModelClient, RemoteClassifier
+            backend = RemoteClassifier(ModelClient(os.getenv("CONVOFLOW_MODEL_SERVER")))
+
+        router = AIRouter(
+            backend=backend,
+            cache_path=os.getenv("CONVOFLOW_ROUTE_CACHE_PATH") or None,
+        )
+        router.warm(graph_store)
 
         CLIRunner(graph_store, router).run()
+        logging.info(f"Routing stats: {router.stats()}")
+        logging.info(f"Stage latencies: {tracing.stats()}")
 
     except Exception as e:
         print(f"\nAn error occurred: {e}")
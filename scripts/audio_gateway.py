@@ -0,0 +1,122 @@
+# scripts/audio_gateway.py
+# Serves phone calls over the network: a PBX / SIP media bridge (or scripts/fake_pbx.py)
+# opens one connection per call and streams 8 kHz μ-law or PCM audio; each call runs as a
+# ConversationEngine session, with prompts streamed back in the call's encoding.
+#   python scripts/audio_gateway.py --listen 0.0.0.0:7010
+#   python scripts/audio_gateway.py --listen /tmp/convoflow-gateway.sock --model-server /tmp/models.sock
+#   python scripts/audio_gateway.py --models stub --metrics null   # offline, for fake_pbx.py runs
+import sys
+import os
+import json
+import time
+import random
+import signal
+import asyncio
+import argparse
+import logging
+from dotenv import load_dotenv
+
+# Add the project root for convoflow imports (this directory is already on the path, for
+# the stubs shared with the benchmark scripts)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+load_dotenv(os.path.join(project_root, '.env'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+from convoflow import tracing
+from convoflow.core.engine import ConversationEngine
+from convoflow.core.gateway import DEFAULT_ADDRESS, MAX_CALLS, AudioGateway
+from convoflow.data.memory_store import InMemoryGraphStore
+from benchmark_calls import DEFAULT_UTTERANCES, StubTTS, TracedStubRouter
+from load_test_engine import DEFAULT_FLOW, NullSessionLogger
+
+
+class RandomUtteranceASR:
+    """Stub ASR: any utterance transcribes to a random labelled answer, after `latency_ms`."""
+
+    def __init__(self, utterances_path, latency_ms=0.0, seed=0):
+        self.latency = latency_ms / 1000.0
+        with open(utterances_path, 'r', encoding='utf-8') as f:
+            self.texts = [u["text"] for u in json.load(f)]
+        self.rng = random.Random(seed)
+
+    def transcribe(self, audio_np):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.rng.choice(self.texts)
+
+
+def build_models(args):
+    """Returns (router, asr, synthesize); asr/synthesize None means the process-wide models."""
+    if args.models == "stub":
+        return (TracedStubRouter(args.router_latency_ms),
+                RandomUtteranceASR(args.utterances, args.asr_latency_ms, args.seed),
+                StubTTS(args.tts_latency_ms).synthesize)
+
+    from convoflow.ai.ai_interface import AIRouter
+    from convoflow.io import voice_input, voice_output
+    if args.model_server:
+        # Share one copy of each model with other processes (scripts/model_server.py)
+        from convoflow.serving.client import RemoteClassifier, use_model_server
+        router = AIRouter(backend=RemoteClassifier(use_model_server(args.model_server)))
+    else:
+        router = AIRouter(backend=args.router_backend)
+        voice_input.warmup()
+        voice_output.warmup()
+    return router, None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve concurrent phone calls streamed over TCP or a Unix socket.")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="host:port, or a Unix socket path (default: $CONVOFLOW_GATEWAY_ADDRESS).")
+    parser.add_argument("--max-calls", type=int, default=MAX_CALLS, help="Concurrent calls before refusing new ones.")
+    parser.add_argument("--flow", default=DEFAULT_FLOW, help="Flow file to load into an in-memory graph.")
+    parser.add_argument("--graph-file", help="Use a compiled graph file (scripts/compile_graph.py) instead of --flow.")
+    parser.add_argument("--neo4j", action="store_true", help="Read the graph from Neo4j (GraphStore) instead of --flow.")
+    parser.add_argument("--models", choices=["stub", "real"], default="real", help="Stub models, or load the configured ones.")
+    parser.add_argument("--model-server", default=os.getenv("CONVOFLOW_MODEL_SERVER"), help="Use the shared model server at this socket.")
+    parser.add_argument("--router-backend", default=os.getenv("CONVOFLOW_ROUTER_BACKEND", "zero-shot"))
+    parser.add_argument("--utterances", default=DEFAULT_UTTERANCES, help="Answers the stub ASR transcribes to.")
+    parser.add_argument("--router-latency-ms", type=float, default=40.0, help="Stub router latency.")
+    parser.add_argument("--asr-latency-ms", type=float, default=250.0, help="Stub ASR latency.")
+    parser.add_argument("--tts-latency-ms", type=float, default=120.0, help="Stub TTS latency.")
+    parser.add_argument("--metrics", choices=["null", "postgres"], default="postgres", help="Where sessions log their turns.")
+    parser.add_argument("--workers", type=int, default=32, help="Engine executor threads.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.neo4j:
+        from convoflow.data.graph_store import GraphStore
+        graph = GraphStore()
+    elif args.graph_file:
+        from convoflow.data.compiled_store import CompiledGraphStore
+        graph = CompiledGraphStore(args.graph_file)
+    else:
+        graph = InMemoryGraphStore.from_flow(args.flow)
+
+    router, asr, synthesize = build_models(args)
+    engine = ConversationEngine(graph, router, logger_factory=NullSessionLogger if args.metrics == "null" else None,
+                                max_workers=args.workers, offload_graph_reads=args.neo4j)
+    gateway = AudioGateway(engine, asr=asr, synthesize=synthesize, max_calls=args.max_calls)
+
+    async def serve():
+        server = await gateway.start(args.listen)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        async with server:
+            await stop.wait()
+
+    try:
+        asyncio.run(serve())
+    finally:
+        engine.shutdown()
+        graph.close()
+        logging.info(f"Gateway stats: {gateway.stats()}")
+        logging.info(f"Stage latencies: {tracing.stats()}")
+
+
+if __name__ == "__main__":
+    main()
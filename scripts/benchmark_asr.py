@@ -0,0 +1,121 @@
+# scripts/benchmark_asr.py
+# Compares ASR backends on a local set of recorded IVR utterances.
+#
+# The data directory holds 16-bit PCM .wav files plus a transcripts.tsv with one
+# "<file name>\t<reference transcript>" line per recording, e.g.:
+#
+#   billing_01.wav	i have a question about my bill
+#
+# For each backend it reports the real-time factor (decode time / audio duration,
+# lower is faster) and the word error rate against the references.
+import sys
+import os
+import json
+import time
+import wave
+import argparse
+import logging
+import re
+
+import numpy as np
+
+# Add the project root for convoflow imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from convoflow.io.asr_backends import PRESETS, create_backend
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SAMPLE_RATE = 16000
+
+
+def read_wav(path):
+    """Reads a 16-bit PCM wav as mono float32 at 16 kHz."""
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM wav files are supported")
+        rate, channels = wf.getframerate(), wf.getnchannels()
+        audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(audio) * SAMPLE_RATE / rate) * rate / SAMPLE_RATE
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def normalize(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level Levenshtein distance."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_dataset(data_dir):
+    samples = []
+    with open(os.path.join(data_dir, "transcripts.tsv"), 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            name, reference = line.rstrip("\n").split("\t", 1)
+            samples.append((name, read_wav(os.path.join(data_dir, name)), reference))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report real-time factor and WER per ASR backend.")
+    parser.add_argument("--data", required=True, help="Directory with .wav files and transcripts.tsv.")
+    parser.add_argument("--backends", nargs="+", default=["large-v3", "distil-small.en", "base.en", "base.en-int8"],
+                        help=f"Presets ({', '.join(sorted(PRESETS))}) or Whisper model ids.")
+    parser.add_argument("--json", dest="json_out", help="Also write results to this JSON file.")
+    args = parser.parse_args()
+
+    samples = load_dataset(args.data)
+    audio_s = sum(len(audio) for _, audio, _ in samples) / SAMPLE_RATE
+    print(f"Loaded {len(samples)} utterances ({audio_s:.1f}s of audio)")
+
+    results = {}
+    for spec in args.backends:
+        backend = create_backend(spec)
+        load_start = time.perf_counter()
+        backend.load()
+        load_s = time.perf_counter() - load_start
+        backend.transcribe(samples[0][1])  # Untimed warm-up pass
+
+        errors = words = 0
+        decode_s = 0.0
+        for name, audio, reference in samples:
+            start = time.perf_counter()
+            hypothesis = backend.transcribe(audio)
+            decode_s += time.perf_counter() - start
+            e, n = word_errors(reference, hypothesis)
+            errors += e
+            words += n
+        results[spec] = {"load_s": load_s, "rtf": decode_s / audio_s, "wer": errors / max(words, 1)}
+        del backend
+
+    print("\n" + "=" * 52)
+    print(f"{'backend':<24}{'load (s)':>10}{'RTF':>8}{'WER':>10}")
+    print("-" * 52)
+    for spec, r in results.items():
+        print(f"{spec:<24}{r['load_s']:>10.1f}{r['rtf']:>8.3f}{r['wer']:>10.1%}")
+    print("=" * 52)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
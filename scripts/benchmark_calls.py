@@ -0,0 +1,325 @@
+# scripts/benchmark_calls.py
+# End-to-end call-flow benchmark: ramps up concurrent ConversationEngine sessions driven by
+# scripted callers and reports throughput and p50/p95/p99 latency per pipeline stage
+# (convoflow.tracing) at each concurrency level, as JSON.
+#
+# Callers speak labelled utterances (default: the example flow's), replay --script
+# transcripts, or, with --audio, send recorded clips through ASR and get every prompt back
+# through TTS (the voice path). The recordings directory uses the scripts/benchmark_asr.py
+# layout: 16-bit PCM .wav files plus transcripts.tsv.
+#
+# By default every model is a deterministic stub that only sleeps for its configured
+# latency, and the graph is loaded from a flow file with no metrics database, so the numbers
+# isolate framework overhead and it runs offline. --models real / --model-server, --neo4j
+# and --metrics postgres swap the real components back in.
+#   python scripts/benchmark_calls.py --concurrency 1 10 50 100 200 --json results.json
+#   python scripts/benchmark_calls.py --audio data/ivr_clips --asr-latency-ms 250 --tts-latency-ms 120 --slo-p95-ms 800
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import platform
+
+import numpy as np
+
+# Add the project root for convoflow imports (this directory is already on the path, for
+# the stubs and dataset loader shared with the other benchmark scripts)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from convoflow import tracing
+from convoflow.ai.lexical import LexicalMatcher
+from convoflow.core.engine import ConversationEngine, Transport
+from convoflow.data.memory_store import InMemoryGraphStore
+from benchmark_asr import SAMPLE_RATE, load_dataset
+from load_test_engine import DEFAULT_FLOW, NullSessionLogger, StubRouter
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_UTTERANCES = os.path.join(project_root, "examples", "flows", "coolcompany_utterances.json")
+# Caller-perceived latency: from the end of the caller's answer to the next prompt being ready to play
+RESPONSE_STAGE = "response"
+
+
+class TracedStubRouter(StubRouter):
+    @tracing.traced("route")
+    def choose_route(self, user_input, candidate_labels):
+        return super().choose_route(user_input, candidate_labels)
+
+
+class StubASR:
+    """Returns each recording's reference transcript after `latency_ms`."""
+
+    def __init__(self, samples, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.transcripts = {id(audio): reference for _, audio, reference in samples}
+
+    def transcribe(self, audio_np):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.transcripts.get(id(audio_np), "")
+
+
+class StubTTS:
+    """Returns silence as long as the text would take to speak, after `latency_ms`."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+
+    def synthesize(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return np.zeros(len(text) * SAMPLE_RATE // 15, dtype=np.float32)  # ~15 characters per second
+
+
+class BenchmarkCaller(Transport):
+    """
+    Scripted caller. Picks what to say next with `choose(options, node_id, turn)` after
+    `think_time`, and hangs up after `max_turns` answers or when the choice is None.
+    With `asr`, the choice is a recording that is transcribed first; with `tts`, every
+    prompt is synthesized before the caller hears it.
+    """
+
+    def __init__(self, offload, choose, rng, think_time, max_turns, asr=None, tts=None):
+        self.offload = offload
+        self.choose = choose
+        self.rng = rng
+        self.think_time = think_time
+        self.max_turns = max_turns
+        self.asr = asr
+        self.tts = tts
+        self.turns = 0
+        self.node_id = None
+        self._answered_at = None
+
+    def _synthesize(self, text):
+        with tracing.span("tts"):
+            return self.tts.synthesize(text)
+
+    def _transcribe(self, audio):
+        with tracing.span("asr"):
+            return self.asr.transcribe(audio)
+
+    async def say(self, text, kind="prompt", node_id=None):
+        if node_id is not None:
+            self.node_id = node_id
+        if self.tts is not None and text:
+            await self.offload(self._synthesize, text)
+        if self._answered_at is not None:
+            tracing.record(RESPONSE_STAGE, time.perf_counter() - self._answered_at)
+            self._answered_at = None
+
+    async def listen(self, options):
+        if self.turns >= self.max_turns:
+            return None
+        if self.think_time:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+        answer = self.choose(options, self.node_id, self.turns)
+        if answer is None:
+            return None
+        self.turns += 1
+        self._answered_at = time.perf_counter()
+        if self.asr is not None:
+            return await self.offload(self._transcribe, answer)
+        return answer
+
+
+def utterance_chooser(utterances, rng, back_rate):
+    """Labelled utterances for the current node, else an option name; sometimes 'go back'."""
+    by_node = {}
+    for item in utterances:
+        by_node.setdefault(item['node'], []).append(item['text'])
+
+    def choose(options, node_id, turn):
+        if turn and rng.random() < back_rate:
+            return "go back"
+        texts = by_node.get(node_id)
+        return rng.choice(texts) if texts else rng.choice(options).replace("_", " ")
+    return choose
+
+
+def script_chooser(script):
+    """Replays one scripted transcript, then hangs up."""
+    def choose(options, node_id, turn):
+        return script[turn] if turn < len(script) else None
+    return choose
+
+
+def recording_chooser(samples, rng, matcher):
+    """A recording whose transcript matches one of the options, else any recording."""
+    def choose(options, node_id, turn):
+        matching = [audio for _, audio, reference in samples if matcher.match(reference, options)[0]]
+        return rng.choice(matching or [audio for _, audio, _ in samples])
+    return choose
+
+
+async def run_level(engine, make_caller, concurrency):
+    tracing.tracer.reset()
+    callers = [make_caller(i) for i in range(concurrency)]
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    outcomes = await asyncio.gather(*(engine.run_session(caller) for caller in callers), return_exceptions=True)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    errors = [o for o in outcomes if isinstance(o, BaseException)]
+    for error in errors[:3]:
+        logging.error(f"Session failed: {error!r}")
+    turns = sum(c.turns for c in callers)
+    return {
+        "concurrency": concurrency,
+        "sessions": concurrency,
+        "failed_sessions": len(errors),
+        "turns": turns,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "turns_per_s": turns / wall if wall else 0.0,
+        "sessions_per_s": (concurrency - len(errors)) / wall if wall else 0.0,
+        "cpu_ms_per_turn": cpu / max(turns, 1) * 1000,
+        "stages": tracing.stats(),
+    }
+
+
+def build_components(args, samples):
+    """Returns (router, asr, tts) for the chosen model mode."""
+    if args.model_server:
+        from convoflow.ai.ai_interface import AIRouter
+        from convoflow.serving.client import ModelClient, RemoteASRBackend, RemoteClassifier
+        client = ModelClient(args.model_server)
+        client.ping()
+        return AIRouter(backend=RemoteClassifier(client)), RemoteASRBackend(client), client
+    if args.models == "real":
+        from convoflow.ai.ai_interface import AIRouter
+        from convoflow.io.asr_backends import create_backend
+        router = AIRouter(backend=args.router_backend)
+        asr = tts = None
+        if samples:
+            asr = create_backend(args.asr_backend)
+            asr.load()
+            from convoflow.io import voice_output
+            voice_output.warmup()
+            tts = voice_output
+        return router, asr, tts
+    return (TracedStubRouter(args.router_latency_ms), StubASR(samples, args.asr_latency_ms),
+            StubTTS(args.tts_latency_ms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent call sessions and report per-stage latency.")
+    parser.add_argument("--flow", default=DEFAULT_FLOW, help="Flow file to load into an in-memory graph.")
+    parser.add_argument("--graph-file", help="Use a compiled graph file (scripts/compile_graph.py) instead of --flow.")
+    parser.add_argument("--neo4j", action="store_true", help="Read the graph from Neo4j (GraphStore) instead of --flow.")
+    parser.add_argument("--utterances", default=DEFAULT_UTTERANCES, help="JSON list of {node, text} callers pick answers from.")
+    parser.add_argument("--script", help="JSON list of transcripts (lists of utterances); caller i replays transcript i mod n.")
+    parser.add_argument("--audio", help="Recordings directory (.wav + transcripts.tsv); enables the voice path.")
+    parser.add_argument("--models", choices=["stub", "real"], default="stub", help="Stub models, or load the configured ones.")
+    parser.add_argument("--model-server", help="Use the shared model server at this socket for routing, ASR and TTS.")
+    parser.add_argument("--router-backend", default=os.getenv("CONVOFLOW_ROUTER_BACKEND", "zero-shot"), help="Router backend for --models real.")
+    parser.add_argument("--asr-backend", default=os.getenv("CONVOFLOW_ASR_BACKEND", "large-v3"), help="ASR backend for --models real.")
+    parser.add_argument("--router-latency-ms", type=float, default=40.0, help="Stub router latency.")
+    parser.add_argument("--asr-latency-ms", type=float, default=250.0, help="Stub ASR latency.")
+    parser.add_argument("--tts-latency-ms", type=float, default=120.0, help="Stub TTS latency.")
+    parser.add_argument("--metrics", choices=["null", "postgres"], default="null", help="Where sessions log their turns.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100, 200], help="Concurrent sessions per level, ramped in order.")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean seconds a caller takes to answer.")
+    parser.add_argument("--max-turns", type=int, default=8, help="Answers per session before hanging up.")
+    parser.add_argument("--back-rate", type=float, default=0.1, help="Share of answers that are 'go back'.")
+    parser.add_argument("--workers", type=int, default=32, help="Engine executor threads.")
+    parser.add_argument("--slo-p95-ms", type=float, help="Stop ramping once p95 response latency exceeds this.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_out", help="Write results to this JSON file ('-' for stdout).")
+    args = parser.parse_args()
+
+    tracing.tracer.enabled = True
+    # Keep stdout clean for the JSON when it goes there
+    out = sys.stderr if args.json_out == "-" else sys.stdout
+
+    samples = load_dataset(args.audio) if args.audio else []
+    if args.neo4j:
+        from convoflow.data.graph_store import GraphStore
+        graph = GraphStore()
+    elif args.graph_file:
+        from convoflow.data.compiled_store import CompiledGraphStore
+        graph = CompiledGraphStore(args.graph_file)
+    else:
+        graph = InMemoryGraphStore.from_flow(args.flow)
+    logger_factory = None if args.metrics == "postgres" else NullSessionLogger
+
+    router, asr, tts = build_components(args, samples)
+    engine = ConversationEngine(graph, router, logger_factory=logger_factory, max_workers=args.workers,
+                                offload_graph_reads=args.neo4j)
+
+    with open(args.utterances, 'r', encoding='utf-8') as f:
+        utterances = json.load(f)
+    scripts = None
+    if args.script:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            scripts = json.load(f)
+    matcher = LexicalMatcher()
+
+    def make_caller(i):
+        rng = random.Random(args.seed * 1_000_003 + i)
+        if samples:
+            choose = recording_chooser(samples, rng, matcher)
+        elif scripts:
+            choose = script_chooser(scripts[i % len(scripts)])
+        else:
+            choose = utterance_chooser(utterances, rng, args.back_rate)
+        return BenchmarkCaller(engine.offload, choose, rng, args.think_time, args.max_turns,
+                               asr=asr if samples else None, tts=tts if samples else None)
+
+    levels = []
+    print(f"{'sessions':>9}{'turns':>8}{'turns/s':>10}{'failed':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  (response)", file=out)
+    try:
+        for concurrency in args.concurrency:
+            level = asyncio.run(run_level(engine, make_caller, concurrency))
+            levels.append(level)
+            response = level["stages"].get(RESPONSE_STAGE, {})
+            print(f"{concurrency:>9}{level['turns']:>8}{level['turns_per_s']:>10.1f}{level['failed_sessions']:>8}"
+                  f"{response.get('p50_ms', 0.0):>9.1f}{response.get('p95_ms', 0.0):>9.1f}{response.get('p99_ms', 0.0):>9.1f}",
+                  file=out)
+            if args.slo_p95_ms is not None and response.get("p95_ms", 0.0) > args.slo_p95_ms:
+                print(f"p95 response latency exceeded {args.slo_p95_ms} ms; stopping the ramp.", file=out)
+                break
+    finally:
+        engine.shutdown()
+        graph.close()
+
+    within_slo = None
+    if args.slo_p95_ms is not None:
+        passing = [l["concurrency"] for l in levels
+                   if l["stages"].get(RESPONSE_STAGE, {}).get("p95_ms", 0.0) <= args.slo_p95_ms and not l["failed_sessions"]]
+        within_slo = max(passing, default=0)
+        print(f"Highest concurrency within the p95 SLO: {within_slo}", file=out)
+
+    results = {
+        "config": {
+            "path": "voice" if samples else "text",
+            "models": "server" if args.model_server else args.models,
+            "graph": "neo4j" if args.neo4j else ("compiled" if args.graph_file else "memory"),
+            "metrics": args.metrics,
+            "think_time_s": args.think_time,
+            "max_turns": args.max_turns,
+            "workers": args.workers,
+            "stub_latency_ms": {"router": args.router_latency_ms, "asr": args.asr_latency_ms, "tts": args.tts_latency_ms},
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "slo_p95_ms": args.slo_p95_ms,
+        "max_concurrency_within_slo": within_slo,
+        "levels": levels,
+    }
+    if args.json_out == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_out}", file=out)
+
+
+if __name__ == "__main__":
+    main()
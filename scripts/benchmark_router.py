@@ -0,0 +1,117 @@
+# scripts/benchmark_router.py
+#
+# Compares router backends on the same labelled utterances. The first backend is the
+# reference; "agree" is the share of utterances where a backend picks the same route,
+# so quantized backends can be checked for routing regressions, e.g.:
+#
+#   python scripts/benchmark_router.py --backends zero-shot torch-int8 onnx-int8
+import sys
+import os
+import json
+import time
+import argparse
+import logging
+import statistics
+
+# Add the project root for convoflow imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from convoflow.ai.ai_interface import AIRouter
+from convoflow.data.memory_store import InMemoryGraphStore
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLOW = os.path.join(project_root, "examples", "flows", "coolcompany.json")
+DEFAULT_UTTERANCES = os.path.join(project_root, "examples", "flows", "coolcompany_utterances.json")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark(router, graph, utterances, repeats):
+    latencies_ms = []
+    correct = 0
+    decisions = []
+    for item in utterances:
+        labels = list(graph.get_transitions(item['node']).keys())
+        for i in range(repeats):
+            start = time.perf_counter()
+            choice = router.choose_route(item['text'], labels)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+        decisions.append(choice)
+        correct += choice == item['expected']
+    return {
+        "turns": len(latencies_ms),
+        "mean_ms": statistics.mean(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "accuracy": correct / len(utterances),
+        "decisions": decisions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-turn routing latency and accuracy across router backends.")
+    parser.add_argument("--backends", nargs="+", default=["zero-shot", "embedding"], help="Router backends to compare; the first is the reference.")
+    parser.add_argument("--flow", default=DEFAULT_FLOW, help="Flow file providing the candidate labels per node.")
+    parser.add_argument("--utterances", default=DEFAULT_UTTERANCES, help="JSON list of {node, text, expected}.")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per utterance.")
+    parser.add_argument("--lexical-threshold", type=float, default=None,
+                        help="Enable the lexical fast path with this threshold (default: disabled).")
+    parser.add_argument("--json", dest="json_out", help="Also write results to this JSON file.")
+    args = parser.parse_args()
+
+    graph = InMemoryGraphStore.from_flow(args.flow)
+    with open(args.utterances, 'r', encoding='utf-8') as f:
+        utterances = json.load(f)
+
+    results = {}
+    for backend in args.backends:
+        print(f"Loading '{backend}' backend...")
+        load_start = time.perf_counter()
+        # Measure the model, not the cache (and not the lexical tier unless asked)
+        router = AIRouter(backend=backend, cache_size=0, lexical_threshold=args.lexical_threshold)
+        router.warm(graph)
+        load_s = time.perf_counter() - load_start
+
+        # One untimed pass so lazy initialisation doesn't skew the numbers
+        benchmark(router, graph, utterances[:1], 1)
+        results[backend] = benchmark(router, graph, utterances, args.repeats)
+        results[backend]["load_s"] = load_s
+        results[backend]["fast_path_ratio"] = router.fast_path_ratio
+
+    reference = results[args.backends[0]]["decisions"]
+    for r in results.values():
+        r["agreement"] = sum(a == b for a, b in zip(r["decisions"], reference)) / len(reference)
+
+    print("\n" + "=" * 80)
+    print(f"{'backend':<16}{'load (s)':>10}{'mean (ms)':>12}{'p50 (ms)':>11}{'p95 (ms)':>11}{'accuracy':>11}{'agree':>8}")
+    print("-" * 80)
+    for backend, r in results.items():
+        print(
+            f"{backend:<16}{r['load_s']:>10.1f}{r['mean_ms']:>12.1f}{r['p50_ms']:>11.1f}"
+            f"{r['p95_ms']:>11.1f}{r['accuracy']:>11.0%}{r['agreement']:>8.0%}"
+        )
+    print("=" * 80)
+    if args.lexical_threshold is not None:
+        for backend, r in results.items():
+            print(f"  {backend}: lexical fast path handled {r['fast_path_ratio']:.0%} of turns")
+
+    for backend, r in results.items():
+        for item, decision, expected in zip(utterances, r["decisions"], reference):
+            if decision != expected:
+                print(f"  {backend}: '{item['text']}' -> {decision} (reference: {expected})")
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# scripts/benchmark_startup.py
+# Measures what a process pays to touch convoflow.io. Each scenario runs in a fresh
+# interpreter. "import" is the cost with lazy loading; "import + warmup" loads every
+# model, which is what importing the modules used to cost before loading became lazy.
+import sys
+import os
+import json
+import argparse
+import subprocess
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SCENARIOS = {
+    "import": (
+        "import convoflow.io.voice_input, convoflow.io.voice_output"
+    ),
+    "import + warmup": (
+        "import convoflow.io.voice_input as vi, convoflow.io.voice_output as vo; vi.warmup(); vo.warmup()"
+    ),
+}
+
+# Runs inside the child: times the snippet and reports peak RSS (ru_maxrss is KiB on Linux, bytes on macOS)
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+exec({snippet!r})
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+print("RESULT " + json.dumps({{"seconds": elapsed, "peak_rss_mb": rss_mb}}))
+"""
+
+
+def run_scenario(snippet):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD.format(snippet=snippet)],
+        cwd=project_root, capture_output=True, text=True,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(f"Scenario failed:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure convoflow.io import/warmup time and memory.")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per scenario; the fastest is reported.")
+    parser.add_argument("--json", dest="json_out", help="Also write results to this JSON file.")
+    args = parser.parse_args()
+
+    results = {}
+    for name, snippet in SCENARIOS.items():
+        runs = [run_scenario(snippet) for _ in range(args.repeats)]
+        results[name] = min(runs, key=lambda r: r["seconds"])
+        print(f"{name:<18} {results[name]['seconds']:>8.2f}s  peak RSS {results[name]['peak_rss_mb']:>8.0f} MB")
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
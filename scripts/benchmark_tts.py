@@ -0,0 +1,70 @@
+# scripts/benchmark_tts.py
+# Compares time-to-first-audio of blocking vs. streaming (sentence-chunked) TTS for
+# every node text in a flow. Synthesis only, no audio device needed; the waveform
+# cache is bypassed so both modes pay full synthesis cost.
+import sys
+import os
+import json
+import time
+import argparse
+import logging
+
+# Add the project root for convoflow imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from convoflow.data.flow_loader import load_flow
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_FLOW = os.path.join(project_root, "examples", "flows", "coolcompany.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure TTS time-to-first-audio, blocking vs. streaming.")
+    parser.add_argument("--flow", default=DEFAULT_FLOW, help="Flow file whose node texts are synthesized.")
+    parser.add_argument("--json", dest="json_out", help="Also write results to this JSON file.")
+    args = parser.parse_args()
+
+    from convoflow.io import voice_output
+
+    nodes, _ = load_flow(args.flow)
+    voice_output.synthesize("Warm up.", use_cache=False)
+
+    results = []
+    for node in nodes:
+        text = node['text']
+        chunks = voice_output.split_sentences(text)
+
+        start = time.perf_counter()
+        waveform = voice_output.synthesize(text, use_cache=False)
+        blocking_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        voice_output.synthesize(chunks[0], use_cache=False)
+        streaming_s = time.perf_counter() - start
+
+        results.append({
+            "node": node['id'],
+            "chunks": len(chunks),
+            "audio_s": len(waveform) / voice_output.OUTPUT_SAMPLE_RATE,
+            "blocking_ttfa_s": blocking_s,
+            "streaming_ttfa_s": streaming_s,
+        })
+
+    print("=" * 78)
+    print(f"{'node':<26}{'chunks':>7}{'audio (s)':>11}{'blocking TTFA':>16}{'streaming TTFA':>17}")
+    print("-" * 78)
+    for r in results:
+        print(f"{r['node']:<26}{r['chunks']:>7}{r['audio_s']:>11.1f}"
+              f"{r['blocking_ttfa_s'] * 1000:>14.0f}ms{r['streaming_ttfa_s'] * 1000:>15.0f}ms")
+    print("=" * 78)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
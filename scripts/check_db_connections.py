@@ -3,6 +3,10 @@ import os
 import sys
 from dotenv import load_dotenv
 
+# Add the project root for convoflow imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
 print("Loading environment variables from .env file...")
 if not load_dotenv(verbose=True):
     print("Warning: .env file not found or empty.")
@@ -25,13 +29,16 @@ def check_neo4j():
     print(f"  Using URI: {neo4j_uri}")
     print(f"  Using User: {neo4j_user}")
 
-    driver = None
+    close_drivers = None
     try:
         # Import here to ensure dotenv loads first
-        from neo4j import GraphDatabase, exceptions
-        driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-        driver.verify_connectivity()
+        from neo4j import exceptions
+        from convoflow.data.neo4j_driver import close_drivers, get_driver
+        driver = get_driver(neo4j_uri, neo4j_user, neo4j_password)
+        driver.read("RETURN 1 AS ok")
         print("SUCCESS: Neo4j connection verified.")
+        stats = driver.stats()
+        print(f"  Pool size: {stats['pool_size']} (peak in use: {stats['peak_in_use']}, mean session: {stats['mean_session_ms']:.1f} ms)")
         return True
     except exceptions.AuthError:
         print("FAILURE: Neo4j connection failed - Authentication Error (check user/password).")
@@ -43,8 +50,8 @@ def check_neo4j():
         print(f"FAILURE: Neo4j connection failed - Unexpected error: {e}")
         return False
     finally:
-        if driver:
-            driver.close()
+        if close_drivers:
+            close_drivers()
         print("-" * 30)
 
 # --- PostgreSQL Check ---
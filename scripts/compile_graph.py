@@ -0,0 +1,54 @@
+# scripts/compile_graph.py
+# Compiles the call graph into a memory-mapped binary file for CompiledGraphStore, so
+# dev, CI and edge deployments can run without Neo4j (CONVOFLOW_GRAPH_FILE=<file>).
+#   python scripts/compile_graph.py -o graph.cfg                       # export from Neo4j
+#   python scripts/compile_graph.py --flow examples/flows/coolcompany.json -o graph.cfg
+import sys
+import os
+import argparse
+import logging
+from dotenv import load_dotenv
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+load_dotenv(os.path.join(project_root, '.env'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+from convoflow.data.compiled_store import CompiledGraphStore, compile_store
+from convoflow.data.memory_store import InMemoryGraphStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the call graph to a memory-mapped binary file.")
+    parser.add_argument("--flow", help="JSON/YAML flow file to compile. Default: export the graph from Neo4j.")
+    parser.add_argument("-o", "--output", default=os.getenv("CONVOFLOW_GRAPH_FILE") or None,
+                        help="Output file (default: $CONVOFLOW_GRAPH_FILE).")
+    args = parser.parse_args()
+    if not args.output:
+        parser.error("No output file: pass --output or set CONVOFLOW_GRAPH_FILE.")
+
+    if args.flow:
+        source = InMemoryGraphStore.from_flow(args.flow)
+    else:
+        from convoflow.data.graph_store import GraphStore
+        source = GraphStore()
+    try:
+        expected = source.get_snapshot()
+        compile_store(source, args.output)
+    finally:
+        source.close()
+
+    # Read the file back and make sure it describes the same graph
+    compiled = CompiledGraphStore(args.output)
+    snapshot = compiled.get_snapshot()
+    compiled.close()
+    if snapshot.texts != expected.texts or snapshot.transitions != expected.transitions:
+        logger.error(f"{args.output} does not match the source graph.")
+        sys.exit(1)
+    logger.info(f"Verified {args.output} ({os.path.getsize(args.output)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# scripts/fake_pbx.py
+# Local stand-in for a PBX / SIP media bridge, for testing scripts/audio_gateway.py.
+# Opens concurrent calls and streams each one continuously, like a phone line: 20 ms
+# μ-law (or PCM) packets paced in real time, carrying line noise while the caller is quiet
+# and an utterance once each prompt has finished playing. Reports the response latency
+# callers hear (end of their utterance to the first audio of the next prompt), which
+# includes the gateway's end-of-speech silence window.
+#
+# Utterances are clips from a recordings directory (scripts/benchmark_asr.py layout:
+# 16-bit PCM .wav files plus transcripts.tsv), or synthetic voiced bursts without --audio.
+#   python scripts/fake_pbx.py --connect 127.0.0.1:7010 --calls 50 --max-turns 4
+#   python scripts/fake_pbx.py --connect /tmp/convoflow-gateway.sock --audio data/ivr_clips --json -
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+
+import numpy as np
+
+# Add the project root for convoflow imports (this directory is already on the path, for
+# the dataset loader shared with the benchmark scripts)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from convoflow.core.gateway import DEFAULT_ADDRESS, open_connection
+from convoflow.io.telephony import MODEL_SAMPLE_RATE, PHONE_SAMPLE_RATE, CallAudioEncoder
+from convoflow.serving.protocol import read_frame, write_frame
+from convoflow.tracing import LatencyHistogram
+from benchmark_asr import load_dataset
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def synthetic_utterance(rng, seconds):
+    """A voiced-sounding burst at MODEL_SAMPLE_RATE: harmonics of a wandering pitch, syllable-rate envelope."""
+    t = np.arange(int(seconds * MODEL_SAMPLE_RATE)) / MODEL_SAMPLE_RATE
+    pitch = rng.uniform(100, 220) * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / MODEL_SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * rng.uniform(3, 5) * t)
+    return (0.15 * voice * envelope).astype(np.float32)
+
+
+class FakeCall:
+    """One simulated caller on its own connection to the gateway."""
+
+    def __init__(self, index, args, clips, latencies):
+        self.call_id = f"fake-{index}"
+        self.args = args
+        self.clips = clips
+        self.latencies = latencies
+        self.rng = random.Random(args.seed * 1_000_003 + index)
+        self.noise = np.random.default_rng(args.seed * 1_000_003 + index)
+        self.encoder = CallAudioEncoder(args.encoding, args.sample_rate)
+        self.bytes_per_second = args.sample_rate * (1 if args.encoding == "mulaw" else 2)
+        self.packet_len = MODEL_SAMPLE_RATE * args.packet_ms // 1000
+
+        self.turns = 0
+        self.outcome = None
+        self.transcripts = []
+        self._speech = None          # Utterance being sent, at MODEL_SAMPLE_RATE
+        self._speech_pos = 0
+        self._spoke_at = None        # When the last utterance finished sending
+        self._playout_end = 0.0      # When the prompt audio received so far finishes playing
+        self._speak_task = None
+
+    async def run(self):
+        reader, writer = await open_connection(self.args.connect)
+        try:
+            write_frame(writer, {"type": "start", "call_id": self.call_id,
+                                 "encoding": self.args.encoding, "sample_rate": self.args.sample_rate})
+            await writer.drain()
+            frame = await read_frame(reader)
+            if frame is None or frame[0].get("type") != "started":
+                self.outcome = frame[0].get("reason", "refused") if frame else "closed"
+                return
+            sender = asyncio.get_running_loop().create_task(self._send_loop(writer))
+            try:
+                self.outcome = await self._receive_loop(reader, writer)
+            finally:
+                sender.cancel()
+                if self._speak_task is not None:
+                    self._speak_task.cancel()
+        finally:
+            writer.close()
+
+    async def _send_loop(self, writer):
+        loop = asyncio.get_running_loop()
+        interval = self.args.packet_ms / 1000
+        next_send = loop.time()
+        while True:
+            if self._speech is not None:
+                packet = self._speech[self._speech_pos:self._speech_pos + self.packet_len]
+                self._speech_pos += self.packet_len
+                if self._speech_pos >= len(self._speech):
+                    self._speech = None
+                    self._spoke_at = loop.time() + interval  # Once this packet has played
+                if len(packet) < self.packet_len:
+                    packet = np.concatenate((packet, self._line_noise(self.packet_len - len(packet))))
+            else:
+                packet = self._line_noise(self.packet_len)
+            write_frame(writer, {"type": "audio"}, self.encoder.encode(packet))
+            await writer.drain()
+            next_send += interval
+            await asyncio.sleep(max(0.0, next_send - loop.time()))
+
+    def _line_noise(self, n):
+        return (self.noise.standard_normal(n) * self.args.noise_level).astype(np.float32)
+
+    async def _speak_after_prompt(self):
+        loop = asyncio.get_running_loop()
+        think = self.rng.uniform(0.5, 1.5) * self.args.think_time
+        await asyncio.sleep(max(0.0, self._playout_end - loop.time()) + think)
+        if self.clips:
+            self._speech = self.rng.choice(self.clips)
+        else:
+            self._speech = synthetic_utterance(self.rng, self.rng.uniform(0.8, 1.8))
+        self._speech_pos = 0
+
+    async def _receive_loop(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await read_frame(reader)
+            if frame is None:
+                return "closed"
+            header, payload = frame
+            kind = header.get("type")
+            if kind == "audio":
+                now = loop.time()
+                if self._spoke_at is not None:
+                    self.latencies.record(max(0.0, now - self._spoke_at))
+                    self._spoke_at = None
+                self._playout_end = max(self._playout_end, now) + len(payload) / self.bytes_per_second
+            elif kind == "transcript":
+                self.transcripts.append(header.get("text", ""))
+            elif kind == "listening":
+                if self.turns >= self.args.max_turns:
+                    write_frame(writer, {"type": "hangup"})
+                    await writer.drain()
+                    return "completed"
+                self.turns += 1
+                self._speak_task = loop.create_task(self._speak_after_prompt())
+            elif kind == "hangup":
+                return header.get("reason", "hangup")
+
+
+async def run_calls(args, clips):
+    latencies = LatencyHistogram()
+    calls = [FakeCall(i, args, clips, latencies) for i in range(args.calls)]
+
+    async def start(call, delay):
+        await asyncio.sleep(delay)
+        try:
+            await call.run()
+        except (ConnectionError, OSError) as e:
+            call.outcome = f"error: {e}"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(start(call, i * args.ramp_s / max(args.calls, 1)) for i, call in enumerate(calls)))
+    wall = time.perf_counter() - started
+
+    outcomes = {}
+    for call in calls:
+        outcomes[call.outcome] = outcomes.get(call.outcome, 0) + 1
+    return {
+        "calls": args.calls,
+        "outcomes": outcomes,
+        "turns": sum(call.turns for call in calls),
+        "wall_s": wall,
+        "response": latencies.snapshot(),
+        "sample_transcripts": [t for call in calls[:3] for t in call.transcripts][:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream concurrent fake phone calls at an audio gateway.")
+    parser.add_argument("--connect", default=DEFAULT_ADDRESS, help="Gateway host:port or Unix socket path.")
+    parser.add_argument("--calls", type=int, default=10, help="Concurrent calls.")
+    parser.add_argument("--ramp-s", type=float, default=1.0, help="Spread call starts over this many seconds.")
+    parser.add_argument("--max-turns", type=int, default=4, help="Answers per call before hanging up.")
+    parser.add_argument("--think-time", type=float, default=0.3, help="Mean seconds of quiet after a prompt before answering.")
+    parser.add_argument("--audio", help="Recordings directory (.wav + transcripts.tsv) to speak; default: synthetic bursts.")
+    parser.add_argument("--encoding", choices=["mulaw", "pcm16"], default="mulaw")
+    parser.add_argument("--sample-rate", type=int, choices=[PHONE_SAMPLE_RATE, MODEL_SAMPLE_RATE], default=PHONE_SAMPLE_RATE)
+    parser.add_argument("--packet-ms", type=int, default=20, help="Audio per packet.")
+    parser.add_argument("--noise-level", type=float, default=0.002, help="Line noise RMS between utterances.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_out", help="Write results to this JSON file ('-' for stdout).")
+    args = parser.parse_args()
+
+    # Keep stdout clean for the JSON when it goes there
+    out = sys.stderr if args.json_out == "-" else sys.stdout
+    clips = [audio for _, audio, _ in load_dataset(args.audio)] if args.audio else []
+
+    results = asyncio.run(run_calls(args, clips))
+    response = results["response"]
+    print(f"{results['calls']} calls, {results['turns']} turns in {results['wall_s']:.1f} s; outcomes: {results['outcomes']}", file=out)
+    print(f"Response latency (end of speech -> first prompt audio): p50 {response['p50_ms']:.0f} ms, "
+          f"p95 {response['p95_ms']:.0f} ms, p99 {response['p99_ms']:.0f} ms, max {response['max_ms']:.0f} ms", file=out)
+
+    if args.json_out == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_out}", file=out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import sys
 import os
+import argparse
 import logging
 from dotenv import load_dotenv
 
@@ -10,6 +11,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 try:
     from convoflow.data.graph_store import GraphStore
+    from convoflow.data.flow_loader import import_flow
 except ImportError as e:
     print(f"Error importing GraphStore: {e}")
     print("Make sure the script is run from the project root or the path is correctly set.")
@@ -18,7 +20,32 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Initialize the Neo4j call graph.")
+    parser.add_argument("--flow", help="Path to a JSON/YAML flow file to bulk import instead of the graph defined below.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per UNWIND write transaction (default: 5000).")
+    parser.add_argument("--metrics-schema", action="store_true",
+                        help="Create/upgrade the PostgreSQL metrics schema and exit, leaving the graph untouched.")
+    return parser.parse_args()
+
+def init_metrics_schema():
+    from convoflow.db.metrics import ensure_schema
+    from convoflow.db.pool import close_pool
+    try:
+        logger.info("Applying metrics schema migrations...")
+        ensure_schema(force=True)
+        logger.info("Metrics schema is up to date.")
+    except Exception as e:
+        logger.error(f"An error occurred while applying the metrics schema: {e}", exc_info=True)
+    finally:
+        close_pool()
+
 def main():
+    args = parse_args()
+    if args.metrics_schema:
+        init_metrics_schema()
+        return
+
     store = None
     try:
         logger.info("Attempting to connect to Neo4j...")
@@ -31,6 +58,12 @@ def main():
         store.clear_graph()
         logger.info("Graph data cleared.")
 
+        if args.flow:
+            logger.info(f"Bulk importing flow from {args.flow}...")
+            node_count, edge_count = import_flow(store, args.flow, batch_size=args.batch_size)
+            logger.info(f"Successfully imported {node_count} nodes and {edge_count} relationships.")
+            return
+
         logger.info("Adding nodes and relationships...")
         
         # CREATE YOUR GRAPH HERE (BE ADVISED THAT SPECIFIC NAMING IS RECOMMENDED FOR BETTER AI ROUTING)
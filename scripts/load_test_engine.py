@@ -0,0 +1,144 @@
+# scripts/load_test_engine.py
+# Drives many concurrent ConversationEngine sessions in one process with stub models,
+# an in-memory graph and no metrics database, to measure the engine's own overhead and
+# how many concurrent calls one core can carry.
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import statistics
+
+# Add the project root for convoflow imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from convoflow.ai.lexical import LexicalMatcher
+from convoflow.core.engine import ConversationEngine, Transport
+from convoflow.data.memory_store import InMemoryGraphStore
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_FLOW = os.path.join(project_root, "examples", "flows", "coolcompany.json")
+
+
+class StubRouter:
+    """Deterministic router: lexical match, else the first option. Optional simulated model latency."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.matcher = LexicalMatcher()
+
+    def choose_route(self, user_input, candidate_labels):
+        if self.latency:
+            time.sleep(self.latency)
+        label, _ = self.matcher.match(user_input, candidate_labels)
+        return label or candidate_labels[0]
+
+
+class NullSessionLogger:
+    def log_step(self, node_id, user_input, predicted_keyword, timings=None):
+        pass
+
+    def end_session(self, end_node_id=None, completed=False):
+        pass
+
+    def close(self):
+        pass
+
+
+class ScriptedCaller(Transport):
+    """Random-walk caller: picks a transition (sometimes says 'go back') after `think_time` seconds."""
+
+    def __init__(self, rng, think_time, max_turns, latencies):
+        self.rng = rng
+        self.think_time = think_time
+        self.max_turns = max_turns
+        self.latencies = latencies
+        self.turns = 0
+        self._answered_at = None
+
+    async def say(self, text, kind="prompt", node_id=None):
+        pass
+
+    async def listen(self, options):
+        now = time.perf_counter()
+        if self._answered_at is not None:
+            # Engine time from the caller's answer to the next prompt being ready
+            self.latencies.append(now - self._answered_at)
+        if self.turns >= self.max_turns:
+            return None
+        self.turns += 1
+        if self.think_time:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+        self._answered_at = time.perf_counter()
+        if self.turns > 1 and self.rng.random() < 0.1:
+            return "go back"
+        return self.rng.choice(options).replace("_", " ")
+
+
+async def run_level(engine, concurrency, think_time, max_turns, seed):
+    latencies = []
+    callers = [ScriptedCaller(random.Random(seed + i), think_time, max_turns, latencies) for i in range(concurrency)]
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(engine.run_session(caller) for caller in callers))
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    turns = sum(c.turns for c in callers)
+    latencies_ms = sorted(l * 1000 for l in latencies) or [0.0]
+    pct = lambda p: latencies_ms[min(len(latencies_ms) - 1, int(p / 100 * len(latencies_ms)))]
+    cpu_per_turn = cpu / max(turns, 1)
+    return {
+        "concurrency": concurrency,
+        "turns": turns,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "turns_per_s": turns / wall,
+        "cpu_ms_per_turn": cpu_per_turn * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "mean_ms": statistics.mean(latencies_ms),
+        # A caller takes one turn per `think_time`, so one core keeps up with this many callers
+        "sessions_per_core": think_time / cpu_per_turn if think_time else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test ConversationEngine with stub models.")
+    parser.add_argument("--flow", default=DEFAULT_FLOW, help="Flow file to walk.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 1000, 5000], help="Concurrent sessions per level.")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean seconds a caller takes to answer.")
+    parser.add_argument("--max-turns", type=int, default=10, help="Turns per session before hanging up.")
+    parser.add_argument("--router-latency-ms", type=float, default=0.0, help="Simulated blocking model latency per route.")
+    parser.add_argument("--workers", type=int, default=32, help="Engine executor threads.")
+    parser.add_argument("--json", dest="json_out", help="Also write results to this JSON file.")
+    args = parser.parse_args()
+
+    graph = InMemoryGraphStore.from_flow(args.flow)
+    engine = ConversationEngine(graph, StubRouter(args.router_latency_ms),
+                                logger_factory=NullSessionLogger, max_workers=args.workers,
+                                offload_graph_reads=False)
+
+    results = []
+    print(f"{'sessions':>9}{'turns':>9}{'turns/s':>10}{'cpu ms/turn':>13}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'sessions/core':>15}")
+    for level in args.concurrency:
+        r = asyncio.run(run_level(engine, level, args.think_time, args.max_turns, seed=level))
+        results.append(r)
+        per_core = f"{r['sessions_per_core']:.0f}" if r['sessions_per_core'] else "-"
+        print(f"{r['concurrency']:>9}{r['turns']:>9}{r['turns_per_s']:>10.0f}{r['cpu_ms_per_turn']:>13.3f}"
+              f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{per_core:>15}")
+    engine.shutdown()
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# scripts/model_server.py
+# Runs the shared model server: routing, ASR and TTS models are loaded once here and
+# served over a Unix socket to every session process (CONVOFLOW_MODEL_SERVER=<socket>).
+#   python scripts/model_server.py                      # serve all models
+#   python scripts/model_server.py --operations classify --router-backend onnx-int8
+#   python scripts/model_server.py --stats              # print a running server's queue metrics
+import sys
+import os
+import json
+import signal
+import logging
+import argparse
+import threading
+from dotenv import load_dotenv
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+load_dotenv(os.path.join(project_root, '.env'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+from convoflow.serving.server import OPERATIONS, ModelServer
+from convoflow.serving.client import ModelClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve routing, ASR and TTS models to many session processes.")
+    parser.add_argument("--socket", help="Unix socket path (default: $CONVOFLOW_MODEL_SERVER or the cache root).")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--router-backend", default=os.getenv("CONVOFLOW_ROUTER_BACKEND", "zero-shot"))
+    parser.add_argument("--asr-backend", default=None, help="ASR preset or model id (default: $CONVOFLOW_ASR_BACKEND).")
+    parser.add_argument("--max-queue", type=int, default=64, help="Requests waiting per operation before rejecting.")
+    parser.add_argument("--max-batch-size", type=int, default=16, help="Routing requests per forward pass.")
+    parser.add_argument("--asr-workers", type=int, default=1)
+    parser.add_argument("--tts-workers", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=10.0, help="Default per-request timeout in seconds.")
+    parser.add_argument("--stats", action="store_true", help="Print a running server's metrics and exit.")
+    args = parser.parse_args()
+
+    if args.stats:
+        print(json.dumps(ModelClient(args.socket).stats(), indent=2))
+        return
+
+    server = ModelServer(
+        socket_path=args.socket,
+        operations=args.operations,
+        router_backend=args.router_backend,
+        asr_backend=args.asr_backend,
+        max_queue=args.max_queue,
+        workers={"transcribe": args.asr_workers, "synthesize": args.tts_workers},
+        max_batch_size=args.max_batch_size,
+        default_timeout=args.timeout,
+    )
+
+    # serve_forever() runs on this thread, so shut down from another one
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    server.serve_forever()
+    logging.info(f"Final model server stats: {json.dumps(server.stats()['queues'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# scripts/prerender_prompts.py
+# Synthesizes every node text plus the runner's fixed prompts into the TTS waveform
+# cache, so prompt playback starts instantly at call time.
+import sys
+import os
+import time
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the project root for convoflow imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from convoflow.core.prompts import FIXED_PROMPTS
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def node_texts_from_flow(path):
+    from convoflow.data.flow_loader import load_flow
+    nodes, _ = load_flow(path)
+    return [n['text'] for n in nodes]
+
+
+def node_texts_from_neo4j():
+    from convoflow.data.graph_store import GraphStore
+    store = GraphStore()
+    try:
+        return list(store.get_snapshot().texts.values())
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render node and fixed prompts into the TTS cache.")
+    parser.add_argument("--flow", help="Read node texts from this flow file instead of Neo4j.")
+    parser.add_argument("--extra", nargs="*", default=[], help="Additional phrases to pre-render.")
+    args = parser.parse_args()
+
+    texts = node_texts_from_flow(args.flow) if args.flow else node_texts_from_neo4j()
+    texts = list(dict.fromkeys(texts + FIXED_PROMPTS + args.extra))  # De-duplicate, keep order
+
+    from convoflow.io import voice_output
+
+    logger.info(f"Pre-rendering {len(texts)} prompts into {voice_output.waveform_cache.directory}...")
+    start = time.perf_counter()
+    rendered = voice_output.prerender(texts)
+    logger.info(
+        f"Rendered {rendered} new prompts ({len(texts) - rendered} already cached) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# scripts/refresh_analytics.py
+# Folds new routes and ended sessions into the analytics aggregates (see
+# convoflow/db/migrations/0003_analytics_aggregates.sql). Schedule it, e.g. from cron every
+# 15 minutes; concurrent runs queue on an advisory lock, so overlapping schedules are safe.
+# Serving processes only read the aggregates (prefetch transition weights, analytics API).
+#   python scripts/refresh_analytics.py
+#   python scripts/refresh_analytics.py --every 900     # keep running, refresh every 15 minutes
+import sys
+import os
+import time
+import argparse
+import logging
+from dotenv import load_dotenv
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+load_dotenv(os.path.join(project_root, '.env'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+from convoflow.db import analytics
+from convoflow.db.pool import close_pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the pre-aggregated metrics analytics tables.")
+    parser.add_argument("--settle-s", type=int, default=300,
+                        help="Leave rows newer than this for a later run; must exceed how late rows can be written.")
+    parser.add_argument("--every", type=float, help="Keep running and refresh every this many seconds.")
+    args = parser.parse_args()
+
+    try:
+        while True:
+            try:
+                analytics.refresh(settle_s=args.settle_s)
+            except Exception as e:
+                logger.error(f"Analytics refresh failed: {e}", exc_info=True)
+                if not args.every:
+                    sys.exit(1)
+            if not args.every:
+                break
+            time.sleep(args.every)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,15 @@ import logging
 import codecs
 import neo4j
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
 from pyvis.network import Network
 import webbrowser
 
+# Add the project root for convoflow imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from convoflow.data.neo4j_driver import close_drivers, get_driver
+
 # --- .env ---
 load_dotenv()
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
@@ -21,23 +26,17 @@ logger = logging.getLogger(__name__)
 OUTPUT_FILENAME = "graph_visualization.html"
 
 def fetch_graph_data(driver):
-    """Fetches nodes and relationships from Neo4j."""
+    """Fetches nodes and relationships from Neo4j, in one read transaction."""
     nodes = []
     relationships = []
     try:
-        with driver.session() as session:
-            # Fetch nodes
-            node_result = session.run("MATCH (n:Node) RETURN n.id AS id, n.text AS text")
-            nodes = [record.data() for record in node_result]
-            logger.info(f"Fetched {len(nodes)} nodes.")
-
-            # Fetch relationships
-            rel_result = session.run(
-                "MATCH (source:Node)-[r:TRANSITION]->(target:Node) "
-                "RETURN source.id AS source, target.id AS target, r.keyword AS keyword"
-            )
-            relationships = [record.data() for record in rel_result]
-            logger.info(f"Fetched {len(relationships)} relationships.")
+        nodes, relationships = driver.read_many([
+            ("MATCH (n:Node) RETURN n.id AS id, n.text AS text", None),
+            ("MATCH (source:Node)-[r:TRANSITION]->(target:Node) "
+             "RETURN source.id AS source, target.id AS target, r.keyword AS keyword", None),
+        ])
+        logger.info(f"Fetched {len(nodes)} nodes.")
+        logger.info(f"Fetched {len(relationships)} relationships.")
 
     except Exception as e:
         logger.error(f"Error fetching data from Neo4j: {e}", exc_info=True)
@@ -105,12 +104,9 @@ def main():
         logger.error("NEO4J_PASSWORD not found in environment variables or .env file.")
         sys.exit(1)
 
-    driver = None
     try:
         logger.info(f"Attempting to connect to Neo4j at {NEO4J_URI}...")
-        driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-        driver.verify_connectivity()
-        logger.info("Successfully connected to Neo4j.")
+        driver = get_driver(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
 
         nodes, relationships = fetch_graph_data(driver)
         create_visualization(nodes, relationships)
@@ -120,9 +116,8 @@ def main():
     except Exception as e:
         logger.error(f"An error occurred: {e}", exc_info=True)
     finally:
-        if driver:
-            logger.info("Closing Neo4j connection...")
-            driver.close()
+        logger.info("Closing Neo4j connection...")
+        close_drivers()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file